@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+import json
+import platform
+from datetime import datetime, timezone
+from tempfile import TemporaryDirectory
+
+from wikigraph.benchmark.CrawlBenchmark import CrawlBenchmark
+from wikigraph.benchmark.DumpBenchmark import DumpBenchmark
+from wikigraph.benchmark.GraphBenchmark import GraphBenchmark
+from wikigraph.benchmark.SyntheticWiki import SyntheticWiki
+from wikigraph.benchmark.WikiServer import WikiServer
+from wikigraph.cli.ArgumentParser import ArgumentParser
+from wikigraph.wikipedia.ContentScanner import ContentScanner
+
+# parse command line arguments
+args = ArgumentParser()
+
+scenario = args.add_named_parameter(
+    ['s', 'scenario'],
+    'scenario to run (' + ', '.join(CrawlBenchmark.scenarios) + ', all if not given)',
+    expects='name'
+)
+pages = args.add_named_parameter(
+    'pages',
+    'number of pages in the synthetic wiki',
+    expects='number',
+    default=2000,
+    parse=int
+)
+degree = args.add_named_parameter(
+    'degree',
+    'mean number of links per page',
+    expects='number',
+    default=50,
+    parse=int
+)
+distribution = args.add_named_parameter(
+    'distribution',
+    'distribution of links per page',
+    expects='constant|uniform|powerlaw',
+    default='powerlaw'
+)
+page_size = args.add_named_parameter(
+    'page-size',
+    'approximate page size in bytes',
+    expects='bytes',
+    default=50000,
+    parse=int
+)
+seed = args.add_named_parameter(
+    'seed',
+    'seed used to generate the wiki, delays and errors',
+    expects='number',
+    default=0,
+    parse=int
+)
+latency = args.add_named_parameter(
+    'latency',
+    'server delay per request',
+    expects='seconds',
+    default=0.0,
+    parse=float
+)
+jitter = args.add_named_parameter(
+    'jitter',
+    'maximum random delay added to the latency',
+    expects='seconds',
+    default=0.0,
+    parse=float
+)
+error_rate = args.add_named_parameter(
+    'error-rate',
+    'fraction of requests answered with 503',
+    expects='fraction',
+    default=0.0,
+    parse=float
+)
+navigation = args.add_named_parameter(
+    'navigation',
+    'number of links in a navbox on every page (0 for none)',
+    expects='number',
+    default=0,
+    parse=int
+)
+content = args.add_named_parameter(
+    'content',
+    'extract links from the article body only'
+)
+skip = args.add_named_parameter(
+    'skip',
+    'skip section of the article body (' + ', '.join(ContentScanner.sections) + ')',
+    expects='section'
+)
+workers = args.add_named_parameter(
+    'workers',
+    'number of articles downloaded concurrently',
+    expects='number',
+    default=1,
+    parse=int
+)
+compact = args.add_named_parameter(
+    'compact',
+    'build compact graphs'
+)
+dump = args.add_named_parameter(
+    'dump',
+    'build graphs from a link index of XML and SQL dumps of the wiki instead of downloading pages'
+)
+graph = args.add_named_parameter(
+    'graph',
+    'measure processing a compact graph of all pages instead of building graphs'
+)
+caches = args.add_named_parameter(
+    'caches',
+    'also build every scenario with a cold and a warm directory and SQLite cache'
+)
+no_memory = args.add_named_parameter(
+    'no-memory',
+    'skip the second build which measures peak memory'
+)
+output = args.add_named_parameter(
+    ['o', 'output'],
+    'save results to given json file',
+    expects='file'
+)
+compare = args.add_named_parameter(
+    'compare',
+    'print changes relative to results saved in the given json file',
+    expects='file'
+)
+
+args.parse()
+
+# choose scenarios
+if scenario.value is None:
+    names = list(CrawlBenchmark.scenarios)
+elif isinstance(scenario.value, list):
+    names = scenario.value
+else:
+    names = [scenario.value]
+
+for name in names:
+    if name not in CrawlBenchmark.scenarios:
+        raise ValueError(f'unknown scenario: {name}')
+
+# sections skipped by content extraction
+if skip.value is None:
+    skipped = []
+elif isinstance(skip.value, list):
+    skipped = skip.value
+else:
+    skipped = [skip.value]
+
+# generate all pages before measuring
+wiki = SyntheticWiki(pages.value, degree.value, distribution.value, page_size.value, seed.value,
+                     navigation=navigation.value)
+if not dump.value and not graph.value:
+    for i in range(wiki.page_count):
+        wiki.page(wiki.identifier(i))
+
+configuration = {
+    'pages': pages.value,
+    'degree': degree.value,
+    'distribution': distribution.value,
+    'page_size': page_size.value,
+    'seed': seed.value,
+    'latency': latency.value,
+    'jitter': jitter.value,
+    'error_rate': error_rate.value,
+    'navigation': navigation.value,
+    'content': content.value is True,
+    'skip': skipped,
+    'workers': workers.value,
+    'compact': compact.value is True,
+    'dump': dump.value is True,
+    'graph': graph.value is True,
+    'caches': caches.value is True
+}
+
+results = {
+    'created': datetime.now(timezone.utc).isoformat(),
+    'python': platform.python_version(),
+    'platform': platform.platform(),
+    'configuration': configuration,
+    'scenarios': {}
+}
+
+previous = None
+if compare.value is not None:
+    with open(compare.value, 'r') as file:
+        previous = json.load(file)['scenarios']
+
+
+def report(name, title, result):
+    print(f'{title}:')
+    for key, value in result.items():
+        line = f'    {key:<32} {value:>16.6g}'
+
+        # print relative change to previous run
+        if previous is not None and name in previous and previous[name].get(key):
+            line += f'  {(value - previous[name][key]) / previous[name][key]:+8.1%}'
+
+        print(line)
+
+
+# process a graph of the whole wiki
+if graph.value:
+    with TemporaryDirectory() as directory:
+        benchmark = GraphBenchmark(wiki, directory, memory=no_memory.value is not True)
+
+        result = benchmark.export()
+        results['scenarios']['export'] = result
+        report('export', 'export', result)
+
+        result = benchmark.render()
+        results['scenarios']['render'] = result
+        report('render', 'render', result)
+
+        result = benchmark.centrality()
+        results['scenarios']['centrality'] = result
+        report('centrality', 'centrality', result)
+
+# run scenarios offline using a link index
+elif dump.value:
+    with TemporaryDirectory() as directory:
+        benchmark = DumpBenchmark(wiki, directory, compact=compact.value is True)
+
+        result = benchmark.index()
+        results['scenarios']['index'] = result
+        report('index', 'index', result)
+
+        for name in names:
+            K, D, R = CrawlBenchmark.scenarios[name]
+            result = benchmark.run(K, D, R)
+            results['scenarios'][name] = {'K': K, 'D': D, 'R': R, **result}
+            report(name, f'{name} (K={K}, D={D}, R={R})', result)
+
+# run scenarios
+else:
+    with WikiServer(wiki, latency=latency.value, jitter=jitter.value, error_rate=error_rate.value,
+                    seed=seed.value) as server:
+        benchmark = CrawlBenchmark(server, workers=workers.value, compact=compact.value is True,
+                                   memory=no_memory.value is not True, content=content.value is True, skip=skipped)
+
+        for name in names:
+            K, D, R = CrawlBenchmark.scenarios[name]
+            result = benchmark.run(K, D, R)
+            results['scenarios'][name] = {'K': K, 'D': D, 'R': R, **result}
+            report(name, f'{name} (K={K}, D={D}, R={R})', result)
+
+            if caches.value:
+                result = benchmark.cache(K, D, R)
+                results['scenarios'][f'{name}_cache'] = {'K': K, 'D': D, 'R': R, **result}
+                report(f'{name}_cache', f'{name} with cold and warm caches', result)
+
+# save results
+if output.value is not None:
+    with open(output.value, 'w') as file:
+        json.dump(results, file, indent=2)
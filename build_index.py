@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+import logging
+from time import perf_counter
+
+from wikigraph.cli.ArgumentParser import ArgumentParser
+from wikigraph.wikipedia.DumpIndexer import DumpIndexer
+
+# parse command line arguments
+args = ArgumentParser()
+
+index = args.add_slot_parameter(
+    'index',
+    'link index file to create',
+    example='enwiki.links'
+)
+
+dump = args.add_named_parameter(
+    ['d', 'dump'],
+    'dump file to read (pages-articles xml or page, linktarget, redirect and pagelinks sql, '
+    'compressed with gzip, bzip2 or xz)',
+    expects='file'
+)
+verbose = args.add_named_parameter(
+    ['v', 'verbose'],
+    'set log level to info'
+)
+
+args.parse()
+
+# set logging
+if verbose.value:
+    logging.getLogger().setLevel(logging.INFO)
+
+# dumps are read in the order required by the indexer
+if dump.value is None:
+    raise ValueError('at least one dump file is required')
+
+file_paths = dump.value if isinstance(dump.value, list) else [dump.value]
+
+start = perf_counter()
+indexer = DumpIndexer()
+indexer.read_all(file_paths)
+indexer.save(index.value)
+
+statistics = indexer.statistics()
+print(f'indexed {statistics["articles"]} articles, {statistics["redirects"]} redirects and '
+      f'{statistics["saved_links"]} links in {perf_counter() - start:.1f}s')
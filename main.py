@@ -1,11 +1,28 @@
 #!/usr/bin/env python
+import json
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from functools import reduce
+from multiprocessing import get_all_start_methods, get_context
+from signal import SIGINT, default_int_handler, signal
+from sys import exit, stderr
 
+from wikigraph.cache.DirectoryCache import DirectoryCache
+from wikigraph.cache.SQLiteCache import SQLiteCache
 from wikigraph.cli.ArgumentParser import ArgumentParser
+from wikigraph.cli.ProgressLine import ProgressLine
+from wikigraph.graph.BloomFilter import BloomFilter
+from wikigraph.graph.DiskIndex import DiskIndex
+from wikigraph.graph.GraphAnalytics import GraphAnalytics
 from wikigraph.graph.GraphBuilder import GraphBuilder
-from wikigraph.graph.GraphDrawer import GraphDrawer
+from wikigraph.graph.GraphExporter import GraphExporter
+from wikigraph.graph.PathFinder import PathFinder
+from wikigraph.http.Fetcher import Fetcher
+from wikigraph.metrics.Metrics import Metrics
+from wikigraph.wikipedia.ApiLinkSource import ApiLinkSource
 from wikigraph.wikipedia.Article import Article
+from wikigraph.wikipedia.ContentScanner import ContentScanner
+from wikigraph.wikipedia.DumpLinkSource import DumpLinkSource
 
 # parse command line arguments
 args = ArgumentParser()
@@ -16,6 +33,11 @@ url = args.add_slot_parameter(
     example='https://en.wikipedia.org/wiki/Elon_Musk'
 )
 
+path_to = args.add_named_parameter(
+    'path',
+    'print a shortest chain of links to the given article instead of building a graph',
+    expects='url'
+)
 verbose = args.add_named_parameter(
     ['v', 'verbose'],
     'set log level to info'
@@ -55,6 +77,43 @@ pdf = args.add_named_parameter(
     'save graph to given pdf file',
     expects='path'
 )
+layout = args.add_named_parameter(
+    'layout',
+    'graph layout used for png and pdf files (chosen by graph size if auto)',
+    expects='name',
+    default='auto'
+)
+layout_iterations = args.add_named_parameter(
+    'layout-iterations',
+    'number of layout iterations',
+    expects='number',
+    parse=int
+)
+layout_cache = args.add_named_parameter(
+    'layout-cache',
+    'directory to store computed layouts in and reuse them for unchanged graphs',
+    expects='directory'
+)
+csv_file = args.add_named_parameter(
+    'csv',
+    'save edge list to given csv file',
+    expects='path'
+)
+jsonl = args.add_named_parameter(
+    'jsonl',
+    'save nodes and their edges to given json lines file',
+    expects='path'
+)
+graphml = args.add_named_parameter(
+    'graphml',
+    'save graph to given graphml file',
+    expects='path'
+)
+gexf = args.add_named_parameter(
+    'gexf',
+    'save graph to given gexf file',
+    expects='path'
+)
 highlight = args.add_named_parameter(
     ['h', 'highlight'],
     'highlight articles containing a given phrase',
@@ -65,43 +124,344 @@ cache_directory = args.add_named_parameter(
     'directory to store downloaded HTML files in',
     expects='directory'
 )
+cache_database = args.add_named_parameter(
+    'cache-db',
+    'single database file to store downloaded HTML compressed in',
+    expects='file'
+)
+cache_ttl = args.add_named_parameter(
+    'cache-ttl',
+    'seconds after which cached articles are revalidated',
+    expects='seconds',
+    parse=float
+)
+workers = args.add_named_parameter(
+    'workers',
+    'number of articles downloaded concurrently',
+    expects='number',
+    default=1,
+    parse=int
+)
+processes = args.add_named_parameter(
+    'processes',
+    'number of processes extracting links from downloaded articles',
+    expects='number',
+    parse=int
+)
+compact = args.add_named_parameter(
+    'compact',
+    'store graph using integer node ids to save memory'
+)
+index = args.add_named_parameter(
+    'index',
+    'keep node ids of a compact graph in the given new database file instead of memory',
+    expects='file'
+)
+bloom = args.add_named_parameter(
+    'bloom',
+    'answer most index lookups of new articles from memory with the given false positive rate '
+    '(false positives only cost a database read, the graph stays exact)',
+    expects='rate',
+    parse=float
+)
+checkpoint = args.add_named_parameter(
+    'checkpoint',
+    'periodically save the build state to the given file',
+    expects='file'
+)
+checkpoint_interval = args.add_named_parameter(
+    'checkpoint-interval',
+    'number of created nodes between two checkpoints',
+    expects='number',
+    default=100,
+    parse=int
+)
+resume = args.add_named_parameter(
+    'resume',
+    'continue an interrupted build from the given checkpoint file',
+    expects='file'
+)
+source = args.add_named_parameter(
+    'source',
+    'extract links from article html or request them from the api',
+    expects='html|api',
+    default='html'
+)
+offline = args.add_named_parameter(
+    'offline',
+    'read links from the given index created from Wikipedia dumps by build_index.py instead of downloading articles',
+    expects='file'
+)
+content = args.add_named_parameter(
+    'content',
+    'extract links from the article body only and ignore navigation'
+)
+skip = args.add_named_parameter(
+    'skip',
+    'skip section of the article body (' + ', '.join(ContentScanner.sections) + ')',
+    expects='section'
+)
+rate = args.add_named_parameter(
+    'rate',
+    'maximum requests per second sent to Wikipedia',
+    expects='number',
+    parse=float
+)
+retries = args.add_named_parameter(
+    'retries',
+    'maximum retries per failed request',
+    expects='number',
+    default=5,
+    parse=int
+)
+progress = args.add_named_parameter(
+    'progress',
+    'show created nodes, rate and estimated remaining time while building'
+)
+stats = args.add_named_parameter(
+    'stats',
+    'print timings, download and cache statistics to stderr'
+)
+stats_json = args.add_named_parameter(
+    'stats-json',
+    'save timings, download and cache statistics to given json file',
+    expects='file'
+)
 graph_properties = args.add_named_parameter(
     ['p', 'properties'],
     'print graph properties to stdout'
 )
+top = args.add_named_parameter(
+    'top',
+    'print the given number of nodes with highest in- and out-degree',
+    expects='number',
+    parse=int
+)
+centrality = args.add_named_parameter(
+    'centrality',
+    'print the given number of nodes with highest pagerank, in-degree, hub and authority scores',
+    expects='number',
+    parse=int
+)
 adjacency_matrix = args.add_named_parameter(
     ['m', 'matrix'],
     'print adjacency matrix to stdout'
 )
+matrix_format = args.add_named_parameter(
+    'matrix-format',
+    'adjacency matrix format (dense, coo edge list or matrix market)',
+    expects='dense|coo|mtx',
+    default='dense'
+)
 
 args.parse()
 
+# check choices before anything is downloaded
+if matrix_format.value not in ('dense', 'coo', 'mtx'):
+    raise ValueError(f'unknown matrix format: {matrix_format.value}')
+
 # set logging
 if verbose.value:
     logging.getLogger().setLevel(logging.INFO)
 
+# collect metrics only if they are printed or saved
+metrics = Metrics() if stats.value or stats_json.value is not None else None
+
+# Every download thread waits for the article it parses, so there must be at
+# least as many threads as processes to keep all of them busy.
+concurrency = workers.value
+if processes.value is not None:
+    concurrency = max(concurrency, processes.value)
+
+# create a shared http session
+fetcher = Fetcher(requests_per_second=rate.value, retries=retries.value, pool_size=max(10, concurrency))
+
+# Processes are forked, because other start methods run this script again in
+# every child. They are started before any thread to avoid forking a locked
+# state.
+parser = None
+if processes.value is not None:
+    if 'fork' not in get_all_start_methods():
+        raise ValueError('--processes is not supported on this platform')
+
+    parser = ProcessPoolExecutor(processes.value, mp_context=get_context('fork'))
+    parser.submit(int).result()
+
+# create cache
+if cache_database.value is not None:
+    cache = SQLiteCache(cache_database.value, ttl=cache_ttl.value)
+elif cache_directory.value is not None:
+    cache = DirectoryCache(cache_directory.value, ttl=cache_ttl.value)
+else:
+    cache = None
+
+# create link source
+if offline.value is not None:
+    if source.value != 'html':
+        raise ValueError('--offline can not be combined with --source')
+
+    link_source = DumpLinkSource(offline.value, metrics=metrics)
+elif source.value == 'api':
+    link_source = ApiLinkSource(fetcher, metrics=metrics)
+elif source.value == 'html':
+    link_source = None
+else:
+    raise ValueError(f'unknown link source: {source.value}')
+
+# choose sections skipped in the article body
+if skip.value is None:
+    skipped = []
+elif isinstance(skip.value, list):
+    skipped = skip.value
+else:
+    skipped = [skip.value]
+
+for section in skipped:
+    if section not in ContentScanner.sections:
+        raise ValueError(f'unknown section: {section}')
+
+if (content.value or skipped) and link_source is not None:
+    raise ValueError('--content and --skip require the html link source')
+
 # create start article
-article = Article.from_url(url.value, cache_directory=cache_directory.value)
+article = Article.from_url(url.value, fetcher=fetcher, cache=cache, source=link_source, metrics=metrics,
+                           parser=parser, content=content.value is True or bool(skipped), skip=skipped)
+
+# Search a path instead of building a graph. Links are expanded from the
+# start article and backlinks requested from the api (or read from the
+# offline index) starting at the target, -K limits the expanded articles and
+# -D the length of the path.
+if path_to.value is not None:
+    target = Article.from_url(path_to.value, fetcher=fetcher, cache=cache, metrics=metrics)
+    backlinks = link_source if offline.value is not None else ApiLinkSource(fetcher, metrics=metrics)
+    pf = PathFinder(D.value, K.value, maximum_references=R.value, exclude=exclude.value, workers=concurrency,
+                    backlinks=backlinks, metrics=metrics)
+
+    try:
+        with fetcher:
+            path = pf.find(article, target)
+            logging.info(', '.join(f'{k.replace("_", " ")}: {v}' for k, v in pf.statistics().items()))
+    finally:
+        if parser is not None:
+            parser.shutdown()
+
+        if cache is not None:
+            cache.close()
+
+        if offline.value is not None:
+            link_source.close()
+
+    if path is None:
+        print(f'no path found within {D.value} links', file=stderr)
+    else:
+        for i, step in enumerate(path):
+            print(f'{i:>4}  {step.unescaped_identifier}')
+
+    if stats.value:
+        print(metrics.summary(), file=stderr)
+
+    if stats_json.value is not None:
+        with open(stats_json.value, 'w') as file:
+            json.dump(metrics.to_dict(), file, indent=2)
+
+    exit(0 if path is not None else 1)
+
+# Map identifiers to node ids on disk for very large graphs. A bloom filter
+# sized for the maximum node count avoids reading the file for articles which
+# are not part of the graph yet.
+node_index = None
+if index.value is not None:
+    bloom_filter = BloomFilter(K.value, bloom.value) if bloom.value is not None else None
+    node_index = DiskIndex(index.value, bloom_filter)
+elif bloom.value is not None:
+    raise ValueError('--bloom requires --index')
 
 # build graph
-gp = GraphBuilder(K.value, D.value, maximum_references=R.value, exclude=exclude.value)
-with gp:
-    graph = gp.build_from(article)
+gp = GraphBuilder(K.value, D.value, maximum_references=R.value, exclude=exclude.value, workers=concurrency,
+                  compact=compact.value is True or node_index is not None, index=node_index,
+                  checkpoint=checkpoint.value, checkpoint_interval=checkpoint_interval.value, metrics=metrics)
+
+progress_line = None
+if progress.value:
+    progress_line = ProgressLine(K.value)
+    gp.add_hook(progress_line)
+
+
+# The first interrupt stops the build gracefully, so the graph created so far
+# is processed and a checkpoint is saved. A second one stops immediately.
+def cancel(signal_number, frame):
+    signal(SIGINT, default_int_handler)
+    gp.cancel()
+
+
+signal(SIGINT, cancel)
+
+try:
+    with gp, fetcher:
+        graph = gp.build_from(article, resume=resume.value)
+
+        logging.info(', '.join(f'{k.replace("_", " ")}: {v}' for k, v in fetcher.statistics().items()))
+
+        # add connection and retry counters of the http session
+        if metrics is not None:
+            for key in ('connections_opened', 'connections_reused', 'retries'):
+                metrics.count(key, fetcher.statistics()[key])
+finally:
+    signal(SIGINT, default_int_handler)
+
+    if progress_line is not None:
+        progress_line.finish()
+
+    if parser is not None:
+        parser.shutdown()
+
+    # write pending cache entries even if the build failed
+    if cache is not None:
+        cache.close()
+
+    if offline.value is not None:
+        link_source.close()
+
+# traverse graph only once for all following outputs
+analytics = GraphAnalytics(graph, metrics=metrics)
 
 # print some stats
 if graph_properties.value:
-    mindeg = graph.minimum_degree_node()
-    print(f'minimum degree: {mindeg.degree} / article: {mindeg.article.unescaped_identifier}')
+    mindeg = analytics.minimum_degree_node()
+    print(f'minimum degree: {analytics.degree(mindeg)} / article: {mindeg.article.unescaped_identifier}')
 
-    maxdeg = graph.maximum_degree_node()
-    print(f'maximum degree: {maxdeg.degree} / article: {maxdeg.article.unescaped_identifier}')
+    maxdeg = analytics.maximum_degree_node()
+    print(f'maximum degree: {analytics.degree(maxdeg)} / article: {maxdeg.article.unescaped_identifier}')
 
-    print(f'density: {graph.density()}')
+    print(f'density: {analytics.density()}')
+
+# print nodes with highest degrees
+if top.value is not None:
+    for title, incoming in (('out-degree', False), ('in-degree', True)):
+        print(f'top {top.value} {title}:')
+        for node, degree in analytics.top_degree_nodes(top.value, incoming=incoming):
+            print(f'{degree:>8}  {node.article.unescaped_identifier}')
+
+# print nodes with highest centrality scores (numpy is only needed for these)
+if centrality.value is not None:
+    from wikigraph.graph.GraphCentrality import GraphCentrality
+
+    gc = GraphCentrality(graph, analytics=analytics, metrics=metrics)
+    hubs, authorities = gc.hits()
+
+    for title, scores in (('pagerank', gc.pagerank()), ('in-degree', gc.in_degrees()), ('hub', hubs),
+                          ('authority', authorities)):
+        print(f'top {centrality.value} {title}:')
+        for node, score in gc.top(scores, centrality.value):
+            print(f'{score:>12.6g}  {node.article.unescaped_identifier}')
+
+    components, sizes = gc.components()
+    print(f'weakly connected components: {len(sizes)} / largest: {sizes[0]} nodes')
 
 # print graph adjacency table
-if adjacency_matrix.value:
-    matrix = graph.adjacency()
-    labels = graph.labels()
+if adjacency_matrix.value and matrix_format.value == 'dense':
+    matrix = analytics.adjacency()
+    labels = analytics.labels()
     label_length = list(map(lambda x: len(x) + 1, labels))
     max_label_length = reduce(max, label_length, 0)
 
@@ -114,17 +474,70 @@ if adjacency_matrix.value:
             print(str(matrix[i][k]).ljust(label_length[k] + 2), end='')
         print()
 
-# draw graph
-if png.value is not None:
-    if not png.value.endswith('.png'):
-        png.value += '.png'
+# print sparse adjacency matrix so large graphs never need a dense matrix
+elif adjacency_matrix.value:
+    labels = analytics.labels()
+    edges = analytics.edge_list()
+
+    # matrix market uses one based indices and starts with a size line,
+    # labels are added as comments in both formats
+    if matrix_format.value == 'mtx':
+        print('%%MatrixMarket matrix coordinate pattern general')
+        for i, label in enumerate(labels):
+            print(f'% {i + 1} {label}')
+        print(len(labels), len(labels), len(edges))
+        offset = 1
+    else:
+        for i, label in enumerate(labels):
+            print(f'# {i} {label}')
+        offset = 0
+
+    for row, col in edges:
+        print(row + offset, col + offset)
+
+# export graph data
+ge = GraphExporter(graph, metrics=metrics)
+
+if csv_file.value is not None:
+    ge.save_edge_list(csv_file.value)
+
+if jsonl.value is not None:
+    ge.save_jsonl(jsonl.value)
+
+if graphml.value is not None:
+    ge.save_graphml(graphml.value)
+
+if gexf.value is not None:
+    ge.save_gexf(gexf.value)
+
+# draw graph (igraph and cairo are only needed for png and pdf output)
+if png.value is not None or pdf.value is not None:
+    from wikigraph.graph.GraphDrawer import GraphDrawer
+
+    # the same drawer is used for all files so the layout is computed once
+    gd = GraphDrawer(graph, highlight=highlight.value, analytics=analytics, layout=layout.value,
+                     iterations=layout_iterations.value, layout_cache=layout_cache.value, metrics=metrics)
+
+    if png.value is not None:
+        if not png.value.endswith('.png'):
+            png.value += '.png'
+
+        gd.save_to(png.value)
+
+    if pdf.value is not None:
+        if not pdf.value.endswith('.pdf'):
+            pdf.value += '.pdf'
+
+        gd.save_to(pdf.value)
 
-    gd = GraphDrawer(graph, highlight=highlight.value)
-    gd.save_to(png.value)
+# print and save metrics
+if stats.value:
+    print(metrics.summary(), file=stderr)
 
-if pdf.value is not None:
-    if not pdf.value.endswith('.pdf'):
-        pdf.value += '.pdf'
+if stats_json.value is not None:
+    with open(stats_json.value, 'w') as file:
+        json.dump(metrics.to_dict(), file, indent=2)
 
-    gd = GraphDrawer(graph, highlight=highlight.value)
-    gd.save_to(pdf.value)
+# node identifiers are read from the index until all outputs are written
+if node_index is not None:
+    node_index.close()
@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+from wikigraph.cache.DirectoryCache import DirectoryCache
+from wikigraph.cache.SQLiteCache import SQLiteCache
+from wikigraph.cli.ArgumentParser import ArgumentParser
+
+# parse command line arguments
+args = ArgumentParser()
+
+directory = args.add_slot_parameter(
+    'directory',
+    'cache directory to import',
+    example='cache/'
+)
+database = args.add_slot_parameter(
+    'database',
+    'database file to import into',
+    example='cache.sqlite'
+)
+
+language = args.add_named_parameter(
+    ['l', 'language'],
+    'language of the cached articles',
+    expects='language',
+    default='en'
+)
+
+args.parse()
+
+# copy all articles
+with SQLiteCache(database.value) as cache:
+    count = cache.import_from(DirectoryCache(directory.value), language=language.value)
+
+print(f'imported {count} articles')
@@ -0,0 +1,220 @@
+import json
+import sqlite3
+import unittest
+from os import path
+from tempfile import TemporaryDirectory
+from urllib.parse import urlsplit
+
+from aiohttp import ClientSession
+
+from wikigraph.benchmark.SyntheticWiki import SyntheticWiki
+from wikigraph.benchmark.WikiServer import WikiServer
+from wikigraph.cache.DirectoryCache import DirectoryCache
+from wikigraph.cache.SQLiteCache import SQLiteCache
+from wikigraph.http.Fetcher import Fetcher
+from wikigraph.wikipedia.ApiLinkSource import ApiLinkSource
+from wikigraph.wikipedia.Article import Article
+
+FIXTURE = path.join(path.dirname(__file__), 'fixtures', 'api_links.json')
+
+
+class FakeApi:
+    """
+    Answers link queries like the MediaWiki API from a fixture. Responses
+    contain at most `limit` links and are continued like plcontinue.
+    """
+
+    def __init__(self, limit=2):
+        with open(FIXTURE, encoding='utf-8') as file:
+            self.fixture = json.load(file)
+
+        self.limit = limit
+        self.requests = []
+
+    def query(self, url, params):
+        self.requests.append((urlsplit(url).netloc, params))
+        titles = params['titles'].split('|')
+
+        if len(titles) > ApiLinkSource.batch_size:
+            raise AssertionError(f'{len(titles)} titles in one request')
+
+        # normalize titles and follow redirects
+        query = {'normalized': [], 'redirects': []}
+        pages = []
+        for title in titles:
+            for key in ('normalized', 'redirects'):
+                if title in self.fixture[key]:
+                    query[key].append({'from': title, 'to': self.fixture[key][title]})
+                    title = self.fixture[key][title]
+
+            if title not in pages:
+                pages.append(title)
+
+        # links of all pages in one list, split into continued responses
+        entries = [(title, link) for title in pages for link in self.fixture['links'].get(title, [])]
+        offset = int(params.get('plcontinue', 0))
+        part = entries[offset:offset + self.limit]
+
+        query['pages'] = []
+        for title in pages:
+            page = {'ns': 0, 'title': title}
+            if title not in self.fixture['links']:
+                page['missing'] = True
+
+            links = [{'ns': 0, 'title': link} for page_title, link in part if page_title == title]
+            if links:
+                page['links'] = links
+
+            if offset == 0 or links:
+                query['pages'].append(page)
+
+        response = {'batchcomplete': offset + self.limit >= len(entries), 'query': query}
+        if offset + self.limit < len(entries):
+            response['continue'] = {'plcontinue': str(offset + self.limit), 'continue': '||'}
+
+        return response
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+        self.content = json.dumps(data).encode('utf-8')
+
+    def json(self):
+        return self.data
+
+
+class FakeAsyncResponse(FakeResponse):
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    async def read(self):
+        return self.content
+
+    async def json(self):
+        return self.data
+
+
+class FakeFetcher:
+    def __init__(self, api):
+        self.api = api
+
+    def get(self, url, params=None):
+        return FakeResponse(self.api.query(url, params))
+
+
+class FakeSession:
+    def __init__(self, api):
+        self.api = api
+
+    async def get(self, url, params=None):
+        return FakeAsyncResponse(self.api.query(url, params))
+
+
+class ApiLinkSourceTest(unittest.TestCase):
+    def setUp(self):
+        self.api = FakeApi()
+        self.source = ApiLinkSource(FakeFetcher(self.api))
+
+    def test_continuation(self):
+        # the links of Alpha are spread over several responses
+        links = self.source.linked([Article('Alpha'), Article('Beta')])
+
+        self.assertEqual(links, [['Beta', 'Gamma', 'Delta', 'Epsilon', 'Zeta', 'Eta'], ['Alpha', 'Gamma']])
+        self.assertEqual(len(self.api.requests), 5)
+
+    def test_normalized_titles_and_redirects(self):
+        articles = [Article('alpha'), Article('Alpha_(letter)'), Article('Albert_Einstein'), Article('Missing')]
+        links = self.source.linked(articles)
+
+        self.assertEqual(links[0], links[1])
+        self.assertEqual(links[0], ['Beta', 'Gamma', 'Delta', 'Epsilon', 'Zeta', 'Eta'])
+        self.assertEqual(links[2], ['Ulm', 'C%2B%2B', 'Theory_of_relativity'])
+        self.assertEqual(links[3], [])
+
+    def test_batch_limit(self):
+        articles = [Article(f'Page_{i}') for i in range(120)] + [Article('Beta')]
+        links = self.source.linked(articles)
+
+        # every request contains at most 50 titles and no title is requested
+        # twice
+        titles = [params['titles'].split('|') for _, params in self.api.requests]
+        self.assertEqual(list(map(len, titles)), [50, 50, 21])
+        self.assertEqual(sum(titles, []), [article.unescaped_identifier for article in articles])
+        self.assertEqual(links[-1], ['Alpha', 'Gamma'])
+
+    def test_languages(self):
+        self.source.linked([Article('Alpha'), Article('Beta', language='de'), Article('Gamma')])
+
+        hosts = [host for host, params in self.api.requests if 'plcontinue' not in params]
+        self.assertEqual(hosts, ['en.wikipedia.org', 'de.wikipedia.org'])
+
+    def test_maximum(self):
+        links = self.source.linked([Article('Alpha'), Article('Beta')], maximum=3)
+        self.assertEqual(links, [['Beta', 'Gamma', 'Delta'], ['Alpha', 'Gamma']])
+
+    def test_article_linked_articles(self):
+        articles = Article('Alpha', source=self.source).linked_articles(2)
+        self.assertEqual([article.identifier for article in articles], ['Beta', 'Gamma'])
+
+    def test_cache_round_trip(self):
+        with TemporaryDirectory() as directory:
+            caches = {
+                'directory': lambda: DirectoryCache(directory),
+                'sqlite': lambda: SQLiteCache(path.join(directory, 'cache.db'))
+            }
+
+            for name, create in caches.items():
+                with self.subTest(cache=name):
+                    with create() as cache:
+                        expected = self.source.linked([Article('Alpha', cache=cache), Article('Beta', cache=cache)])
+
+                    # links are read from the cache without any request
+                    api = FakeApi()
+                    with create() as cache:
+                        source = ApiLinkSource(FakeFetcher(api))
+                        links = source.linked([Article('Alpha', cache=cache), Article('Beta', cache=cache)], 4)
+
+                    self.assertEqual(links, [expected[0][:4], expected[1]])
+                    self.assertEqual(api.requests, [])
+
+            # versions are saved as integers
+            with sqlite3.connect(path.join(directory, 'cache.db')) as connection:
+                types = connection.execute('SELECT DISTINCT typeof(version) FROM links').fetchall()
+                self.assertEqual(types, [('integer',)])
+
+
+class ApiLinkSourceAsyncTest(unittest.IsolatedAsyncioTestCase):
+    async def test_same_requests_as_linked(self):
+        articles = [Article(f'Page_{i}') for i in range(60)] + [Article('alpha'), Article('Albert_Einstein')]
+
+        api = FakeApi()
+        expected = ApiLinkSource(FakeFetcher(api)).linked(articles, 5)
+
+        async_api = FakeApi()
+        links = await ApiLinkSource().linked_async(FakeSession(async_api), articles, 5)
+
+        self.assertEqual(links, expected)
+        self.assertEqual(async_api.requests, api.requests)
+
+    async def test_retries(self):
+        wiki = SyntheticWiki(page_count=100, mean_degree=5, page_size=1000)
+
+        with WikiServer(wiki, error_rate=0.3) as server, Fetcher(retries=10, backoff=0) as fetcher:
+            url_pattern = ApiLinkSource.url_pattern
+            ApiLinkSource.url_pattern = server.api_url_pattern
+            self.addCleanup(setattr, ApiLinkSource, 'url_pattern', url_pattern)
+
+            articles = [Article(wiki.identifier(i)) for i in range(60)]
+            async with ClientSession() as session:
+                links = await ApiLinkSource(fetcher).linked_async(session, articles)
+
+            self.assertEqual(links, [wiki.page_links(article.identifier) for article in articles])
+            self.assertGreater(server.statistics()['errors'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,235 @@
+import asyncio
+import unittest
+from os import path
+from tempfile import TemporaryDirectory
+from threading import get_ident
+
+from wikigraph.benchmark.SyntheticWiki import SyntheticWiki
+from wikigraph.benchmark.WikiServer import WikiServer
+from wikigraph.cache.DirectoryCache import DirectoryCache
+from wikigraph.cache.SQLiteCache import SQLiteCache
+from wikigraph.graph.AsyncGraphBuilder import AsyncGraphBuilder
+from wikigraph.graph.GraphBuilder import GraphBuilder
+from wikigraph.http.Fetcher import Fetcher
+from wikigraph.metrics.Metrics import Metrics
+from wikigraph.wikipedia.Article import Article
+
+
+class DictLinkSource:
+    """
+    link source returning links from a dictionary instead of downloading them
+    """
+
+    batch_size = 1
+
+    def __init__(self, links):
+        self.links = links
+
+    def linked(self, articles, maximum=None):
+        return [self.links.get(article.identifier, [])[:maximum] for article in articles]
+
+    async def linked_async(self, session, articles, maximum=None):
+        # let other tasks run like a download would
+        await asyncio.sleep(0)
+        return self.linked(articles, maximum)
+
+
+class Recorder:
+    """
+    hook recording all events
+    """
+
+    def __init__(self):
+        self.events = {event: [] for event in GraphBuilder.events}
+
+    def on_fetch_start(self, builder, article):
+        self.events['on_fetch_start'].append(article.identifier)
+
+    def on_fetch_done(self, builder, article, articles):
+        self.events['on_fetch_done'].append((article.identifier, [a.identifier for a in articles]))
+
+    def on_node_created(self, builder, node, depth):
+        self.events['on_node_created'].append((node.identifier, depth))
+
+    def on_edge_added(self, builder, origin, node):
+        self.events['on_edge_added'].append((origin.identifier, node.identifier))
+
+    def on_level_complete(self, builder, depth):
+        self.events['on_level_complete'].append(depth)
+
+
+class ThreadRecordingCache:
+    """
+    cache wrapper recording the threads its methods are called on
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.ttl = cache.ttl
+        self.threads = set()
+
+    def __getattr__(self, name):
+        method = getattr(self.cache, name)
+
+        def call(*args):
+            self.threads.add(get_ident())
+            return method(*args)
+
+        return call
+
+
+class AsyncGraphBuilderTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # every article links to six others
+        links = {f'A{i}': [f'A{(i * 7 + j * 3 + 1) % 60}' for j in range(6)] for i in range(60)}
+        self.source = DictLinkSource(links)
+
+        # the synchronous builder fetches one article at a time
+        self.expected = Recorder()
+        builder = GraphBuilder(40, 3)
+        builder.add_hook(self.expected)
+        builder.build_from(Article('A0', source=self.source))
+
+    async def build(self, *hooks, maximum_node_count=40):
+        # no session is needed as the link source does not download anything
+        builder = AsyncGraphBuilder(maximum_node_count, 3, session=object())
+        recorder = Recorder()
+        builder.add_hook(recorder)
+        for hook in hooks:
+            builder.add_hook(hook)
+
+        graph = await builder.build_from(Article('A0', source=self.source))
+        return builder, graph, recorder.events
+
+    async def test_on_fetch_start(self):
+        _, _, events = await self.build()
+
+        # downloads are started ahead of time, so only the order differs
+        self.assertTrue(events['on_fetch_start'])
+        self.assertCountEqual(events['on_fetch_start'], self.expected.events['on_fetch_start'])
+
+    async def test_on_fetch_done(self):
+        _, _, events = await self.build()
+        self.assertEqual(events['on_fetch_done'], self.expected.events['on_fetch_done'])
+
+    async def test_on_node_created(self):
+        _, _, events = await self.build()
+        self.assertEqual(events['on_node_created'], self.expected.events['on_node_created'])
+
+    async def test_on_edge_added(self):
+        _, _, events = await self.build()
+        self.assertEqual(events['on_edge_added'], self.expected.events['on_edge_added'])
+
+    async def test_on_level_complete(self):
+        _, _, events = await self.build(maximum_node_count=1000)
+        self.assertEqual(events['on_level_complete'], [0, 1, 2, 3])
+
+    async def test_cancel(self):
+        class Cancel:
+            def on_node_created(self, builder, node, depth):
+                if builder.node_count == 10:
+                    builder.cancel()
+
+        builder, graph, _ = await self.build(Cancel())
+
+        self.assertEqual(builder.node_count, 10)
+        self.assertEqual(len(list(graph)), 10)
+
+    async def test_node_count(self):
+        builder, graph, _ = await self.build()
+
+        self.assertEqual(builder.node_count, 40)
+        self.assertEqual(len(list(graph)), 40)
+
+
+class AsyncGraphBuilderServerTest(unittest.IsolatedAsyncioTestCase):
+    """
+    builds graphs from a local stand-in server using aiohttp sessions
+    """
+
+    def setUp(self):
+        self.wiki = SyntheticWiki(page_count=200, mean_degree=8, distribution='uniform', page_size=2000, seed=1)
+        self.server = self.serve(WikiServer(self.wiki))
+
+    def serve(self, server):
+        # download articles from the server until the test is finished
+        server.start()
+        self.addCleanup(server.stop)
+
+        url_pattern = Article.url_pattern
+        Article.url_pattern = server.url_pattern
+        self.addCleanup(setattr, Article, 'url_pattern', url_pattern)
+
+        return server
+
+    @staticmethod
+    def expected(maximum_references=None):
+        graph = GraphBuilder(60, 3, maximum_references).build_from(Article('Page_0'))
+        return graph.edge_list()
+
+    async def test_same_graph_as_graph_builder(self):
+        graph = await AsyncGraphBuilder(60, 3).build_from(Article('Page_0'))
+        self.assertEqual(graph.edge_list(), self.expected())
+
+    async def test_maximum_references(self):
+        # articles are only read until enough links are found
+        graph = await AsyncGraphBuilder(60, 3, 4).build_from(Article('Page_0'))
+        self.assertEqual(graph.edge_list(), self.expected(4))
+
+    async def test_retries(self):
+        expected = self.expected()
+        server = self.serve(WikiServer(self.wiki, error_rate=0.2))
+
+        with Fetcher(retries=10, backoff=0) as fetcher:
+            graph = await AsyncGraphBuilder(60, 3).build_from(Article('Page_0', fetcher=fetcher))
+
+            self.assertEqual(graph.edge_list(), expected)
+            self.assertEqual(fetcher.statistics()['retries'], server.statistics()['errors'])
+            self.assertGreater(server.statistics()['errors'], 0)
+
+    async def test_cache_accessed_off_event_loop(self):
+        with TemporaryDirectory() as directory:
+            cache = ThreadRecordingCache(DirectoryCache(directory))
+
+            # the second build reads all links from the cache
+            for _ in range(2):
+                graph = await AsyncGraphBuilder(60, 3).build_from(Article('Page_0', cache=cache))
+                self.assertEqual(graph.edge_list(), self.expected())
+
+            self.assertTrue(cache.threads)
+            self.assertNotIn(get_ident(), cache.threads)
+
+    async def test_cached_articles_revalidate(self):
+        expected = self.expected()
+
+        with TemporaryDirectory() as directory:
+            caches = {
+                'directory': lambda: DirectoryCache(directory, ttl=0),
+                'sqlite': lambda: SQLiteCache(path.join(directory, 'cache.db'), ttl=0)
+            }
+
+            for name, create in caches.items():
+                with self.subTest(cache=name), create() as cache:
+                    await AsyncGraphBuilder(60, 3).build_from(Article('Page_0', cache=cache))
+                    before = self.server.statistics()['not_modified']
+
+                    # Every cached article has expired and is requested with
+                    # its ETag, which the server confirms. Pages linked but
+                    # missing on the server like Main_Page have no ETag.
+                    metrics = Metrics()
+                    recorder = Recorder()
+                    builder = AsyncGraphBuilder(60, 3)
+                    builder.add_hook(recorder)
+                    graph = await builder.build_from(Article('Page_0', cache=cache, metrics=metrics))
+
+                    fetched = [identifier for identifier, _ in recorder.events['on_fetch_done']]
+                    existing = [identifier for identifier in fetched if self.wiki.page(identifier) is not None]
+
+                    self.assertEqual(graph.edge_list(), expected)
+                    self.assertEqual(metrics.counter('requests'), len(fetched))
+                    self.assertEqual(metrics.counter('cache_revalidated'), len(existing))
+                    self.assertEqual(self.server.statistics()['not_modified'] - before, len(existing))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import random
+import unittest
+
+from wikigraph.graph.CompactGraph import CompactGraph
+from wikigraph.wikipedia.Article import Article
+
+
+class CompactGraphTest(unittest.TestCase):
+    def setUp(self):
+        self.graph = CompactGraph()
+        self.expected = []
+
+    def add_node(self):
+        self.expected.append([])
+        return self.graph.add_node(Article(f'A{len(self.expected)}'))
+
+    def add_edge(self, source, target):
+        self.expected[source].append(target)
+        self.graph.add_edge(source, target)
+
+    def assert_edges(self):
+        for node_id, targets in enumerate(self.expected):
+            self.assertEqual(list(self.graph.neighbours(node_id)), targets)
+            self.assertEqual(self.graph.degree(node_id), len(targets))
+
+        indptr, indices = self.graph.csr()
+        self.assertEqual(list(indptr), [0] + [sum(map(len, self.expected[:i + 1])) for i in range(len(self.expected))])
+        self.assertEqual(list(indices), [target for targets in self.expected for target in targets])
+        self.assertEqual(self.graph.edge_count, len(indices))
+
+    def test_empty(self):
+        self.add_node()
+        self.assert_edges()
+
+    def test_edges_added_after_reading(self):
+        # reads and additions alternate, so edges are merged several times
+        randomness = random.Random(0)
+        for _ in range(5000):
+            if not self.expected or randomness.random() < 0.2:
+                self.add_node()
+
+            self.add_edge(randomness.randrange(len(self.expected)), randomness.randrange(len(self.expected)))
+
+            if randomness.random() < 0.01:
+                self.assert_edges()
+
+        self.assert_edges()
+
+    def test_revision(self):
+        a, b = self.add_node(), self.add_node()
+        revision = self.graph.revision
+
+        self.graph.csr()
+        self.add_edge(a, b)
+        self.assertNotEqual(self.graph.revision, revision)
+
+
+if __name__ == '__main__':
+    unittest.main()
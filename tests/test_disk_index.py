@@ -0,0 +1,101 @@
+import os
+import sqlite3
+import unittest
+from tempfile import TemporaryDirectory
+
+from wikigraph.graph.BloomFilter import BloomFilter
+from wikigraph.graph.DiskIndex import DiskIndex
+from wikigraph.graph.Graph import Graph
+from wikigraph.graph.GraphBuilder import GraphBuilder
+from wikigraph.graph.GraphIterator import GraphIterator
+from wikigraph.metrics.Metrics import Metrics
+from wikigraph.wikipedia.Article import Article
+
+
+class ChainLinkSource:
+    """
+    link source linking every article n to n + 1 up to a given number
+    """
+
+    batch_size = 10
+
+    def __init__(self, length):
+        self.length = length
+
+    def linked(self, articles, maximum=None):
+        return [[str(int(a.identifier) + 1)] if int(a.identifier) + 1 < self.length else [] for a in articles]
+
+
+class DiskIndexTest(unittest.TestCase):
+    def test_refuses_existing_database(self):
+        with TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, 'other.db')
+            with sqlite3.connect(file_path) as connection:
+                connection.execute('CREATE TABLE ids (value TEXT)')
+                connection.execute("INSERT INTO ids VALUES ('kept')")
+            connection.close()
+
+            with self.assertRaises(ValueError):
+                DiskIndex(file_path)
+
+            connection = sqlite3.connect(file_path)
+            self.assertEqual(connection.execute('SELECT value FROM ids').fetchall(), [('kept',)])
+            connection.close()
+
+            # new and empty files are accepted
+            open(os.path.join(directory, 'empty.db'), 'w').close()
+            for name in ('new.db', 'empty.db'):
+                with DiskIndex(os.path.join(directory, name)) as index:
+                    index.add('A')
+                    self.assertIn('A', index)
+
+    def test_temporary_file(self):
+        index = DiskIndex()
+        self.assertTrue(os.path.exists(index.file_path))
+
+        index.add('A')
+        self.assertEqual(index['A'], 0)
+
+        index.close()
+        self.assertFalse(os.path.exists(index.file_path))
+
+    def test_node_cache_bytes_is_a_gauge(self):
+        metrics = Metrics()
+        source = ChainLinkSource(20)
+
+        with DiskIndex(batch_size=5) as index:
+            builder = GraphBuilder(20, 20, compact=True, index=index, metrics=metrics)
+            builder.build_from(Article('0', source=source))
+            self.assertEqual(metrics.gauge('node_cache_bytes'), index.memory_usage())
+
+            # the second build replaces the value instead of adding to it
+            builder.build_from(Article('0', source=source))
+            last = index.memory_usage()
+
+        self.assertEqual(metrics.gauge('node_cache_bytes'), last)
+        self.assertNotIn('node_cache_bytes', metrics.to_dict()['counters'])
+        self.assertEqual(metrics.to_dict()['derived']['node_cache_bytes_per_node'], last / metrics.counter('nodes'))
+
+    def test_bloom_filter_false_positive_drops_nodes(self):
+        # find an identifier the filter reports as contained once the start
+        # node has been visited
+        probe = BloomFilter(10, 0.5)
+        probe.add('start')
+        false_positive = next(f'node {i}' for i in range(10000) if f'node {i}' in probe)
+
+        start, node, behind = (Graph(Article(i)) for i in ('start', false_positive, 'behind'))
+        start.add_edge_to(node)
+        node.add_edge_to(behind)
+
+        # the node looks visited, so it and the node behind it are skipped
+        nodes = GraphIterator(start, visited=BloomFilter(10, 0.5))
+        self.assertEqual([n.identifier for n in nodes], ['start'])
+
+        # a DiskIndex only uses the filter to skip reads and stays exact
+        with DiskIndex(bloom_filter=BloomFilter(10, 0.5)) as index:
+            nodes = GraphIterator(start, visited=index)
+            self.assertEqual([n.identifier for n in nodes], ['start', false_positive, 'behind'])
+
+
+if __name__ == '__main__':
+    unittest.main()
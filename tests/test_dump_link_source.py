@@ -0,0 +1,131 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from wikigraph.wikipedia.Article import Article
+from wikigraph.wikipedia.DumpIndexer import DumpIndexer
+from wikigraph.wikipedia.DumpLinkSource import DumpLinkSource
+
+DUMPS = os.path.join(os.path.dirname(__file__), 'fixtures', 'dump')
+
+# The fixture dumps contain the same wiki as pages-articles XML dump and as
+# SQL dumps using both schemas of the pagelinks table. Identifiers of all
+# articles with their links and backlinks:
+LINKS = {
+    'Alpha': ['Beta', 'Gamma', 'Delta', 'C%2B%2B', 'Epsilon'],
+    'Beta': ['Alpha', 'Gamma'],
+    'Gamma': [],
+    'Delta': ['Gamma', 'Zeta%27s'],
+    'C%2B%2B': ['Alpha'],
+    'Epsilon': ['Zeta%27s'],
+    'Zeta%27s': []
+}
+
+BACKLINKS = {
+    'Alpha': ['Beta', 'C%2B%2B'],
+    'Beta': ['Alpha'],
+    'Gamma': ['Alpha', 'Beta', 'Delta'],
+    'Delta': ['Alpha'],
+    'C%2B%2B': ['Alpha'],
+    'Epsilon': ['Alpha'],
+    'Zeta%27s': ['Delta', 'Epsilon']
+}
+
+DUMP_FILES = {
+    'xml': ['pages.xml.bz2'],
+    'pagelinks with link targets': ['pagelinks.sql.gz', 'linktarget.sql.gz', 'redirect.sql.gz', 'page.sql.gz'],
+    'pagelinks with titles': ['page.sql.gz', 'redirect.sql.gz', 'pagelinks-titles.sql.gz']
+}
+
+
+class DumpLinkSourceTest(unittest.TestCase):
+    def index(self, files, maximum_redirects=None):
+        # read dumps in any order and open the saved index
+        indexer = DumpIndexer()
+        if maximum_redirects is not None:
+            indexer.maximum_redirects = maximum_redirects
+
+        indexer.read_all([os.path.join(DUMPS, file) for file in files])
+
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        file_path = os.path.join(directory.name, 'links.idx')
+        indexer.save(file_path)
+
+        source = DumpLinkSource(file_path)
+        self.addCleanup(source.close)
+        return indexer, source
+
+    def test_links(self):
+        for name, files in DUMP_FILES.items():
+            with self.subTest(name):
+                indexer, source = self.index(files)
+                articles = [Article(identifier) for identifier in LINKS]
+
+                self.assertEqual(source.linked(articles), list(LINKS.values()))
+                self.assertEqual(source.linking(articles), list(BACKLINKS.values()))
+                self.assertEqual(source.link_count, sum(map(len, LINKS.values())))
+                self.assertEqual(indexer.statistics()['articles'], len(LINKS))
+                self.assertEqual(indexer.statistics()['redirects'], 7)
+
+    def test_redirects_and_escaped_titles(self):
+        for name, files in DUMP_FILES.items():
+            with self.subTest(name):
+                _, source = self.index(files)
+
+                # redirects lead to their target, identifiers are normalized
+                articles = [Article(identifier) for identifier in
+                            ('Beta_(letter)', 'chain_1', 'Long chain 1', 'C++', 'Zeta\'s', 'Missing_page', 'Talk:Alpha')]
+                self.assertEqual(source.linked(articles), [
+                    LINKS['Beta'], LINKS['Gamma'], LINKS['Epsilon'], LINKS['C%2B%2B'], [], [], []
+                ])
+                self.assertEqual(source.linking(articles[:5]), [
+                    BACKLINKS['Beta'], BACKLINKS['Gamma'], BACKLINKS['Epsilon'], BACKLINKS['C%2B%2B'],
+                    BACKLINKS['Zeta%27s']
+                ])
+
+    def test_maximum_redirects(self):
+        # the chain from Long_chain_1 to Epsilon has three redirects
+        for name, files in DUMP_FILES.items():
+            with self.subTest(name):
+                _, source = self.index(files, maximum_redirects=2)
+
+                articles = [Article(identifier) for identifier in ('Alpha', 'Chain_1', 'Long_chain_1', 'Epsilon')]
+                self.assertEqual(source.linked(articles), [
+                    ['Beta', 'Gamma', 'Delta', 'C%2B%2B'], LINKS['Gamma'], [], LINKS['Epsilon']
+                ])
+                self.assertEqual(source.linking(articles[3:]), [[]])
+
+    def test_maximum(self):
+        _, source = self.index(DUMP_FILES['xml'])
+
+        articles = [Article('Alpha'), Article('Gamma'), Article('Beta')]
+        self.assertEqual(source.linked(articles, 2), [['Beta', 'Gamma'], [], ['Alpha', 'Gamma']])
+        self.assertEqual(source.linking(articles, 2), [['Beta', 'C%2B%2B'], ['Alpha', 'Beta'], ['Alpha']])
+
+    def test_reopen(self):
+        indexer, source = self.index(DUMP_FILES['xml'])
+        articles = [Article(identifier) for identifier in LINKS]
+        links, backlinks = source.linked(articles), source.linking(articles)
+
+        # a second map of the same file returns the same links
+        with DumpLinkSource(source.file_path) as reopened:
+            self.assertEqual(reopened.capitalize, True)
+            self.assertEqual(reopened.article_count, source.article_count)
+            self.assertEqual(reopened.link_count, indexer.statistics()['saved_links'])
+            self.assertEqual(reopened.linked(articles), links)
+            self.assertEqual(reopened.linking(articles), backlinks)
+
+    def test_not_an_index(self):
+        with TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, 'links.idx')
+            with open(file_path, 'wb') as file:
+                file.write(bytes(DumpIndexer.header.size))
+
+            with self.assertRaises(ValueError):
+                DumpLinkSource(file_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+
+from wikigraph.graph.Graph import Graph
+from wikigraph.graph.GraphAnalytics import GraphAnalytics
+from wikigraph.graph.GraphBuilder import GraphBuilder
+from wikigraph.metrics.Metrics import Metrics
+from wikigraph.wikipedia.Article import Article
+
+
+class DictLinkSource:
+    """
+    link source returning links from a dictionary instead of downloading them
+    """
+
+    batch_size = 1
+
+    def __init__(self, links):
+        self.links = links
+
+    def linked(self, articles, maximum=None):
+        return [self.links.get(article.identifier, [])[:maximum] for article in articles]
+
+
+class GraphAnalyticsTest(unittest.TestCase):
+    def setUp(self):
+        # A -> B, A -> C, B -> C, all nodes share the revision counter of A
+        self.a = Graph(Article('A'))
+        self.b, self.c = (Graph(Article(identifier), self.a.counter) for identifier in ('B', 'C'))
+        self.a.add_edge_to(self.b)
+        self.a.add_edge_to(self.c)
+        self.b.add_edge_to(self.c)
+
+    def test_degree_before_other_calls(self):
+        analytics = GraphAnalytics(self.a)
+        self.assertEqual(analytics.degree(self.a), 2)
+
+    def test_in_degree_before_other_calls(self):
+        analytics = GraphAnalytics(self.a)
+        self.assertEqual(analytics.in_degree(self.c), 2)
+
+    def test_degree_after_add_edge(self):
+        analytics = GraphAnalytics(self.a)
+        self.assertEqual(analytics.degree(self.c), 0)
+
+        # a new node and an edge to an existing one
+        d = Graph(Article('D'), self.a.counter)
+        self.c.add_edge_to(d)
+        self.c.add_edge_to(self.a)
+
+        self.assertEqual(analytics.degree(self.c), 2)
+        self.assertEqual(analytics.degree(d), 0)
+        self.assertEqual(analytics.in_degree(self.a), 1)
+        self.assertEqual(analytics.in_degree(d), 1)
+
+    def test_other_graph_keeps_cache(self):
+        metrics = Metrics()
+        analytics = GraphAnalytics(self.a, metrics=metrics)
+        analytics.degree(self.a)
+
+        # edges of an unrelated graph do not cause another traversal
+        x = Graph(Article('X'))
+        y = Graph(Article('Y'), x.counter)
+        x.add_edge_to(y)
+        analytics.degree(self.a)
+        self.assertEqual(metrics.to_dict()['histograms']['analytics']['count'], 1)
+
+        # edges connecting it to the graph do
+        self.c.add_edge_to(x)
+        self.assertEqual(analytics.degree(y), 0)
+        self.assertEqual(metrics.to_dict()['histograms']['analytics']['count'], 2)
+
+    def test_built_graph_shares_counter(self):
+        source = DictLinkSource({'A': ['B', 'C'], 'B': ['C', 'D'], 'D': ['A']})
+        graph = GraphBuilder(10, 10).build_from(Article('A', source=source))
+        analytics = GraphAnalytics(graph)
+        self.assertEqual(analytics.node_count, 4)
+
+        # an edge added below the start node changes its revision
+        leaf = graph.edges[0].edges[1]
+        leaf.add_edge_to(Graph(Article('E'), leaf.counter))
+        self.assertEqual(analytics.node_count, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
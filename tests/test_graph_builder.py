@@ -0,0 +1,119 @@
+import unittest
+from os import path
+from tempfile import TemporaryDirectory
+
+from wikigraph.benchmark.SyntheticWiki import SyntheticWiki
+from wikigraph.benchmark.WikiServer import WikiServer
+from wikigraph.graph.GraphBuilder import GraphBuilder
+from wikigraph.http.Fetcher import Fetcher
+from wikigraph.wikipedia.Article import Article
+
+
+class Interrupt(Exception):
+    pass
+
+
+class Stopper:
+    """
+    hook cancelling the build or raising Interrupt once a number of nodes
+    has been created
+    """
+
+    def __init__(self, count, cancel=True):
+        self.count = count
+        self.cancel = cancel
+
+    def on_node_created(self, builder, node, depth):
+        self.count -= 1
+        if self.count == 0:
+            if not self.cancel:
+                raise Interrupt()
+            builder.cancel()
+
+
+class GraphBuilderTest(unittest.TestCase):
+    """
+    builds graphs from pages served by a local WikiServer
+    """
+
+    # maximum node count, maximum depth, maximum references and excluded
+    # articles of the compared builds
+    limits = [
+        (150, 10, None, None),
+        (200, 2, None, None),
+        (120, 10, 3, ['Page_5', 'Page_17'])
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        cls.wiki = SyntheticWiki(page_count=400, mean_degree=8, page_size=2000, navigation=5)
+        cls.server = WikiServer(cls.wiki)
+        cls.server.start()
+
+        cls.url_pattern = Article.url_pattern
+        Article.url_pattern = cls.server.url_pattern
+
+    @classmethod
+    def tearDownClass(cls):
+        Article.url_pattern = cls.url_pattern
+        cls.server.stop()
+
+    def build(self, K, D, R=None, exclude=None, hook=None, resume=None, **kwargs):
+        # labels and edges of a graph in breadth first search order
+        with Fetcher(retries=10, backoff=0) as fetcher:
+            builder = GraphBuilder(K, D, maximum_references=R, exclude=exclude, **kwargs)
+            if hook is not None:
+                builder.add_hook(hook)
+
+            with builder:
+                graph = builder.build_from(Article(self.wiki.identifier(0), fetcher=fetcher), resume=resume)
+
+        return graph.labels(), graph.edge_list()
+
+    def test_workers(self):
+        # downloads finish in any order, but the graph is built in the same
+        # order as by a single worker
+        for K, D, R, exclude in self.limits:
+            with self.subTest(K=K, D=D, R=R):
+                expected = self.build(K, D, R, exclude)
+                self.assertGreater(len(expected[1]), len(expected[0]))
+
+                for workers in (2, 8):
+                    self.assertEqual(self.build(K, D, R, exclude, workers=workers), expected)
+
+    def test_compact(self):
+        # CompactNode views walk the same graph as Graph objects
+        for K, D, R, exclude in self.limits:
+            with self.subTest(K=K, D=D, R=R):
+                expected = self.build(K, D, R, exclude)
+
+                self.assertEqual(self.build(K, D, R, exclude, compact=True), expected)
+                self.assertEqual(self.build(K, D, R, exclude, compact=True, workers=4), expected)
+
+    def test_resume(self):
+        # A cancelled build saves a checkpoint, an interrupted one leaves the
+        # last periodic checkpoint behind. Both continue to the same graph.
+        for K, D, R, exclude in self.limits:
+            expected = self.build(K, D, R, exclude)
+
+            for compact in (False, True):
+                for stop, cancel in ((1, True), (len(expected[0]) // 2, True), (len(expected[0]) - 3, False)):
+                    with self.subTest(K=K, D=D, R=R, compact=compact, stop=stop, cancel=cancel), \
+                            TemporaryDirectory() as directory:
+                        checkpoint = path.join(directory, 'checkpoint.json.gz')
+
+                        try:
+                            partial = self.build(K, D, R, exclude, Stopper(stop, cancel), compact=compact, workers=4,
+                                                 checkpoint=checkpoint, checkpoint_interval=10)
+                            self.assertTrue(cancel)
+                            self.assertLess(len(partial[0]), len(expected[0]))
+                        except Interrupt:
+                            self.assertFalse(cancel)
+
+                        resumed = self.build(K, D, R, exclude, compact=compact, checkpoint=checkpoint,
+                                             checkpoint_interval=10, resume=checkpoint)
+                        self.assertEqual(resumed, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
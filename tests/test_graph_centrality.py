@@ -0,0 +1,91 @@
+import unittest
+
+from wikigraph.graph.Graph import Graph
+from wikigraph.wikipedia.Article import Article
+
+try:
+    import numpy as np
+    from wikigraph.graph.GraphCentrality import GraphCentrality
+except ImportError:
+    np = None
+
+
+def build(edges):
+    # nodes named by letters in bfs order, all sharing the counter of the first
+    nodes = {}
+    for identifier in sorted({identifier for edge in edges for identifier in edge}):
+        counter = next(iter(nodes.values())).counter if nodes else None
+        nodes[identifier] = Graph(Article(identifier), counter)
+
+    for source, target in edges:
+        nodes[source].add_edge_to(nodes[target])
+
+    return nodes['A']
+
+
+def principal(matrix):
+    # eigenvector of the largest eigenvalue normalized to a sum of 1
+    values, vectors = np.linalg.eig(matrix)
+    vector = np.real(vectors[:, np.argmax(np.real(values))])
+    return vector / vector.sum()
+
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class GraphCentralityTest(unittest.TestCase):
+    # A -> B, A -> C, A -> D, B -> C, C -> A, D has no outgoing edges
+    edges = [('A', 'B'), ('A', 'C'), ('A', 'D'), ('B', 'C'), ('C', 'A')]
+
+    def test_cycle(self):
+        # all nodes of a cycle are equally important
+        centrality = GraphCentrality(build([('A', 'B'), ('B', 'C'), ('C', 'A')]))
+        hubs, authorities = centrality.hits()
+
+        for scores in (centrality.pagerank(), hubs, authorities):
+            np.testing.assert_allclose(scores, [1 / 3] * 3)
+
+    def test_pagerank(self):
+        centrality = GraphCentrality(build(self.edges), damping=0.85, tolerance=1e-12)
+
+        # Google matrix: links are followed with the damping probability,
+        # otherwise and from D a random node is chosen
+        n = 4
+        adjacency = np.zeros((n, n))
+        for source, target in self.edges:
+            adjacency['ABCD'.index(source), 'ABCD'.index(target)] = 1
+
+        transitions = np.full((n, n), 1 / n)
+        linking = adjacency.sum(axis=1) > 0
+        transitions[linking] = adjacency[linking] / adjacency[linking].sum(axis=1, keepdims=True)
+        google = 0.85 * transitions + 0.15 / n
+
+        expected = principal(google.T)
+        np.testing.assert_allclose(centrality.pagerank(), expected, atol=1e-9)
+        self.assertAlmostEqual(centrality.pagerank().sum(), 1)
+
+        # A and C are linked the most
+        self.assertEqual([node.identifier for node, _ in centrality.top(centrality.pagerank(), 2)], ['A', 'C'])
+
+    def test_hits(self):
+        centrality = GraphCentrality(build(self.edges), tolerance=1e-12)
+        hubs, authorities = centrality.hits()
+
+        adjacency = np.zeros((4, 4))
+        for source, target in self.edges:
+            adjacency['ABCD'.index(source), 'ABCD'.index(target)] = 1
+
+        np.testing.assert_allclose(hubs, principal(adjacency @ adjacency.T), atol=1e-9)
+        np.testing.assert_allclose(authorities, principal(adjacency.T @ adjacency), atol=1e-9)
+
+    def test_degrees_and_components(self):
+        centrality = GraphCentrality(build(self.edges + [('D', 'E'), ('E', 'D')]))
+
+        self.assertEqual(list(centrality.out_degrees()), [3, 1, 1, 1, 1])
+        self.assertEqual(list(centrality.in_degrees()), [1, 1, 2, 2, 1])
+
+        components, sizes = centrality.components()
+        self.assertEqual(list(components), [0] * 5)
+        self.assertEqual(list(sizes), [5])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from wikigraph.graph.Graph import Graph
+from wikigraph.wikipedia.Article import Article
+
+try:
+    import igraph
+    from wikigraph.graph.GraphDrawer import GraphDrawer
+except ImportError:
+    igraph = None
+
+
+@unittest.skipIf(igraph is None, 'igraph is not installed')
+class GraphDrawerLayoutCacheTest(unittest.TestCase):
+    def setUp(self):
+        # A -> B, A -> C, B -> C, all nodes share the revision counter of A
+        self.a = Graph(Article('A'))
+        self.b, self.c = (Graph(Article(identifier), self.a.counter) for identifier in ('B', 'C'))
+        self.a.add_edge_to(self.b)
+        self.a.add_edge_to(self.c)
+        self.b.add_edge_to(self.c)
+
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def drawer(self, **kwargs):
+        return GraphDrawer(self.a, layout='fr', iterations=10, layout_cache=self.directory, **kwargs)
+
+    def files(self):
+        return sorted(os.listdir(self.directory))
+
+    def test_cached_layout_is_reused(self):
+        coordinates = self.drawer().coordinates()
+        files = self.files()
+        self.assertEqual(len(files), 1)
+        self.assertRegex(files[0], r'^[0-9a-f]{64}\.json$')
+
+        # another drawer of the same graph loads the layout instead of
+        # computing it
+        with mock.patch.object(igraph.Graph, 'layout', side_effect=AssertionError('layout computed')):
+            self.assertEqual(self.drawer(highlight=['B']).coordinates(), coordinates)
+
+        self.assertEqual(self.files(), files)
+
+    def test_options_change_key(self):
+        self.drawer().coordinates()
+        GraphDrawer(self.a, layout='fr', iterations=20, layout_cache=self.directory).coordinates()
+        GraphDrawer(self.a, layout='circle', layout_cache=self.directory).coordinates()
+
+        self.assertEqual(len(self.files()), 3)
+
+    def test_graph_change_invalidates(self):
+        drawer = self.drawer()
+        drawer.coordinates()
+
+        # the same drawer lays out the changed graph again
+        d = Graph(Article('D'), self.a.counter)
+        self.c.add_edge_to(d)
+
+        calls = []
+        layout = igraph.Graph.layout
+
+        def counted(g, *args, **kwargs):
+            calls.append(args)
+            return layout(g, *args, **kwargs)
+
+        with mock.patch.object(igraph.Graph, 'layout', counted):
+            self.assertEqual(len(drawer.coordinates()), 4)
+            self.assertEqual(len(drawer.coordinates()), 4)
+
+        self.assertEqual(len(calls), 1)
+
+        self.assertEqual(len(self.files()), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
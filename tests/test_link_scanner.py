@@ -0,0 +1,82 @@
+import random
+import unittest
+from os import path
+
+from wikigraph.wikipedia.ContentScanner import ContentScanner
+from wikigraph.wikipedia.LinkScanner import LinkScanner
+
+FIXTURE = path.join(path.dirname(__file__), 'fixtures', 'article.html')
+
+# links of the fixture page per scanner and skipped sections
+LINKS = ['Main_Page', 'Greek_alphabet', 'Beta', 'Aleph', 'Mathematics', 'C%2B%2B', 'Oxford_University_Press', 'Gamma',
+         'Delta', 'Epsilon', 'Zeta', 'Privacy']
+CONTENT_LINKS = {
+    (): ['Greek_alphabet', 'Beta', 'Aleph', 'Mathematics', 'C%2B%2B', 'Oxford_University_Press', 'Gamma', 'Delta',
+         'Epsilon'],
+    ('navboxes',): ['Greek_alphabet', 'Beta', 'Aleph', 'Mathematics', 'C%2B%2B', 'Oxford_University_Press'],
+    ('references',): ['Greek_alphabet', 'Beta', 'Aleph', 'Mathematics', 'C%2B%2B', 'Gamma', 'Delta', 'Epsilon'],
+    ('navboxes', 'references'): ['Greek_alphabet', 'Beta', 'Aleph', 'Mathematics', 'C%2B%2B']
+}
+
+
+class ChunkedScannerTest(unittest.TestCase):
+    """
+    Scanners must extract the same links however the text is split into
+    chunks, including splits inside tags, attributes and link prefixes.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        with open(FIXTURE, 'r', encoding='utf-8') as file:
+            cls.text = file.read()
+
+    def splits(self):
+        # every split into two chunks, chunks of equal size and random splits
+        text = self.text
+
+        for i in range(len(text) + 1):
+            yield [text[:i], text[i:]]
+
+        for size in range(1, 65):
+            yield [text[i:i + size] for i in range(0, len(text), size)]
+
+        randomness = random.Random(0)
+        for _ in range(200):
+            positions = sorted(randomness.sample(range(1, len(text)), randomness.randint(2, 50)))
+            yield [text[i:j] for i, j in zip([0] + positions, positions + [len(text)])]
+
+    @staticmethod
+    def scan(scanner, chunks):
+        for chunk in chunks:
+            if scanner.feed(chunk):
+                break
+
+        return scanner.links
+
+    def scanners(self, maximum=None):
+        # scanner factories and the links expected from them
+        yield lambda: LinkScanner('Alpha', maximum), LINKS
+        for skip, links in CONTENT_LINKS.items():
+            yield lambda skip=skip: ContentScanner('Alpha', maximum, list(skip)), links
+
+    def test_whole_text(self):
+        self.assertEqual(LinkScanner.parse(self.text, 'Alpha'), LINKS)
+        for skip, links in CONTENT_LINKS.items():
+            self.assertEqual(ContentScanner.parse(self.text, 'Alpha', list(skip)), links)
+
+    def test_chunks(self):
+        for create, links in self.scanners():
+            for chunks in self.splits():
+                self.assertEqual(self.scan(create(), chunks), links, chunks)
+
+    def test_maximum(self):
+        # scanning stops once enough links have been found
+        for maximum in (1, 3, 6):
+            for create, links in self.scanners(maximum):
+                for size in (1, 7, 100, len(self.text)):
+                    chunks = [self.text[i:i + size] for i in range(0, len(self.text), size)]
+                    self.assertEqual(self.scan(create(), chunks), links[:maximum])
+
+
+if __name__ == '__main__':
+    unittest.main()
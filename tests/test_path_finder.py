@@ -0,0 +1,80 @@
+import json
+import unittest
+from pathlib import Path
+
+from wikigraph.graph.PathFinder import PathFinder
+from wikigraph.wikipedia.Article import Article
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+
+
+class FixtureLinkSource:
+    """
+    link source reading links and backlinks from a fixture wiki
+    """
+
+    batch_size = 2
+
+    def __init__(self, links):
+        self.links = links
+        self.requests = []
+
+    def linked(self, articles, maximum=None):
+        self.requests.append(('linked', [a.identifier for a in articles]))
+        return [self.links.get(a.identifier, [])[:maximum] for a in articles]
+
+    def linking(self, articles, maximum=None):
+        self.requests.append(('linking', [a.identifier for a in articles]))
+        return [[page for page, links in self.links.items() if a.identifier in links][:maximum] for a in articles]
+
+
+class PathFinderTest(unittest.TestCase):
+    def setUp(self):
+        with open(FIXTURES / 'path_wiki.json') as file:
+            self.source = FixtureLinkSource(json.load(file))
+
+    def find(self, source, target, **kwargs):
+        pf = PathFinder(backlinks=self.source, **kwargs)
+        path = pf.find(Article(source, source=self.source), Article(target, source=self.source))
+        return pf, path and [article.identifier for article in path]
+
+    def test_path_found_from_both_sides(self):
+        pf, path = self.find('Source', 'Target')
+
+        # the forward search expands the source, the backward search two
+        # levels and meets it at C, so the longer path through A, D and G is
+        # never followed
+        self.assertEqual(path, ['Source', 'C', 'F', 'Target'])
+        self.assertEqual(pf.statistics(), {'forward_expanded': 1, 'backward_expanded': 3})
+        self.assertEqual(self.source.requests, [
+            ('linked', ['Source']),
+            ('linking', ['Target']),
+            ('linking', ['F', 'G'])
+        ])
+
+    def test_same_article(self):
+        pf, path = self.find('Source', 'Source')
+        self.assertEqual(path, ['Source'])
+
+    def test_no_path(self):
+        # nothing links to the orphan
+        pf, path = self.find('Source', 'Orphan')
+        self.assertIsNone(path)
+
+        # the path is longer than allowed
+        pf, path = self.find('Source', 'Target', maximum_length=2)
+        self.assertIsNone(path)
+
+    def test_budget_exhausted(self):
+        # the second backward level does not fit, so the search gives up
+        # instead of expanding only a part of it
+        pf, path = self.find('Source', 'Target', maximum_expanded=3)
+        self.assertIsNone(path)
+        self.assertEqual(pf.statistics(), {'forward_expanded': 1, 'backward_expanded': 1})
+
+        pf, path = self.find('Source', 'Target', maximum_expanded=4)
+        self.assertEqual(path, ['Source', 'C', 'F', 'Target'])
+
+
+if __name__ == '__main__':
+    unittest.main()
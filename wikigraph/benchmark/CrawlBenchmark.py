@@ -0,0 +1,199 @@
+import tracemalloc
+from os import path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from wikigraph.cache.DirectoryCache import DirectoryCache
+from wikigraph.cache.SQLiteCache import SQLiteCache
+from wikigraph.graph.GraphAnalytics import GraphAnalytics
+from wikigraph.graph.GraphBuilder import GraphBuilder
+from wikigraph.graph.GraphExporter import GraphExporter
+from wikigraph.http.Fetcher import Fetcher
+from wikigraph.wikipedia.Article import Article
+from wikigraph.wikipedia.ContentScanner import ContentScanner
+from wikigraph.wikipedia.LinkScanner import LinkScanner
+
+
+class CrawlBenchmark:
+    """
+    Builds graphs from a WikiServer and measures download throughput, link
+    extraction, memory usage, analytics and export. Results are returned as
+    dictionaries of numbers so runs can be saved and compared.
+    """
+
+    # standard scenarios using the maximum node count K, maximum depth D and
+    # maximum references per article R
+    scenarios = {
+        'small': (100, 10, None),
+        'default': (500, 10, None),
+        'shallow': (1000, 2, None),
+        'limited': (1000, 10, 10)
+    }
+
+    # caches compared by cache(), created in an empty directory
+    caches = {
+        'directory': lambda directory: DirectoryCache(directory),
+        'sqlite': lambda directory: SQLiteCache(path.join(directory, 'cache.db'))
+    }
+
+    def __init__(self, server, workers=1, compact=False, memory=True, parse_sample=100, content=False, skip=None):
+        """
+        :param server: running WikiServer object
+        :param workers: number of articles downloaded concurrently
+        :param compact: build CompactGraph objects
+        :param memory: build every graph a second time to measure the peak
+                       memory usage (tracing slows the build down)
+        :param parse_sample: number of pages used to measure link extraction
+        :param content: extract links from the article body only
+        :param skip: list of sections skipped in the article body
+        """
+        self.server = server
+        self.workers = workers
+        self.compact = compact
+        self.memory = memory
+        self.parse_sample = parse_sample
+        self.content = content
+        self.skip = skip
+
+    def __build(self, K, D, R, cache=None):
+        # download articles from the server
+        url_pattern = Article.url_pattern
+        Article.url_pattern = self.server.url_pattern
+
+        try:
+            with Fetcher(retries=10, pool_size=max(10, self.workers)) as fetcher:
+                article = Article(self.server.wiki.identifier(0), fetcher=fetcher, cache=cache,
+                                  content=self.content, skip=self.skip)
+
+                gp = GraphBuilder(K, D, maximum_references=R, workers=self.workers, compact=self.compact)
+                with gp:
+                    graph = gp.build_from(article)
+
+                return graph, fetcher.statistics()
+        finally:
+            Article.url_pattern = url_pattern
+
+    def __parse(self):
+        # extract all links of sample pages like Article does for whole texts
+        wiki = self.server.wiki
+        identifiers = [wiki.identifier(i) for i in range(min(self.parse_sample, wiki.page_count))]
+        texts = [wiki.page(identifier).decode('utf-8') for identifier in identifiers]
+
+        links = 0
+        start = perf_counter()
+        for identifier, text in zip(identifiers, texts):
+            if self.content:
+                scanner = ContentScanner(identifier, skip=self.skip)
+            else:
+                scanner = LinkScanner(identifier)
+
+            scanner.feed(text)
+            links += len(scanner.links)
+        duration = perf_counter() - start
+
+        return duration / len(texts), links / len(texts)
+
+    def __export(self, graph):
+        times = {}
+
+        exporter = GraphExporter(graph)
+        with TemporaryDirectory() as directory:
+            for extension in ('csv', 'jsonl', 'graphml', 'gexf'):
+                start = perf_counter()
+                exporter.save_to(path.join(directory, f'graph.{extension}'))
+                times[f'export_{extension}_seconds'] = perf_counter() - start
+
+        return times
+
+    def run(self, K, D, R=None):
+        """
+        build a graph and measure all steps
+
+        :param K: maximum node count
+        :param D: maximum depth
+        :param R: maximum references per article (None for all)
+        :return: dictionary of measured values
+        """
+        before = self.server.statistics()
+
+        start = perf_counter()
+        graph, fetcher_statistics = self.__build(K, D, R)
+        build_seconds = perf_counter() - start
+
+        after = self.server.statistics()
+        pages = after['requests'] - before['requests'] - (after['errors'] - before['errors'])
+        page_bytes = after['bytes'] - before['bytes']
+
+        # traverse graph and compute the values printed by main.py
+        start = perf_counter()
+        analytics = GraphAnalytics(graph)
+        analytics.density()
+        analytics.top_degree_nodes(10)
+        analytics.top_degree_nodes(10, incoming=True)
+        analytics_seconds = perf_counter() - start
+
+        parse_seconds, links = self.__parse()
+        result = {
+            'nodes': analytics.node_count,
+            'edges': analytics.edge_count,
+            'pages': pages,
+            'bytes': page_bytes,
+            'errors': after['errors'] - before['errors'],
+            'retries': fetcher_statistics['retries'],
+            'connections_opened': fetcher_statistics['connections_opened'],
+            'build_seconds': build_seconds,
+            'pages_per_second': pages / build_seconds,
+            'bytes_per_second': page_bytes / build_seconds,
+            'parse_seconds_per_page': parse_seconds,
+            'links_per_page': links,
+            'analytics_seconds': analytics_seconds
+        }
+        result.update(self.__export(graph))
+
+        # build again while tracing allocations
+        if self.memory:
+            del graph, analytics
+
+            tracemalloc.start()
+            try:
+                self.__build(K, D, R)
+                result['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        return result
+
+    def cache(self, K, D, R=None):
+        """
+        build a graph twice with every cache, first with an empty (cold) and
+        then with a filled (warm) cache, which reads links without parsing
+        pages or requesting them
+
+        :param K: maximum node count
+        :param D: maximum depth
+        :param R: maximum references per article (None for all)
+        :return: dictionary of measured values
+        """
+        result = {}
+
+        for name, create in self.caches.items():
+            with TemporaryDirectory() as directory:
+                for state in ('cold', 'warm'):
+                    before = self.server.statistics()
+
+                    # closing writes pending entries, so it is measured too
+                    start = perf_counter()
+                    cache = create(directory)
+                    try:
+                        self.__build(K, D, R, cache)
+                    finally:
+                        cache.close()
+                    seconds = perf_counter() - start
+
+                    after = self.server.statistics()
+                    result[f'{name}_{state}_seconds'] = seconds
+                    result[f'{name}_{state}_pages'] = after['requests'] - before['requests']
+
+                result[f'{name}_speedup'] = result[f'{name}_cold_seconds'] / result[f'{name}_warm_seconds']
+
+        return result
@@ -0,0 +1,86 @@
+from os import path
+from time import perf_counter
+
+from wikigraph.graph.GraphAnalytics import GraphAnalytics
+from wikigraph.graph.GraphBuilder import GraphBuilder
+from wikigraph.wikipedia.Article import Article
+from wikigraph.wikipedia.DumpIndexer import DumpIndexer
+from wikigraph.wikipedia.DumpLinkSource import DumpLinkSource
+
+
+class DumpBenchmark:
+    """
+    Saves a SyntheticWiki as compressed XML and SQL dumps, creates link
+    indexes from them and measures how fast graphs are built from an index.
+    Results are returned as dictionaries of numbers like by CrawlBenchmark.
+    """
+
+    def __init__(self, wiki, directory, compact=False):
+        """
+        :param wiki: SyntheticWiki object
+        :param directory: directory to save dumps and indexes in
+        :param compact: build CompactGraph objects
+        """
+        self.wiki = wiki
+        self.directory = directory
+        self.compact = compact
+
+        self.index_path = path.join(directory, 'links.idx')
+
+    def __index(self, file_paths, index_path):
+        start = perf_counter()
+        indexer = DumpIndexer()
+        indexer.read_all(file_paths)
+        indexer.save(index_path)
+
+        return perf_counter() - start, indexer.statistics()
+
+    def index(self):
+        """
+        save dumps and create an index from each of them
+
+        :return: dictionary of measured values
+        """
+        xml_path = path.join(self.directory, 'pages-articles.xml.gz')
+        self.wiki.save_xml(xml_path)
+        sql_paths = self.wiki.save_sql(path.join(self.directory, '{table}.sql.gz'))
+
+        xml_seconds, statistics = self.__index([xml_path], self.index_path)
+        sql_seconds, _ = self.__index(sql_paths, path.join(self.directory, 'sql.idx'))
+
+        return {
+            'articles': statistics['articles'],
+            'redirects': statistics['redirects'],
+            'links': statistics['saved_links'],
+            'xml_dump_bytes': path.getsize(xml_path),
+            'xml_index_seconds': xml_seconds,
+            'xml_pages_per_second': (statistics['pages'] + statistics['redirects']) / xml_seconds,
+            'sql_dump_bytes': sum(map(path.getsize, sql_paths)),
+            'sql_index_seconds': sql_seconds,
+            'index_bytes': path.getsize(self.index_path)
+        }
+
+    def run(self, K, D, R=None):
+        """
+        build a graph from the index created by `index`
+
+        :param K: maximum node count
+        :param D: maximum depth
+        :param R: maximum references per article (None for all)
+        :return: dictionary of measured values
+        """
+        with DumpLinkSource(self.index_path) as source:
+            start = perf_counter()
+            gp = GraphBuilder(K, D, maximum_references=R, compact=self.compact)
+            with gp:
+                graph = gp.build_from(Article(self.wiki.identifier(0), source=source))
+            build_seconds = perf_counter() - start
+
+        analytics = GraphAnalytics(graph)
+        return {
+            'nodes': analytics.node_count,
+            'edges': analytics.edge_count,
+            'build_seconds': build_seconds,
+            'nodes_per_second': analytics.node_count / build_seconds,
+            'edges_per_second': analytics.edge_count / build_seconds
+        }
@@ -0,0 +1,176 @@
+import tracemalloc
+from os import path
+from time import perf_counter
+
+from wikigraph.graph.CompactGraph import CompactGraph
+from wikigraph.graph.GraphAnalytics import GraphAnalytics
+from wikigraph.graph.GraphExporter import GraphExporter
+from wikigraph.wikipedia.Article import Article
+
+# igraph plots using either cairo binding
+try:
+    import cairo
+except ImportError:
+    try:
+        import cairocffi as cairo
+    except ImportError:
+        cairo = None
+
+
+class GraphBenchmark:
+    """
+    Stores all pages of a SyntheticWiki and their links in a CompactGraph
+    without downloading a single page and measures how long processing a
+    graph of that size takes and how much memory it needs. Results are
+    returned as dictionaries of numbers like by CrawlBenchmark.
+    """
+
+    # node counts of the graphs drawn by render(), the larger ones exceed
+    # GraphDrawer.large_graph_threshold
+    render_sizes = (500, 2000, 5000)
+
+    # node counts of the graphs analysed by centrality()
+    centrality_sizes = (1000, 10000, 100000)
+
+    def __init__(self, wiki, directory, memory=True):
+        """
+        :param wiki: SyntheticWiki object
+        :param directory: directory to save exported files in
+        :param memory: repeat every step to measure the peak memory usage
+                       (tracing slows it down)
+        """
+        self.wiki = wiki
+        self.directory = directory
+        self.memory = memory
+
+        self.__graphs = {}
+        self.__numbers = None
+
+    def graph(self, page_count=None):
+        """
+        :param page_count: number of pages starting at the first one (None
+                           for all pages), links to other pages lead to the
+                           page with the same number modulo the page count,
+                           so the mean degree is the same for all sizes
+        :return: CompactGraph containing the pages, created on first use
+        """
+        wiki = self.wiki
+        page_count = wiki.page_count if page_count is None else min(page_count, wiki.page_count)
+
+        if self.__numbers is None:
+            self.__numbers = {wiki.identifier(i): i for i in range(wiki.page_count)}
+
+        if page_count not in self.__graphs:
+            graph = CompactGraph()
+
+            for i in range(page_count):
+                graph.add_node(Article(wiki.identifier(i)))
+
+            for i in range(page_count):
+                targets = (self.__numbers[identifier] % page_count for identifier in wiki.page_links(wiki.identifier(i)))
+                for target in dict.fromkeys(targets):
+                    if target != i:
+                        graph.add_edge(i, target)
+
+            self.__graphs[page_count] = graph
+
+        return self.__graphs[page_count]
+
+    def __measure(self, name, function):
+        # time a step and run it again while tracing allocations
+        start = perf_counter()
+        function()
+        result = {f'{name}_seconds': perf_counter() - start}
+
+        if self.memory:
+            tracemalloc.start()
+            try:
+                function()
+                result[f'{name}_peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        return result
+
+    def export(self):
+        """
+        export the graph to all file formats supported by GraphExporter
+
+        :return: dictionary of measured values
+        """
+        graph = self.graph()
+        exporter = GraphExporter(graph.node(0))
+        result = {'nodes': len(graph), 'edges': graph.edge_count}
+
+        for extension in ('csv', 'jsonl', 'graphml', 'gexf'):
+            file_path = path.join(self.directory, f'graph.{extension}')
+
+            result.update(self.__measure(f'export_{extension}', lambda: exporter.save_to(file_path)))
+            result[f'export_{extension}_bytes'] = path.getsize(file_path)
+
+        return result
+
+    def render(self):
+        """
+        lay out and draw graphs of different sizes using the layout GraphDrawer
+        chooses for them (drawing requires cairo and is skipped without it)
+
+        :return: dictionary of measured values
+        """
+        # igraph is only needed for this scenario
+        from wikigraph.graph.GraphDrawer import GraphDrawer
+
+        result = {}
+
+        for size in self.render_sizes:
+            if size > self.wiki.page_count:
+                break
+
+            node = self.graph(size).node(0)
+            analytics = GraphAnalytics(node)
+            drawer = GraphDrawer(node, analytics=analytics)
+            result[f'render_{size}_edges'] = analytics.edge_count
+
+            start = perf_counter()
+            drawer.coordinates()
+            result[f'render_{size}_layout_seconds'] = perf_counter() - start
+
+            if cairo is not None:
+                start = perf_counter()
+                drawer.save_to(path.join(self.directory, f'graph_{size}.png'))
+                result[f'render_{size}_draw_seconds'] = perf_counter() - start
+
+        return result
+
+    def centrality(self):
+        """
+        compute all centrality scores of graphs of different sizes, starting
+        with the traversal and conversion to arrays they require
+
+        :return: dictionary of measured values
+        """
+        # numpy is only needed for this scenario
+        from wikigraph.graph.GraphCentrality import GraphCentrality
+
+        result = {}
+
+        for size in self.centrality_sizes:
+            if size > self.wiki.page_count:
+                break
+
+            node = self.graph(size).node(0)
+            analytics = GraphAnalytics(node)
+            centrality = GraphCentrality(node, analytics=analytics)
+
+            for name, function in (('traversal', lambda: analytics.order),
+                                   ('conversion', lambda: centrality.node_count),
+                                   ('pagerank', centrality.pagerank),
+                                   ('hits', centrality.hits),
+                                   ('components', centrality.components)):
+                start = perf_counter()
+                function()
+                result[f'centrality_{size}_{name}_seconds'] = perf_counter() - start
+
+            result[f'centrality_{size}_edges'] = analytics.edge_count
+
+        return result
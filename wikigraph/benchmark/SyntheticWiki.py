@@ -0,0 +1,317 @@
+from random import Random
+from threading import Lock
+from xml.sax.saxutils import escape, quoteattr
+
+from wikigraph.wikipedia.DumpIndexer import DumpIndexer
+
+
+class SyntheticWiki:
+    """
+    Generates Wikipedia-like HTML pages which link to each other. Pages are
+    created on demand from a seed, so the same parameters always result in
+    the same wiki and benchmark runs are comparable. The wiki can be saved as
+    XML and SQL dumps as well.
+    """
+
+    # links to other namespaces contained in every page, which are ignored
+    # when extracting linked articles
+    namespace_links = ['Main_Page', 'Special:Random', 'Help:Contents', 'Wikipedia:About']
+
+    def __init__(self, page_count=1000, mean_degree=50, distribution='powerlaw', page_size=50000, seed=0,
+                 navigation=0):
+        """
+        :param page_count: number of pages
+        :param mean_degree: mean number of links per page
+        :param distribution: distribution of links per page ('constant',
+                             'uniform' or 'powerlaw')
+        :param page_size: approximate size of a page in bytes
+        :param seed: seed used to generate pages
+        :param navigation: number of links in a navbox after the body of
+                           every page (0 to omit navboxes and reference
+                           lists)
+        """
+        if distribution not in ('constant', 'uniform', 'powerlaw'):
+            raise ValueError(f'unknown degree distribution: {distribution}')
+
+        self.page_count = page_count
+        self.mean_degree = mean_degree
+        self.distribution = distribution
+        self.page_size = page_size
+        self.seed = seed
+        self.navigation = navigation
+
+        # generated pages are kept so serving them does not cost any time
+        self.__lock = Lock()
+        self.__pages = {}
+        self.__backlinks = None
+
+    def identifier(self, i):
+        """
+        :param i: page number
+        :return: identifier of the page
+        """
+        return f'Page_{i}'
+
+    def __number(self, identifier):
+        # get page number from identifier or None if there is no such page
+        if not identifier.startswith('Page_'):
+            return None
+
+        try:
+            i = int(identifier[5:])
+        except ValueError:
+            return None
+
+        return i if 0 <= i < self.page_count and identifier == self.identifier(i) else None
+
+    def __degree(self, random):
+        if self.distribution == 'constant':
+            return self.mean_degree
+        elif self.distribution == 'uniform':
+            return random.randint(0, 2 * self.mean_degree)
+        else:
+            # a pareto distribution with shape 2 has a mean of 2
+            return min(self.page_count, int(self.mean_degree / 2 * random.paretovariate(2)))
+
+    def navigation_links(self, identifier):
+        """
+        Pages are grouped by their numbers. The navbox of a page links to all
+        pages of its group and its reference list to the first two pages, like
+        navboxes of a topic and identifier pages on Wikipedia.
+
+        :param identifier: page identifier
+        :return: tuple of the identifiers linked by the navbox and by the
+                 reference list or None if there is no such page
+        """
+        i = self.__number(identifier)
+        if i is None:
+            return None
+
+        if self.navigation == 0:
+            return [], []
+
+        first = i // self.navigation * self.navigation
+        navbox = [self.identifier(j) for j in range(first, min(first + self.navigation, self.page_count))]
+        references = [self.identifier(j) for j in range(min(2, self.page_count))]
+
+        return navbox, references
+
+    def links(self, identifier):
+        """
+        :param identifier: page identifier
+        :return: identifiers of linked pages in order of appearance (may
+                 contain duplicates) or None if there is no such page
+        """
+        i = self.__number(identifier)
+        if i is None:
+            return None
+
+        random = Random(f'{self.seed}/{i}')
+        return [self.identifier(random.randrange(self.page_count)) for _ in range(self.__degree(random))]
+
+    def page_links(self, identifier):
+        """
+        :param identifier: page identifier
+        :return: distinct identifiers of all pages linked anywhere on the page
+                 in order of appearance or None if there is no such page
+        """
+        links = self.links(identifier)
+        if links is None:
+            return None
+
+        navbox, references = self.navigation_links(identifier)
+        return [link for link in dict.fromkeys(links + references + navbox) if link != identifier]
+
+    def backlinks(self, identifier):
+        """
+        :param identifier: page identifier
+        :return: identifiers of all pages linking to the page ordered by page
+                 number or None if there is no such page
+        """
+        if self.__number(identifier) is None:
+            return None
+
+        # the links of all pages are inverted once
+        with self.__lock:
+            if self.__backlinks is None:
+                self.__backlinks = {}
+                for i in range(self.page_count):
+                    source = self.identifier(i)
+                    for link in self.page_links(source):
+                        self.__backlinks.setdefault(link, []).append(source)
+
+            return list(self.__backlinks.get(identifier, []))
+
+    def __generate(self, identifier):
+        links = self.links(identifier)
+
+        # Fill the space between links with text so the page reaches its
+        # size. Links carry anchors and titles like on Wikipedia.
+        size = max(0, self.page_size // (len(links) + 1) - 60)
+        text = ('lorem ipsum dolor sit amet ' * (size // 27 + 1))[:size]
+        parts = [f'<!DOCTYPE html><html><head><title>{identifier}</title></head><body>',
+                 f'<a href="/wiki/{self.namespace_links[0]}" title="Main Page">Main Page</a>',
+                 '<div id="mw-content-text" class="mw-body-content">',
+                 '<div class="mw-content-ltr mw-parser-output" lang="en" dir="ltr">']
+
+        for link in links:
+            parts.append(f'<p>{text}</p>')
+            parts.append(f'<a href="/wiki/{link}#Section" title="{link}">{link}</a>')
+
+        # reference list and navbox at the end of the body
+        navbox, references = self.navigation_links(identifier)
+        if references:
+            parts.append('<div class="reflist"><ol class="references">')
+            for link in references:
+                parts.append(f'<li><cite><a href="/wiki/{link}" title="{link}">{link}</a></cite></li>')
+            parts.append('</ol></div>')
+
+        if navbox:
+            parts.append('<div role="navigation" class="navbox"><table class="nowraplinks navbox-inner"><tr><td>')
+            for link in navbox:
+                parts.append(f'<a href="/wiki/{link}" title="{link}">{link}</a> ')
+            parts.append('</td></tr></table></div>')
+
+        parts.append('</div></div>')
+
+        for link in self.namespace_links[1:]:
+            parts.append(f'<a href="/wiki/{link}" title="{link}">{link}</a>')
+
+        parts.append('</body></html>')
+        return ''.join(parts).encode('utf-8')
+
+    def page(self, identifier):
+        """
+        :param identifier: page identifier
+        :return: HTML code of the page as bytes or None if there is no such
+                 page
+        """
+        if self.__number(identifier) is None:
+            return None
+
+        with self.__lock:
+            page = self.__pages.get(identifier)
+
+        if page is None:
+            page = self.__generate(identifier)
+            with self.__lock:
+                self.__pages[identifier] = page
+
+        return page
+
+    def __wikilinks(self, identifier):
+        # Targets and wikitext of all links on a page. Links are written in
+        # different forms found on Wikipedia, every fourth one leads to a
+        # redirect of the linked page.
+        links = self.links(identifier)
+        navbox, references = self.navigation_links(identifier)
+
+        result = []
+        for j, link in enumerate(links + references + navbox):
+            title = link.replace('_', ' ')
+            if j % 4 == 0:
+                result.append((link, f'[[{title}]]'))
+            elif j % 4 == 1:
+                result.append((link, f'[[{title}|{title.lower()}]]'))
+            elif j % 4 == 2:
+                result.append((link, f'[[{title[0].lower()}{title[1:]}#Section|section]]'))
+            else:
+                result.append((f'{link}_(alias)', f'[[{title} (alias)]]'))
+
+        return result
+
+    def wikitext(self, identifier):
+        """
+        :param identifier: page identifier
+        :return: wikitext of the page linking to the same pages as its HTML
+                 code or None if there is no such page
+        """
+        if self.__number(identifier) is None:
+            return None
+
+        parts = [f'Text of [[{identifier.replace("_", " ")}]] with [[File:Example.png|thumb|an image]].']
+        for _, text in self.__wikilinks(identifier):
+            parts.append(f'Lorem ipsum {text} dolor sit amet.')
+
+        parts.append('[[Help:Contents]] [[:Category:Pages]] [[Category:Pages]] [[de:Seite]]')
+        return '\n'.join(parts)
+
+    def __open(self, file_path):
+        # compress like dumps downloaded from Wikipedia
+        for extension, opener in DumpIndexer.openers.items():
+            if file_path.endswith(extension):
+                return opener(file_path, 'wt', encoding='utf-8')
+
+        return open(file_path, 'w', encoding='utf-8')
+
+    def save_xml(self, file_path):
+        """
+        save all pages and a redirect to every page as pages-articles XML dump
+
+        :param file_path: dump file (compressed if it ends with .gz, .bz2 or
+                          .xz)
+        :return:
+        """
+        with self.__open(file_path) as file:
+            file.write('<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.11/" version="0.11">\n'
+                       '<siteinfo><sitename>Synthetic</sitename><case>first-letter</case><namespaces>'
+                       '<namespace key="0" case="first-letter" />'
+                       '<namespace key="6" case="first-letter">File</namespace>'
+                       '<namespace key="12" case="first-letter">Help</namespace>'
+                       '<namespace key="14" case="first-letter">Category</namespace>'
+                       '</namespaces></siteinfo>\n')
+
+            for i in range(self.page_count):
+                identifier = self.identifier(i)
+                title = identifier.replace('_', ' ')
+
+                file.write(f'<page><title>{escape(title)}</title><ns>0</ns><id>{i + 1}</id><revision>'
+                           f'<text xml:space="preserve">{escape(self.wikitext(identifier))}</text>'
+                           '</revision></page>\n')
+                file.write(f'<page><title>{escape(title)} (alias)</title><ns>0</ns>'
+                           f'<id>{self.page_count + i + 1}</id><redirect title={quoteattr(title)} /><revision>'
+                           f'<text xml:space="preserve">#REDIRECT [[{escape(title)}]]</text></revision></page>\n')
+
+            file.write('</mediawiki>\n')
+
+    @staticmethod
+    def __insert(file, table, rows):
+        # insert rows in lines of up to 1000 rows like mysqldump
+        file.write(f'CREATE TABLE `{table}` (\n);\n')
+        for i in range(0, len(rows), 1000):
+            file.write(f'INSERT INTO `{table}` VALUES {",".join(rows[i:i + 1000])};\n')
+
+    def save_sql(self, file_pattern):
+        """
+        save all pages, a redirect to every page and all links as SQL dumps of
+        the page, redirect, linktarget and pagelinks tables
+
+        :param file_pattern: pattern of the dump files containing {table}
+                             (compressed if it ends with .gz, .bz2 or .xz)
+        :return: list of saved files
+        """
+        # Pages have ids starting at 1, followed by their redirects. Links
+        # refer to link targets and point at redirects like on Wikipedia.
+        pages, redirects, targets, links = [], [], {}, []
+        for i in range(self.page_count):
+            identifier = self.identifier(i)
+            pages.append(f"({i + 1},0,'{identifier}',0,0,0.5,'20240101000000',NULL,{i + 1},100,'wikitext',NULL)")
+            pages.append(f"({self.page_count + i + 1},0,'{identifier}_(alias)',1,0,0.5,'20240101000000',NULL,"
+                         f"{self.page_count + i + 1},30,'wikitext',NULL)")
+            redirects.append(f"({self.page_count + i + 1},0,'{identifier}','','')")
+
+            for target in dict.fromkeys(target for target, _ in self.__wikilinks(identifier)):
+                if target != identifier:
+                    target_id = targets.setdefault(target, len(targets) + 1)
+                    links.append(f'({i + 1},0,{target_id})')
+
+        targets = [f"({target_id},0,'{target}')" for target, target_id in targets.items()]
+
+        file_paths = []
+        for table, rows in (('page', pages), ('redirect', redirects), ('linktarget', targets), ('pagelinks', links)):
+            file_path = file_pattern.format(table=table)
+            with self.__open(file_path) as file:
+                self.__insert(file, table, rows)
+            file_paths.append(file_path)
+
+        return file_paths
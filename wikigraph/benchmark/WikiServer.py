@@ -0,0 +1,208 @@
+import json
+from hashlib import sha1
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from random import Random
+from threading import Lock, Thread
+from time import sleep
+from urllib.parse import parse_qs, unquote, urlsplit
+
+
+class WikiServer:
+    """
+    Serves a SyntheticWiki via http on localhost in a background thread.
+    Latency and temporary errors can be injected to simulate a remote server.
+    Articles are downloaded from it by setting Article.url_pattern to the
+    server's url_pattern.
+
+    Links and backlinks are served like by the MediaWiki API as well (queries
+    for prop=links and prop=linkshere), so ApiLinkSource.url_pattern can be
+    set to the server's api_url_pattern.
+
+    Pages are sent with an ETag. Requests with a matching If-None-Match header
+    are answered with 304 Not Modified, so cache revalidation can be tested.
+    """
+
+    def __init__(self, wiki, latency=0.0, jitter=0.0, error_rate=0.0, seed=0):
+        """
+        :param wiki: SyntheticWiki object to serve
+        :param latency: delay in seconds before every response
+        :param jitter: maximum random delay in seconds added to the latency
+        :param error_rate: fraction of requests answered with 503 Service
+                           Unavailable and Retry-After: 0
+        :param seed: seed used to choose delays and failing requests
+        """
+        self.wiki = wiki
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+
+        self.__random = Random(seed)
+        self.__lock = Lock()
+        self.__requests = 0
+        self.__errors = 0
+        self.__not_modified = 0
+        self.__bytes = 0
+
+        self.__server = None
+        self.__thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def url_pattern(self):
+        """
+        :return: url pattern which can be used as Article.url_pattern
+        """
+        return f'http://127.0.0.1:{self.__server.server_port}/wiki/{{identifier}}'
+
+    @property
+    def api_url_pattern(self):
+        """
+        :return: url pattern which can be used as ApiLinkSource.url_pattern
+        """
+        return f'http://127.0.0.1:{self.__server.server_port}/w/api.php'
+
+    def __query(self, query):
+        # Answer a query of ApiLinkSource without continuation. Titles use
+        # spaces instead of underscores like in MediaWiki.
+        params = {key: values[0] for key, values in parse_qs(query).items()}
+
+        prop = params.get('prop')
+        if prop == 'links':
+            function = self.wiki.page_links
+        elif prop == 'linkshere':
+            function = self.wiki.backlinks
+        else:
+            return None
+
+        pages = []
+        for title in params.get('titles', '').split('|'):
+            links = function(title.replace(' ', '_'))
+            if links is None:
+                pages.append({'title': title, 'missing': True})
+            else:
+                pages.append({'title': title, prop: [{'ns': 0, 'title': link.replace('_', ' ')} for link in links]})
+
+        return json.dumps({'batchcomplete': True, 'query': {'pages': pages}}).encode('utf-8')
+
+    def __respond(self, handler):
+        # choose delay and error while holding the lock so the sequence of
+        # random numbers does not depend on thread timing
+        with self.__lock:
+            self.__requests += 1
+            delay = self.latency + self.__random.uniform(0, self.jitter)
+            failed = self.__random.random() < self.error_rate
+            if failed:
+                self.__errors += 1
+
+        if delay > 0:
+            sleep(delay)
+
+        if failed:
+            handler.send_response(503)
+            handler.send_header('Retry-After', '0')
+            handler.send_header('Content-Length', '0')
+            handler.end_headers()
+            return
+
+        page = None
+        content_type = 'text/html; charset=utf-8'
+
+        url = urlsplit(handler.path)
+        if url.path.startswith('/wiki/'):
+            page = self.wiki.page(unquote(url.path[6:]))
+        elif url.path == '/w/api.php':
+            page = self.__query(url.query)
+            content_type = 'application/json; charset=utf-8'
+
+        if page is None:
+            handler.send_response(404)
+            handler.send_header('Content-Length', '0')
+            handler.end_headers()
+            return
+
+        # pages never change, so their content identifies their version
+        etag = f'"{sha1(page).hexdigest()}"'
+        if handler.headers.get('If-None-Match') == etag:
+            handler.send_response(304)
+            handler.send_header('ETag', etag)
+            handler.send_header('Content-Length', '0')
+            handler.end_headers()
+
+            with self.__lock:
+                self.__not_modified += 1
+            return
+
+        handler.send_response(200)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('ETag', etag)
+        handler.send_header('Content-Length', str(len(page)))
+        handler.end_headers()
+        handler.wfile.write(page)
+
+        with self.__lock:
+            self.__bytes += len(page)
+
+    def start(self):
+        """
+        start serving on a free port
+        :return:
+        """
+        respond = self.__respond
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep connections alive. Headers and body are written
+            # separately, so Nagle's algorithm would hold the body back until
+            # the client acknowledges the headers.
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def handle(self):
+                # Clients stop reading early if enough links have been found
+                # and close the connection while the page is sent.
+                try:
+                    super().handle()
+                except ConnectionError:
+                    pass
+
+            def do_GET(self):
+                respond(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.__server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.__server.daemon_threads = True
+
+        self.__thread = Thread(target=self.__server.serve_forever, daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """
+        stop serving and close the socket
+        :return:
+        """
+        self.__server.shutdown()
+        self.__server.server_close()
+        self.__thread.join()
+
+    def statistics(self):
+        """
+        get counters collected since the server has been created
+
+        :return: dictionary containing requests received, errors injected,
+                 requests answered with 304 Not Modified and bytes of pages
+                 sent completely
+        """
+        with self.__lock:
+            return {
+                'requests': self.__requests,
+                'errors': self.__errors,
+                'not_modified': self.__not_modified,
+                'bytes': self.__bytes
+            }
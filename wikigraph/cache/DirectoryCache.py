@@ -0,0 +1,180 @@
+import json
+from os import listdir, path, remove
+
+
+class DirectoryCache:
+    """
+    Cache which saves every article to a separate HTML file in a directory.
+    The file name only contains the article identifier, so a directory should
+    only be used for articles of a single language.
+    """
+
+    def __init__(self, directory, ttl=None):
+        """
+        :param directory: directory to save HTML files in
+        :param ttl: seconds after which cached articles are revalidated (None
+                    to never revalidate)
+        """
+        self.directory = directory
+        self.ttl = ttl
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __file(self, identifier, extension='.html'):
+        # Article identifiers can contain slashes which must not be interpreted
+        # as directory delimiters at any file system operation.
+        # https://de.wikipedia.org/wiki/Bob_Marley/Auszeichnungen_f%C3%BCr_Musikverk%C3%A4ufe
+        safe_identifier = identifier.replace('/', '_')
+
+        return path.join(self.directory, safe_identifier + extension)
+
+    def load(self, language, identifier):
+        """
+        :param language: article language
+        :param identifier: article identifier
+        :return: cached text or None if the article is not cached
+        """
+        cache_file = self.__file(identifier)
+
+        if not path.exists(cache_file):
+            return None
+
+        with open(cache_file, 'r', encoding='utf-8') as file:
+            return file.read()
+
+    def load_chunks(self, language, identifier, chunk_size=65536):
+        """
+        read a cached article piece by piece
+
+        :param language: article language
+        :param identifier: article identifier
+        :param chunk_size: number of characters per chunk
+        :return: generator of text chunks or None if the article is not cached
+        """
+        cache_file = self.__file(identifier)
+
+        if not path.exists(cache_file) or path.getsize(cache_file) == 0:
+            return None
+
+        def chunks():
+            with open(cache_file, 'r', encoding='utf-8') as file:
+                while True:
+                    chunk = file.read(chunk_size)
+                    if chunk == '':
+                        return
+
+                    yield chunk
+
+        return chunks()
+
+    def metadata(self, language, identifier):
+        """
+        :param language: article language
+        :param identifier: article identifier
+        :return: dictionary containing etag, last_modified and fetched (unix
+                 timestamp) or None if the article is not cached
+        """
+        meta_file = self.__file(identifier, '.meta')
+
+        if path.exists(meta_file):
+            with open(meta_file, 'r', encoding='utf-8') as file:
+                return json.load(file)
+
+        # Files written by older versions do not have a metadata file. The
+        # modification time is used as fetch time instead.
+        cache_file = self.__file(identifier)
+
+        if path.exists(cache_file):
+            return {'etag': None, 'last_modified': None, 'fetched': path.getmtime(cache_file)}
+
+        return None
+
+    def store(self, language, identifier, text, metadata=None):
+        """
+        Save an article and drop links extracted from a previous version.
+
+        :param language: article language
+        :param identifier: article identifier
+        :param text: text to cache
+        :param metadata: dictionary containing etag, last_modified and fetched
+        :return:
+        """
+        with open(self.__file(identifier), 'w', encoding='utf-8') as file:
+            file.write(text)
+
+        if metadata is not None:
+            self.touch(language, identifier, metadata)
+
+        links_file = self.__file(identifier, '.links')
+        if path.exists(links_file):
+            remove(links_file)
+
+    def touch(self, language, identifier, metadata):
+        """
+        update metadata of a cached article
+
+        :param language: article language
+        :param identifier: article identifier
+        :param metadata: dictionary containing etag, last_modified and fetched
+        :return:
+        """
+        with open(self.__file(identifier, '.meta'), 'w', encoding='utf-8') as file:
+            json.dump(metadata, file)
+
+    def load_links(self, language, identifier, version):
+        """
+        :param language: article language
+        :param identifier: article identifier
+        :param version: parser version the links must be extracted with
+        :return: list of cached links or None if no links for this parser
+                 version are cached
+        """
+        links_file = self.__file(identifier, '.links')
+
+        if not path.exists(links_file):
+            return None
+
+        # The first line contains the parser version followed by one link
+        # per line.
+        with open(links_file, 'r', encoding='utf-8') as file:
+            lines = file.read().split('\n')
+
+        if lines[0] != str(version):
+            return None
+
+        return lines[1:]
+
+    def store_links(self, language, identifier, version, links):
+        """
+        :param language: article language
+        :param identifier: article identifier
+        :param version: parser version the links were extracted with
+        :param links: list of links
+        :return:
+        """
+        with open(self.__file(identifier, '.links'), 'w', encoding='utf-8') as file:
+            file.write('\n'.join([str(version)] + links))
+
+    def close(self):
+        """
+        nothing to do as every file is written immediately
+        :return:
+        """
+        pass
+
+    def __iter__(self):
+        """
+        iterate over all cached articles
+
+        :return: generator of (identifier, text) tuples
+        """
+        for file_name in sorted(listdir(self.directory)):
+            if not file_name.endswith('.html'):
+                continue
+
+            with open(path.join(self.directory, file_name), 'r', encoding='utf-8') as file:
+                yield file_name[:-len('.html')], file.read()
@@ -0,0 +1,355 @@
+import sqlite3
+import zlib
+from codecs import getincrementaldecoder
+from io import BytesIO
+from threading import Lock
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class SQLiteCache:
+    """
+    Cache which saves all articles and their extracted links compressed to a
+    single SQLite database.
+    Articles are compressed using zstd if the zstandard package is installed
+    and zlib otherwise. New articles are written in batches. The database
+    uses write-ahead logging so other processes can read while a graph is
+    built.
+    """
+
+    def __init__(self, file_path, batch_size=64, compression_level=None, ttl=None):
+        """
+        :param file_path: database file (created if it does not exist)
+        :param batch_size: number of articles written in a single transaction
+        :param compression_level: compression level (None for the codec's
+                                  default)
+        :param ttl: seconds after which cached articles are revalidated (None
+                    to never revalidate)
+        """
+        self.file_path = file_path
+        self.ttl = ttl
+        self.batch_size = batch_size
+        self.compression_level = compression_level
+
+        if zstandard is not None:
+            self.codec = 'zstd'
+            self.__compressor = zstandard.ZstdCompressor(level=compression_level or 3)
+            self.__decompressor = zstandard.ZstdDecompressor()
+        else:
+            self.codec = 'zlib'
+            self.__compressor = None
+            self.__decompressor = None
+
+        # The connection is shared between threads, every access is guarded
+        # by a lock.
+        self.__lock = Lock()
+        self.__pending = {}
+        self.__pending_links = {}
+
+        self.__connection = sqlite3.connect(file_path, timeout=30, check_same_thread=False)
+        self.__connection.execute('PRAGMA journal_mode=WAL')
+        self.__connection.execute('PRAGMA synchronous=NORMAL')
+        self.__connection.execute('''
+            CREATE TABLE IF NOT EXISTS articles (
+                language TEXT NOT NULL,
+                identifier TEXT NOT NULL,
+                codec TEXT NOT NULL,
+                data BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched REAL,
+                PRIMARY KEY (language, identifier)
+            )
+        ''')
+
+        # add metadata columns to databases created by older versions
+        columns = [row[1] for row in self.__connection.execute('PRAGMA table_info(articles)')]
+        for column, column_type in (('etag', 'TEXT'), ('last_modified', 'TEXT'), ('fetched', 'REAL')):
+            if column not in columns:
+                self.__connection.execute(f'ALTER TABLE articles ADD COLUMN {column} {column_type}')
+
+        self.__connection.execute('''
+            CREATE TABLE IF NOT EXISTS links (
+                language TEXT NOT NULL,
+                identifier TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                codec TEXT NOT NULL,
+                data BLOB NOT NULL,
+                PRIMARY KEY (language, identifier)
+            )
+        ''')
+        self.__connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __compress(self, text):
+        data = text.encode('utf-8')
+
+        if self.codec == 'zstd':
+            return self.__compressor.compress(data)
+        elif self.compression_level is not None:
+            return zlib.compress(data, self.compression_level)
+        else:
+            return zlib.compress(data)
+
+    def __decompress(self, codec, data):
+        if codec == 'zstd':
+            if self.__decompressor is None:
+                raise RuntimeError('zstandard package is needed to read this cache')
+
+            data = self.__decompressor.decompress(data)
+        else:
+            data = zlib.decompress(data)
+
+        return data.decode('utf-8')
+
+    def load(self, language, identifier):
+        """
+        :param language: article language
+        :param identifier: article identifier
+        :return: cached text or None if the article is not cached
+        """
+        with self.__lock:
+            # articles which are not yet written to the database
+            if (language, identifier) in self.__pending:
+                return self.__pending[(language, identifier)][0]
+
+            row = self.__connection.execute(
+                'SELECT codec, data FROM articles WHERE language = ? AND identifier = ?',
+                (language, identifier)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return self.__decompress(*row)
+
+    def load_chunks(self, language, identifier, chunk_size=65536):
+        """
+        decompress a cached article piece by piece
+
+        :param language: article language
+        :param identifier: article identifier
+        :param chunk_size: number of bytes decompressed per chunk
+        :return: generator of text chunks or None if the article is not cached
+        """
+        with self.__lock:
+            if (language, identifier) in self.__pending:
+                text = self.__pending[(language, identifier)][0]
+                return (text[i:i + chunk_size] for i in range(0, len(text), chunk_size))
+
+            row = self.__connection.execute(
+                'SELECT codec, data FROM articles WHERE language = ? AND identifier = ?',
+                (language, identifier)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        codec, data = row
+
+        def chunks():
+            decoder = getincrementaldecoder('utf-8')()
+
+            if codec == 'zstd':
+                if self.__decompressor is None:
+                    raise RuntimeError('zstandard package is needed to read this cache')
+
+                for block in self.__decompressor.read_to_iter(BytesIO(data), write_size=chunk_size):
+                    yield decoder.decode(block)
+            else:
+                decompressor = zlib.decompressobj()
+                remaining = data
+
+                # decompress at most chunk_size bytes per step
+                while remaining:
+                    yield decoder.decode(decompressor.decompress(remaining, chunk_size))
+                    remaining = decompressor.unconsumed_tail
+
+                yield decoder.decode(decompressor.flush())
+
+            yield decoder.decode(b'', final=True)
+
+        return chunks()
+
+    def metadata(self, language, identifier):
+        """
+        :param language: article language
+        :param identifier: article identifier
+        :return: dictionary containing etag, last_modified and fetched (unix
+                 timestamp) or None if the article is not cached
+        """
+        with self.__lock:
+            if (language, identifier) in self.__pending:
+                return self.__pending[(language, identifier)][1]
+
+            row = self.__connection.execute(
+                'SELECT etag, last_modified, fetched FROM articles WHERE language = ? AND identifier = ?',
+                (language, identifier)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return {'etag': row[0], 'last_modified': row[1], 'fetched': row[2]}
+
+    def store(self, language, identifier, text, metadata=None):
+        """
+        Save an article and drop links extracted from a previous version.
+
+        :param language: article language
+        :param identifier: article identifier
+        :param text: text to cache
+        :param metadata: dictionary containing etag, last_modified and fetched
+        :return:
+        """
+        metadata = {} if metadata is None else metadata
+
+        with self.__lock:
+            self.__pending[(language, identifier)] = (text, metadata)
+            self.__pending_links.pop((language, identifier), None)
+
+            if len(self.__pending) + len(self.__pending_links) >= self.batch_size:
+                self.__flush()
+
+    def touch(self, language, identifier, metadata):
+        """
+        update metadata of a cached article
+
+        :param language: article language
+        :param identifier: article identifier
+        :param metadata: dictionary containing etag, last_modified and fetched
+        :return:
+        """
+        with self.__lock:
+            if (language, identifier) in self.__pending:
+                self.__pending[(language, identifier)] = (self.__pending[(language, identifier)][0], metadata)
+                return
+
+            with self.__connection:
+                self.__connection.execute(
+                    'UPDATE articles SET etag = ?, last_modified = ?, fetched = ? WHERE language = ? AND identifier = ?',
+                    (metadata.get('etag'), metadata.get('last_modified'), metadata.get('fetched'), language, identifier)
+                )
+
+    def load_links(self, language, identifier, version):
+        """
+        :param language: article language
+        :param identifier: article identifier
+        :param version: parser version the links must be extracted with
+        :return: list of cached links or None if no links for this parser
+                 version are cached
+        """
+        with self.__lock:
+            if (language, identifier) in self.__pending_links:
+                pending_version, links = self.__pending_links[(language, identifier)]
+                return links if pending_version == version else None
+
+            # links in the database are outdated if a new text is pending
+            if (language, identifier) in self.__pending:
+                return None
+
+            row = self.__connection.execute(
+                'SELECT codec, data FROM links WHERE language = ? AND identifier = ? AND version = ?',
+                (language, identifier, version)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        # links are saved as a single text containing one link per line
+        text = self.__decompress(*row)
+        return text.split('\n') if text != '' else []
+
+    def store_links(self, language, identifier, version, links):
+        """
+        :param language: article language
+        :param identifier: article identifier
+        :param version: parser version the links were extracted with
+        :param links: list of links
+        :return:
+        """
+        with self.__lock:
+            self.__pending_links[(language, identifier)] = (version, links)
+
+            if len(self.__pending) + len(self.__pending_links) >= self.batch_size:
+                self.__flush()
+
+    def flush(self):
+        """
+        write all pending articles to the database
+        :return:
+        """
+        with self.__lock:
+            self.__flush()
+
+    def __flush(self):
+        if not self.__pending and not self.__pending_links:
+            return
+
+        rows = [
+            (language, identifier, self.codec, self.__compress(text),
+             metadata.get('etag'), metadata.get('last_modified'), metadata.get('fetched'))
+            for (language, identifier), (text, metadata) in self.__pending.items()
+        ]
+        link_rows = [
+            (language, identifier, version, self.codec, self.__compress('\n'.join(links)))
+            for (language, identifier), (version, links) in self.__pending_links.items()
+        ]
+
+        with self.__connection:
+            self.__connection.executemany(
+                'INSERT OR REPLACE INTO articles (language, identifier, codec, data, etag, last_modified, fetched) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            # links of replaced articles are outdated
+            self.__connection.executemany(
+                'DELETE FROM links WHERE language = ? AND identifier = ?',
+                list(self.__pending.keys())
+            )
+            self.__connection.executemany(
+                'INSERT OR REPLACE INTO links (language, identifier, version, codec, data) VALUES (?, ?, ?, ?, ?)',
+                link_rows
+            )
+
+        self.__pending = {}
+        self.__pending_links = {}
+
+    def close(self):
+        """
+        write pending articles and close the database
+        :return:
+        """
+        with self.__lock:
+            self.__flush()
+            self.__connection.close()
+
+    def import_from(self, cache, language='en'):
+        """
+        Copy all articles from a DirectoryCache into this cache. Slashes in
+        identifiers can not be restored as they are replaced in file names.
+
+        :param cache: DirectoryCache object
+        :param language: language of the articles in the directory
+        :return: number of imported articles
+        """
+        count = 0
+
+        for identifier, text in cache:
+            # empty files are treated as not cached by Article
+            if text.strip() == '':
+                continue
+
+            self.store(language, identifier, text, cache.metadata(language, identifier))
+            count += 1
+
+        self.flush()
+        return count
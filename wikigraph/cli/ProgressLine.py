@@ -0,0 +1,67 @@
+from sys import stderr
+from time import perf_counter
+
+
+class ProgressLine:
+    """
+    GraphBuilder hook which prints a single line showing created nodes,
+    current depth, nodes per second and the estimated remaining time. The
+    line is overwritten on every update.
+    """
+
+    def __init__(self, maximum_node_count, interval=0.2, file=stderr):
+        """
+        :param maximum_node_count: node count the estimation is based on
+        :param interval: minimum seconds between two updates
+        :param file: file to print to
+        """
+        self.maximum_node_count = maximum_node_count
+        self.interval = interval
+        self.file = file
+
+        self.__start = None
+        self.__last = None
+        self.__length = 0
+        self.__node_count = 0
+        self.__depth = 0
+
+    def __print(self):
+        elapsed = perf_counter() - self.__start
+        rate = self.__node_count / elapsed if elapsed > 0 else 0
+
+        # the build may end before the maximum node count is reached, so the
+        # estimation is an upper bound
+        if rate > 0:
+            eta = int((self.maximum_node_count - self.__node_count) / rate)
+            eta = f'{eta // 60}:{eta % 60:02}'
+        else:
+            eta = '-'
+
+        line = f'{self.__node_count}/{self.maximum_node_count} nodes | depth {self.__depth} | ' \
+               f'{rate:.1f} nodes/s | ETA {eta}'
+
+        # overwrite the whole previous line
+        print('\r' + line.ljust(self.__length), end='', file=self.file, flush=True)
+        self.__length = len(line)
+
+    def on_node_created(self, builder, node, depth):
+        now = perf_counter()
+        if self.__start is None:
+            self.__start = now
+            self.__last = now
+
+        self.__node_count = builder.node_count
+        self.__depth = depth
+
+        if now - self.__last >= self.interval:
+            self.__last = now
+            self.__print()
+
+    def finish(self):
+        """
+        print the final state and end the line
+        :return:
+        """
+        if self.__start is not None:
+            self.__print()
+            print(file=self.file)
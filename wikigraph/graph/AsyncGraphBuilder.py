@@ -0,0 +1,148 @@
+from asyncio import ensure_future, gather
+from time import perf_counter
+
+from aiohttp import ClientSession, TCPConnector
+
+from wikigraph.graph.GraphBuilder import GraphBuilder
+from wikigraph.wikipedia.Article import Article
+
+
+class AsyncGraphBuilder(GraphBuilder):
+    """
+    This class builds the same graph as GraphBuilder but downloads articles
+    using aiohttp so it can be awaited from within a running event loop.
+    Maximum node count, maximum depth, maximum references, exclude, hooks,
+    cancel and checkpoints work exactly like in GraphBuilder, which also
+    implements the breadth first search. Only downloads are different.
+    """
+
+    def __init__(self, maximum_node_count, maximum_depth, maximum_references=None, exclude=None,
+                 concurrency=100, connections_per_host=10, session=None, checkpoint=None, checkpoint_interval=100,
+                 metrics=None):
+        """
+        :param maximum_node_count: maximum node count in graph
+        :param maximum_depth: maximum depth in graph
+        :param maximum_references: maximum references extracted per article
+        :param exclude: either a list of article identifiers to skip or a
+                        callback function which accepts the article object as
+                        a parameter and returns True if it should be skipped
+        :param concurrency: maximum number of articles downloaded at once
+        :param connections_per_host: maximum number of simultaneous
+                                     connections to a single host
+        :param session: aiohttp.ClientSession to use instead of creating one
+                        per build (concurrency and connections_per_host only
+                        limit downloads but not connections in this case)
+        :param checkpoint: file to save the builder state to periodically
+                           (None to disable checkpoints)
+        :param checkpoint_interval: number of nodes created between two
+                                    checkpoints
+        :param metrics: Metrics object to report build time, created nodes
+                        and queue depth to (None to disable)
+        """
+        self.concurrency = concurrency
+        self.connections_per_host = connections_per_host
+        self.session = session
+
+        self.__pending = None
+        self.__session = None
+
+        super().__init__(maximum_node_count, maximum_depth, maximum_references, exclude,
+                         checkpoint=checkpoint, checkpoint_interval=checkpoint_interval, metrics=metrics)
+
+    def reset(self):
+        """
+        reset some properties which are modified when building a graph
+        :return:
+        """
+        super().reset()
+
+        self.__pending = {}
+
+    async def build_from(self, article: Article, resume=None):
+        """
+        create a graph recursively starting with the specified article
+
+        :param article: article to start with
+        :param resume: checkpoint file to continue an interrupted build from
+                       (the article is only used to create further articles
+                       with the same language, cache, fetcher and link source
+                       in this case)
+        :return:
+        """
+        if self.session is not None:
+            return await self.__build_with_session(self.session, article, resume)
+
+        connector = TCPConnector(limit=self.concurrency, limit_per_host=self.connections_per_host)
+        async with ClientSession(connector=connector) as session:
+            return await self.__build_with_session(session, article, resume)
+
+    async def __build_with_session(self, session, article: Article, resume):
+        self.__session = session
+
+        try:
+            return await self.__build_from(article, resume)
+        finally:
+            # drop speculative downloads which were not needed
+            for task in self.__pending.values():
+                task.cancel()
+            await gather(*self.__pending.values(), return_exceptions=True)
+
+            self.__pending = {}
+            self.__session = None
+
+    async def __build_from(self, article: Article, resume):
+        start = perf_counter()
+
+        # create the initial graph node or restore all nodes from checkpoint
+        graph = self._start(article, resume)
+        if graph is None:
+            graph = await self.__create(article, 0)
+
+        # same loop as in GraphBuilder
+        while self._running():
+            # start downloading the articles which are up next
+            self.__prefetch()
+
+            entry = self._next_entry()
+            if entry is None:
+                continue
+
+            origin_node, depth, node, artcl = entry
+            if node is None:
+                node = await self.__create(artcl, depth)
+
+            self._add_edge(origin_node, node)
+
+        return self._finish(graph, start)
+
+    def __prefetch(self):
+        # Same as in GraphBuilder but downloads are scheduled as tasks on the
+        # running event loop. Up to `concurrency` downloads are in flight.
+        limit = min(self.concurrency, self.maximum_node_count - self.node_count)
+
+        for identifier in self._inspect(self.__pending, limit - len(self.__pending)):
+            article = self._sibling(identifier)
+            self._emit('on_fetch_start', article)
+            self.__pending[identifier] = ensure_future(
+                article.linked_articles_async(self.__session, self.maximum_references)
+            )
+
+    async def __linked_articles(self, article: Article):
+        # use the scheduled task if the article is already being downloaded
+        task = self.__pending.pop(article.identifier, None)
+        if task is None:
+            self._emit('on_fetch_start', article)
+            task = article.linked_articles_async(self.__session, self.maximum_references)
+
+        articles = await task
+
+        self._emit('on_fetch_done', article, articles)
+        return articles
+
+    async def __create(self, article: Article, depth):
+        # create a node and queue its linked articles
+        node, expand = self._add_node(article, depth)
+        if expand:
+            self._add_links(node, depth, await self.__linked_articles(article))
+
+        return node
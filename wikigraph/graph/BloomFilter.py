@@ -0,0 +1,94 @@
+from math import ceil, log
+
+
+class BloomFilter:
+    """
+    Probabilistic set of strings using a fixed amount of memory. Strings which
+    have been added are always reported as contained, others are reported as
+    contained with a probability of error_rate as long as no more than
+    capacity strings have been added. Strings can not be removed.
+    Used alone as the visited set of GraphIterator, false positives drop
+    nodes from the iteration. DiskIndex only uses it to skip database reads,
+    so lookups stay exact.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        """
+        :param capacity: number of strings which can be added before the
+                         false positive rate exceeds error_rate
+        :param error_rate: probability to report a string which has not been
+                           added as contained
+        """
+        if capacity < 1 or not 0 < error_rate < 1:
+            raise ValueError('capacity must be positive and error rate between 0 and 1')
+
+        self.capacity = capacity
+        self.error_rate = error_rate
+
+        # optimal number of bits and hash functions for the given capacity
+        # and false positive rate
+        self.bit_count = ceil(-capacity * log(error_rate) / log(2) ** 2)
+        self.hash_count = max(1, round(self.bit_count / capacity * log(2)))
+
+        self.__bits = bytearray((self.bit_count + 7) // 8)
+        self.__count = 0
+
+    def __hashes(self, key):
+        # Derive all bit positions from both halves of the string's hash
+        # using double hashing: position i is (first + i * second) modulo
+        # the number of bits. The hash is cached by the string and differs
+        # between processes, which does not matter as the filter is never
+        # saved. The second half must be odd to reach all positions.
+        value = hash(key)
+        return value & 0xffffffff, (value >> 32) & 0xffffffff | 1
+
+    def __contains__(self, key):
+        bits, size = self.__bits, self.bit_count
+        position, step = self.__hashes(key)
+
+        # stop at the first bit which is not set
+        for _ in range(self.hash_count):
+            p = position % size
+            if not bits[p >> 3] >> (p & 7) & 1:
+                return False
+            position += step
+
+        return True
+
+    def __len__(self):
+        return self.__count
+
+    def add(self, key):
+        """
+        :param key: string to add
+        :return:
+        """
+        bits, size = self.__bits, self.bit_count
+        position, step = self.__hashes(key)
+        added = False
+
+        for _ in range(self.hash_count):
+            p = position % size
+            mask = 1 << (p & 7)
+            if not bits[p >> 3] & mask:
+                bits[p >> 3] |= mask
+                added = True
+            position += step
+
+        # strings which were already reported as contained are not counted
+        if added:
+            self.__count += 1
+
+    def clear(self):
+        """
+        remove all strings
+        :return:
+        """
+        self.__bits = bytearray(len(self.__bits))
+        self.__count = 0
+
+    def memory_usage(self):
+        """
+        :return: bytes used to store the set
+        """
+        return len(self.__bits)
@@ -0,0 +1,169 @@
+from array import array
+from sys import intern
+
+from wikigraph.graph.CompactNode import CompactNode
+from wikigraph.wikipedia.Article import Article
+
+
+class CompactGraph:
+    """
+    Stores a graph using integer node ids. Identifiers are interned and mapped
+    to ids in creation order, edges are kept in flat arrays. Article objects
+    are only created when a node is accessed through a CompactNode view, which
+    provides the same interface as Graph.
+    """
+
+    def __init__(self, template=None, index=None):
+        """
+        :param template: article whose language, cache, fetcher and link
+                         source are used to create articles of nodes
+        :param index: empty DiskIndex object to map identifiers to ids in
+                      (None to keep them in memory)
+        """
+        self.template = template
+
+        # increased whenever an edge is added
+        self.revision = 0
+
+        # Identifiers are looked up by id in a list or, if ids are mapped by
+        # an index, in the index itself.
+        self.identifiers = [] if index is None else None
+        self.ids = {} if index is None else index
+
+        # Edges are kept in compressed sparse row representation. Added edges
+        # are buffered per source node next to it and merged into the arrays
+        # once the buffer exceeds a fraction of the merged edges or all
+        # arrays are requested, so merging takes amortized constant time per
+        # edge and reading edges never requires a merge.
+        self.__indptr = array('I', [0])
+        self.__indices = array('I')
+        self.__buffer = {}
+        self.__buffered = 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def edge_count(self):
+        return len(self.__indices) + self.__buffered
+
+    def add_node(self, article):
+        """
+        :param article: article to add (only its identifier is stored)
+        :return: node id
+        """
+        node_id = len(self.ids)
+        identifier = intern(article.identifier)
+
+        if self.identifiers is not None:
+            self.identifiers.append(identifier)
+        self.ids[identifier] = node_id
+
+        return node_id
+
+    def add_edge(self, source, target):
+        """
+        :param source: node id the edge starts at
+        :param target: node id the edge ends at
+        :return:
+        """
+        targets = self.__buffer.get(source)
+        if targets is None:
+            targets = self.__buffer[source] = array('I')
+
+        targets.append(target)
+        self.__buffered += 1
+        self.revision += 1
+
+        if self.__buffered > max(1024, len(self.__indices) // 8):
+            self.__merge()
+
+    def __merge(self):
+        # Copy the rows of all nodes to new arrays and append the buffered
+        # targets of each row, which were added after all merged ones.
+        rows = len(self.__indptr) - 1
+        indptr = array('I', [0])
+        indices = array('I')
+
+        for node_id in range(len(self.ids)):
+            if node_id < rows:
+                indices.extend(self.__indices[self.__indptr[node_id]:self.__indptr[node_id + 1]])
+
+            targets = self.__buffer.get(node_id)
+            if targets is not None:
+                indices.extend(targets)
+
+            indptr.append(len(indices))
+
+        self.__indptr = indptr
+        self.__indices = indices
+        self.__buffer = {}
+        self.__buffered = 0
+
+    def node(self, node_id):
+        """
+        :param node_id: node id
+        :return: CompactNode view on the node
+        """
+        return CompactNode(self, node_id)
+
+    def identifier(self, node_id):
+        """
+        :param node_id: node id
+        :return: identifier of the node's article
+        """
+        if self.identifiers is None:
+            return self.ids.identifier(node_id)
+
+        return self.identifiers[node_id]
+
+    def article(self, node_id):
+        """
+        :param node_id: node id
+        :return: new Article object for the node
+        """
+        if self.template is None:
+            return Article(self.identifier(node_id))
+
+        return self.template.sibling(self.identifier(node_id))
+
+    def csr(self):
+        """
+        get edges in compressed sparse row format ordered by node id: the
+        targets of node i are stored in indices[indptr[i]:indptr[i + 1]] in
+        the order the edges were added
+
+        :return: tuple of arrays (indptr, indices)
+        """
+        # nodes without edges may have been added since the last merge
+        if self.__buffered or len(self.__indptr) <= len(self.ids):
+            self.__merge()
+
+        return self.__indptr, self.__indices
+
+    def neighbours(self, node_id):
+        """
+        :param node_id: node id
+        :return: array of target node ids
+        """
+        if node_id < len(self.__indptr) - 1:
+            targets = self.__indices[self.__indptr[node_id]:self.__indptr[node_id + 1]]
+        else:
+            targets = array('I')
+
+        buffered = self.__buffer.get(node_id)
+        if buffered is not None:
+            targets.extend(buffered)
+
+        return targets
+
+    def degree(self, node_id):
+        """
+        :param node_id: node id
+        :return: number of edges starting at the node
+        """
+        degree = len(self.__buffer.get(node_id, ()))
+        if node_id < len(self.__indptr) - 1:
+            degree += self.__indptr[node_id + 1] - self.__indptr[node_id]
+
+        return degree
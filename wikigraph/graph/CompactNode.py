@@ -0,0 +1,50 @@
+from wikigraph.graph.Subgraph import Subgraph
+
+
+class CompactNode(Subgraph):
+    """
+    view on a single node of a CompactGraph which behaves like a Graph object
+    """
+
+    __slots__ = ('graph', 'id')
+
+    def __init__(self, graph, node_id):
+        """
+        :param graph: CompactGraph the node belongs to
+        :param node_id: node id
+        """
+        self.graph = graph
+        self.id = node_id
+
+    def __eq__(self, other):
+        return isinstance(other, CompactNode) and self.graph is other.graph and self.id == other.id
+
+    def __hash__(self):
+        return hash((id(self.graph), self.id))
+
+    @property
+    def revision(self):
+        return self.graph.revision
+
+    @property
+    def article(self):
+        return self.graph.article(self.id)
+
+    @property
+    def identifier(self):
+        return self.graph.identifier(self.id)
+
+    @property
+    def edges(self):
+        return list(map(self.graph.node, self.graph.neighbours(self.id)))
+
+    @property
+    def degree(self):
+        return self.graph.degree(self.id)
+
+    def add_edge_to(self, other):
+        """
+        :param other: CompactNode of the same graph to add an edge to
+        :return:
+        """
+        self.graph.add_edge(self.id, other.id)
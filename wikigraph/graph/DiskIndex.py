@@ -0,0 +1,189 @@
+import os
+import sqlite3
+from sys import getsizeof
+from tempfile import mkstemp
+
+
+class DiskIndex:
+    """
+    Maps identifiers to consecutive integer ids like a dict, but keeps them in
+    a SQLite database instead of memory. It can replace the dict of a
+    CompactGraph (and with it the node cache of GraphBuilder) or the set of
+    visited nodes of GraphIterator to build and walk graphs with millions of
+    nodes.
+    New entries are written in batches. An optional BloomFilter answers most
+    lookups of identifiers which have never been added without reading the
+    database.
+    """
+
+    def __init__(self, file_path=None, bloom_filter=None, batch_size=10000):
+        """
+        :param file_path: new or empty database file, which is never used for
+                          anything else as writes are not journaled (None to
+                          use a temporary file removed by close)
+        :param bloom_filter: BloomFilter object with enough capacity for all
+                             identifiers (None to look up every identifier
+                             in the database)
+        :param batch_size: number of entries written in a single transaction
+        """
+        # Writes are neither journaled nor synced, so an existing database
+        # could be corrupted and is refused.
+        self.__temporary = file_path is None
+        if self.__temporary:
+            descriptor, file_path = mkstemp(suffix='.db', prefix='wikigraph-')
+            os.close(descriptor)
+        elif os.path.exists(file_path) and os.path.getsize(file_path) > 0:
+            raise ValueError(f'{file_path} is not empty, a new file is needed for the node index')
+
+        self.file_path = file_path
+        self.bloom_filter = bloom_filter
+        self.batch_size = batch_size
+
+        # Entries not written yet are kept in both directions. The index is
+        # rebuilt with every graph, so durability is not needed.
+        self.__pending = {}
+        self.__pending_identifiers = {}
+        self.__count = 0
+
+        self.__connection = sqlite3.connect(file_path)
+        self.__connection.execute('PRAGMA journal_mode=OFF')
+        self.__connection.execute('PRAGMA synchronous=OFF')
+        self.__connection.execute('''
+            CREATE TABLE ids (
+                id INTEGER PRIMARY KEY,
+                identifier TEXT NOT NULL UNIQUE
+            )
+        ''')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __flush(self):
+        if not self.__pending:
+            return
+
+        with self.__connection:
+            self.__connection.executemany('INSERT INTO ids (identifier, id) VALUES (?, ?)', self.__pending.items())
+
+        self.__pending = {}
+        self.__pending_identifiers = {}
+
+    def __lookup(self, identifier):
+        # id of an identifier or None if it has not been added
+        node_id = self.__pending.get(identifier)
+        if node_id is not None:
+            return node_id
+
+        if self.bloom_filter is not None and identifier not in self.bloom_filter:
+            return None
+
+        row = self.__connection.execute('SELECT id FROM ids WHERE identifier = ?', (identifier,)).fetchone()
+        return row[0] if row is not None else None
+
+    def __contains__(self, identifier):
+        return self.__lookup(identifier) is not None
+
+    def __getitem__(self, identifier):
+        node_id = self.__lookup(identifier)
+        if node_id is None:
+            raise KeyError(identifier)
+
+        return node_id
+
+    def __setitem__(self, identifier, node_id):
+        # ids are assigned once, like by CompactGraph
+        self.__pending[identifier] = node_id
+        self.__pending_identifiers[node_id] = identifier
+        self.__count += 1
+
+        if self.bloom_filter is not None:
+            self.bloom_filter.add(identifier)
+
+        if len(self.__pending) >= self.batch_size:
+            self.__flush()
+
+    def __len__(self):
+        return self.__count
+
+    def __iter__(self):
+        # identifiers ordered by id like the keys of a dict filled by
+        # CompactGraph
+        self.__flush()
+        for row in self.__connection.execute('SELECT identifier FROM ids ORDER BY id'):
+            yield row[0]
+
+    def get(self, identifier, default=None):
+        """
+        :param identifier: identifier to look up
+        :param default: value returned if the identifier has not been added
+        :return: id of the identifier
+        """
+        node_id = self.__lookup(identifier)
+        return node_id if node_id is not None else default
+
+    def add(self, identifier):
+        """
+        add an identifier using the next free id, so the index can be used
+        as a set
+
+        :param identifier: identifier to add
+        :return:
+        """
+        if identifier not in self:
+            self[identifier] = self.__count
+
+    def identifier(self, node_id):
+        """
+        :param node_id: id to look up
+        :return: identifier the id has been assigned to
+        """
+        identifier = self.__pending_identifiers.get(node_id)
+        if identifier is not None:
+            return identifier
+
+        row = self.__connection.execute('SELECT identifier FROM ids WHERE id = ?', (node_id,)).fetchone()
+        if row is None:
+            raise KeyError(node_id)
+
+        return row[0]
+
+    def clear(self):
+        """
+        remove all entries
+        :return:
+        """
+        self.__pending = {}
+        self.__pending_identifiers = {}
+        self.__count = 0
+
+        with self.__connection:
+            self.__connection.execute('DELETE FROM ids')
+
+        if self.bloom_filter is not None:
+            self.bloom_filter.clear()
+
+    def memory_usage(self):
+        """
+        :return: estimated bytes of memory used by entries not written yet and
+                 the bloom filter (SQLite's page cache is limited to 2 MB)
+        """
+        size = getsizeof(self.__pending) + getsizeof(self.__pending_identifiers)
+        size += sum(map(getsizeof, self.__pending))
+
+        if self.bloom_filter is not None:
+            size += self.bloom_filter.memory_usage()
+
+        return size
+
+    def close(self):
+        """
+        close the database and remove it if it is a temporary file
+        :return:
+        """
+        self.__connection.close()
+
+        if self.__temporary and os.path.exists(self.file_path):
+            os.remove(self.file_path)
@@ -0,0 +1,232 @@
+from array import array
+from collections import deque
+from heapq import nsmallest
+from time import perf_counter
+
+
+class GraphAnalytics:
+    """
+    Computes the bfs order of a graph once and derives degrees, density and
+    matrices from it. Results are cached until an edge is added to the graph.
+    """
+
+    def __init__(self, graph, metrics=None):
+        """
+        :param graph: Graph object to use as start node
+        :param metrics: Metrics object to report traversal times to (None to
+                        disable)
+        """
+        self.graph = graph
+        self.metrics = metrics
+
+        self.__revision = None
+        self.__order = None
+        self.__indices = None
+        self.__targets = None
+        self.__out_degrees = None
+        self.__in_degrees = None
+
+    def __update(self):
+        # nothing to do if no edge has been added since the last traversal
+        if self.__revision == self.graph.revision:
+            return
+
+        start = perf_counter()
+
+        # Traverse the graph in bfs order. Nodes are numbered when they are
+        # found first which results in the same order as GraphIterator.
+        order = []
+        indices = {self.graph: 0}
+        neighbours = []
+
+        bfs = deque([self.graph])
+        while bfs:
+            node = bfs.popleft()
+            edges = node.edges
+
+            order.append(node)
+            neighbours.append(edges)
+
+            for e in edges:
+                if e not in indices:
+                    indices[e] = len(indices)
+                    bfs.append(e)
+
+        # map edges to node indices and count degrees
+        targets = [[indices[e] for e in edges] for edges in neighbours]
+
+        out_degrees = array('L', map(len, targets))
+        in_degrees = array('L', [0]) * len(order)
+        for row in targets:
+            for col in row:
+                in_degrees[col] += 1
+
+        self.__order = order
+        self.__indices = indices
+        self.__targets = targets
+        self.__out_degrees = out_degrees
+        self.__in_degrees = in_degrees
+        self.__revision = self.graph.revision
+
+        if self.metrics is not None:
+            self.metrics.observe('analytics', perf_counter() - start)
+
+    @property
+    def order(self):
+        """
+        :return: list of nodes in bfs order
+        """
+        self.__update()
+        return self.__order
+
+    def index(self, node):
+        """
+        :param node: node contained in the graph
+        :return: position of the node in bfs order
+        """
+        self.__update()
+        return self.__indices[node]
+
+    def targets(self, i):
+        """
+        :param i: node position in bfs order
+        :return: list of positions the node has edges to
+        """
+        self.__update()
+        return self.__targets[i]
+
+    @property
+    def node_count(self):
+        self.__update()
+        return len(self.__order)
+
+    @property
+    def edge_count(self):
+        self.__update()
+        return sum(self.__out_degrees)
+
+    def degree(self, node):
+        """
+        :param node: node contained in the graph
+        :return: number of outgoing edges
+        """
+        # index updates the cached arrays before they are read
+        i = self.index(node)
+        return self.__out_degrees[i]
+
+    def in_degree(self, node):
+        """
+        :param node: node contained in the graph
+        :return: number of incoming edges
+        """
+        i = self.index(node)
+        return self.__in_degrees[i]
+
+    def minimum_degree_node(self, incoming=False):
+        """
+        Find the node with minimum degree in this graph. If there are multiple
+        nodes with the same minimum degree the first found in bfs order is
+        returned.
+
+        :param incoming: use incoming instead of outgoing edges
+        :return:
+        """
+        self.__update()
+        degrees = self.__in_degrees if incoming else self.__out_degrees
+
+        return self.__order[min(range(len(degrees)), key=degrees.__getitem__)]
+
+    def maximum_degree_node(self, incoming=False):
+        """
+        Find the node with maximum degree in this graph. If there are multiple
+        nodes with the same maximum degree the first found in bfs order is
+        returned.
+
+        :param incoming: use incoming instead of outgoing edges
+        :return:
+        """
+        self.__update()
+        degrees = self.__in_degrees if incoming else self.__out_degrees
+
+        return self.__order[max(range(len(degrees)), key=degrees.__getitem__)]
+
+    def top_degree_nodes(self, k, incoming=False):
+        """
+        get the k nodes with the highest degree, nodes with the same degree
+        are ordered as they appear in bfs search
+
+        :param k: number of nodes
+        :param incoming: use incoming instead of outgoing edges
+        :return: list of (node, degree) tuples
+        """
+        self.__update()
+        degrees = self.__in_degrees if incoming else self.__out_degrees
+
+        top = nsmallest(k, range(len(degrees)), key=lambda i: -degrees[i])
+        return [(self.__order[i], degrees[i]) for i in top]
+
+    def density(self):
+        """
+        calculate graph density
+        :return:
+        """
+        node_count = self.node_count
+
+        # calculate density for a directed graph
+        if node_count == 1:
+            return 0
+        else:
+            return self.edge_count / ((node_count - 1) * node_count)
+
+    def labels(self):
+        """
+        get a list of labels ordered as the nodes appear in bfs search
+
+        :return: list of labels
+        """
+        return list(map(lambda x: x.article.unescaped_identifier, self.order))
+
+    def adjacency(self):
+        """
+        get a two dimensional matrix containing the directed edges ordered as
+        the nodes appear in bfs search
+
+        :return: two dimensional adjacency matrix
+        """
+        self.__update()
+        size = len(self.__order)
+        result = [[0] * size for _ in range(size)]
+
+        for row in range(size):
+            for col in self.__targets[row]:
+                result[row][col] = 1
+
+        return result
+
+    def edge_list(self):
+        """
+        get the directed edges as (row, column) pairs of node indices ordered
+        as the nodes appear in bfs search (coordinate format)
+
+        :return: list of tuples
+        """
+        self.__update()
+        return [(row, col) for row in range(len(self.__targets)) for col in self.__targets[row]]
+
+    def csr(self):
+        """
+        get the directed edges in compressed sparse row format: the column
+        indices of row i are stored in indices[indptr[i]:indptr[i + 1]]
+
+        :return: tuple of arrays (indptr, indices)
+        """
+        self.__update()
+
+        indptr = array('L', [0])
+        indices = array('L')
+
+        for row in self.__targets:
+            indices.extend(row)
+            indptr.append(len(indices))
+
+        return indptr, indices
@@ -1,11 +1,23 @@
-from queue import Queue
+import gzip
+import json
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from os import replace
+from sys import getsizeof, intern
+from time import perf_counter
 
+from wikigraph.graph.CompactGraph import CompactGraph
 from wikigraph.graph.Graph import Graph
 from wikigraph.wikipedia.Article import Article
 
 
 class GraphBuilder:
-    def __init__(self, maximum_node_count, maximum_depth, maximum_references=None, exclude=None):
+    # events which can be handled by hooks, see add_hook
+    events = ('on_fetch_start', 'on_fetch_done', 'on_node_created', 'on_edge_added', 'on_level_complete')
+
+    def __init__(self, maximum_node_count, maximum_depth, maximum_references=None, exclude=None, workers=None,
+                 compact=False, index=None, checkpoint=None, checkpoint_interval=100, metrics=None):
         """
         :param maximum_node_count: maximum node count in graph
         :param maximum_depth: maximum depth in graph
@@ -13,16 +25,57 @@ class GraphBuilder:
         :param exclude: either a list of article identifiers to skip or a
                         callback function which accepts the article object as
                         a parameter and returns True if it should be skipped
+                        (called once per article)
+        :param workers: number of articles fetched concurrently (None or 1 to
+                        fetch one article at a time)
+        :param compact: store the graph in a CompactGraph using integer node
+                        ids and return a CompactNode instead of a Graph
+        :param index: DiskIndex object the CompactGraph maps identifiers to
+                      ids in instead of memory (requires compact, existing
+                      entries are removed)
+        :param checkpoint: file to save the builder state to periodically
+                           (None to disable checkpoints)
+        :param checkpoint_interval: number of nodes created between two
+                                    checkpoints
+        :param metrics: Metrics object to report build time, created nodes,
+                        queue depth and node cache memory to (None to
+                        disable)
         """
+        if index is not None and not compact:
+            raise ValueError('an index can only be used in compact mode')
+
         self.maximum_node_count = maximum_node_count
         self.maximum_depth = maximum_depth
         self.maximum_references = maximum_references
+        self.workers = workers
+        self.compact = compact
+        self.index = index
+        self.checkpoint = checkpoint
+        self.checkpoint_interval = checkpoint_interval
+        self.metrics = metrics
 
+        self.__graph = None
+        self.__counter = None
+        self.__template = None
         self.__node_cache = None
         self.__node_count = None
         self.__bfs_queue = None
+        self.__discovered = None
+        self.__exclusions = None
+        self.__truncated = False
+        self.__executor = None
+        self.__batch_size = None
+        self.__prefetched_queue = None
+        self.__pending = None
+        self.__batches = None
+        self.__checkpoint_count = None
+        self.__level = None
+        self.__cancelled = False
         self.reset()
 
+        # callbacks per event
+        self.__hooks = {event: [] for event in self.events}
+
         if callable(exclude):
             self.exclude = exclude
         elif isinstance(exclude, list):
@@ -35,9 +88,21 @@ class GraphBuilder:
         reset some properties which are modified when building a graph
         :return:
         """
+        self.__graph = None
+        self.__counter = None
+        self.__template = None
         self.__node_cache = {}
         self.__node_count = 0
-        self.__bfs_queue = Queue()
+        self.__bfs_queue = deque()
+        self.__discovered = set()
+        self.__exclusions = {}
+        self.__truncated = False
+        self.__prefetched_queue = deque()
+        self.__pending = {}
+        self.__batches = {}
+        self.__checkpoint_count = 0
+        self.__level = None
+        self.__cancelled = False
 
     def __enter__(self):
         self.reset()
@@ -45,65 +110,556 @@ class GraphBuilder:
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.reset()
 
-    def build_from(self, article: Article):
+    @property
+    def node_count(self):
+        """
+        :return: number of nodes created so far
+        """
+        return self.__node_count
+
+    def add_hook(self, hook):
+        """
+        Register an object which is notified about the build progress. Hooks
+        are duck typed and may implement any of the following methods, which
+        are all called on the thread running build_from:
+          - on_fetch_start(builder, article): links of the article are
+            requested (possibly ahead of time by a worker)
+          - on_fetch_done(builder, article, articles): linked articles have
+            been received and are added to the breadth first search list
+          - on_node_created(builder, node, depth)
+          - on_edge_added(builder, origin, node)
+          - on_level_complete(builder, depth): all articles with the given
+            distance from the start article have been processed
+
+        Any hook may call builder.cancel() to stop the build.
+
+        :param hook: object implementing some of the methods above
+        :return:
+        """
+        for event in self.events:
+            callback = getattr(hook, event, None)
+            if callback is not None:
+                self.__hooks[event].append(callback)
+
+    def cancel(self):
+        """
+        Stop building after the current step. build_from returns the graph
+        created so far and saves a checkpoint if checkpoints are enabled, so
+        the build can be resumed later.
+
+        :return:
+        """
+        self.__cancelled = True
+
+    def _emit(self, event, *args):
+        # call all callbacks registered for an event
+        for callback in self.__hooks[event]:
+            callback(self, *args)
+
+    def __excluded(self, identifier, article=None):
+        # The exclude callback is called once per article. Articles are only
+        # created for it if no article object is at hand. Other articles are
+        # queued as discovered or become nodes afterwards, so only results of
+        # excluded articles and the start article need to be kept.
+        excluded = self.__exclusions.get(identifier)
+        if excluded is None:
+            if article is None:
+                article = self.__template.sibling(identifier)
+
+            excluded = bool(self.exclude(article))
+            if excluded or identifier == self.__template.identifier:
+                self.__exclusions[identifier] = excluded
+
+        return excluded
+
+    def __view(self, node):
+        # hooks get CompactNode views instead of integer node ids
+        return self.__graph.node(node) if self.compact else node
+
+    def build_from(self, article: Article, resume=None):
         """
         create a graph recursively starting with the specified article
 
         :param article: article to start with
+        :param resume: checkpoint file to continue an interrupted build from
+                       (the article is only used to create further articles
+                       with the same language, cache, fetcher and link source
+                       in this case)
         :return:
         """
-        # create the initial graph node
-        graph = self.__create(article, 0)
+        # Link sources like ApiLinkSource handle multiple articles at once.
+        self.__batch_size = getattr(article.source, 'batch_size', 1)
+
+        # Articles are fetched in a thread pool if more than one worker is
+        # requested or multiple articles can be fetched at once. The breadth
+        # first search itself still runs on this thread, so the resulting
+        # graph does not depend on the order in which downloads finish.
+        workers = 1 if self.workers is None else self.workers
+
+        if workers > 1 or self.__batch_size > 1:
+            with ThreadPoolExecutor(workers) as executor:
+                self.__executor = executor
+                try:
+                    return self.__build_from(article, resume)
+                finally:
+                    # drop speculative downloads which were not needed
+                    for future in self.__batches:
+                        future.cancel()
+
+                    self.__pending = {}
+                    self.__batches = {}
+                    self.__executor = None
+        else:
+            return self.__build_from(article, resume)
+
+    def __build_from(self, article: Article, resume=None):
+        start = perf_counter()
+
+        # create the initial graph node or restore all nodes from checkpoint
+        graph = self._start(article, resume)
+        if graph is None:
+            graph = self.__create(article, 0)
 
-        # parse further articles until the breadth first search list is empty
-        # or the maximum node count is reached
-        while not self.__bfs_queue.empty() and self.__node_count < self.maximum_node_count:
-            # get next article from list
-            bfse = self.__bfs_queue.get()
-            origin_node, depth, article = bfse['origin'], bfse['depth'], bfse['article']
+        # parse further articles until the breadth first search list is empty,
+        # the maximum node count is reached or a hook cancels the build
+        while self._running():
+            # start downloading the articles which are up next
+            self.__prefetch()
 
-            # skip article if it is contained in exclude list
-            if self.exclude(article):
+            entry = self._next_entry()
+            if entry is None:
                 continue
 
-            # create node from it
-            node = self.__create(article, depth)
+            # create node from it if it does not exist yet
+            origin_node, depth, node, artcl = entry
+            if node is None:
+                node = self.__create(artcl, depth)
 
             # add edge from origin to the created node
-            origin_node.add_edge_to(node)
+            self._add_edge(origin_node, node)
 
-        # return the initial graph node so it can be used outside the
-        # GraphBuilder class
-        return graph
+        return self._finish(graph, start)
 
-    def __create(self, article: Article, depth):
+    # The following protected methods implement the breadth first search
+    # bookkeeping. AsyncGraphBuilder uses them as well and only replaces the
+    # steps which fetch linked articles.
+
+    def _start(self, article: Article, resume=None):
+        """
+        prepare a build
+
+        :param article: article to start with
+        :param resume: checkpoint file to restore the state from (None to
+                       start a new build)
+        :return: restored initial node or None if it still has to be created
+        """
+        self.__cancelled = False
+
+        # queued entries only contain identifiers, articles are created from
+        # this one when they are needed
+        self.__template = article
+
+        # In compact mode nodes are integer ids of a CompactGraph. Its map of
+        # identifiers to ids is used as node cache.
+        if self.compact:
+            if self.index is not None:
+                self.index.clear()
+
+            self.__graph = CompactGraph(article, self.index)
+            self.__node_cache = self.__graph.ids
+        else:
+            # all nodes share the revision counter of the graph
+            self.__counter = [0]
+
+        if resume is not None:
+            return self.__restore(article, resume)
+
+        self.__level = 0
+        return None
+
+    def _running(self):
+        """
+        :return: True until the breadth first search list is empty, the
+                 maximum node count is reached or the build is cancelled
+        """
+        return bool(self.__prefetched_queue or self.__bfs_queue) \
+            and self.__node_count < self.maximum_node_count and not self.__cancelled
+
+    def _sibling(self, identifier):
+        """
+        :param identifier: article identifier
+        :return: article with the same language, cache, fetcher and link
+                 source as the start article
+        """
+        return self.__template.sibling(identifier)
+
+    def _inspect(self, pending, limit):
+        """
+        Move entries from the breadth first search list to the list of
+        inspected entries and yield the identifiers of articles which will be
+        created when their entry is reached. Articles at maximum depth do not
+        need to be downloaded and articles which are already being downloaded
+        must not be requested a second time. Only discovered articles become
+        nodes, all others already exist or are excluded.
+
+        :param pending: identifiers of articles being downloaded (must be
+                        updated before the next identifier is requested)
+        :param limit: maximum number of identifiers
+        :return: generator of identifiers
+        """
+        count = 0
+
+        while self.__bfs_queue and count < limit:
+            bfse = self.__bfs_queue.popleft()
+            self.__prefetched_queue.append(bfse)
+
+            _, depth, identifier = bfse
+            if depth >= self.maximum_depth \
+                    or identifier in pending \
+                    or identifier not in self.__discovered:
+                continue
+
+            count += 1
+            yield identifier
+
+    def _next_entry(self):
+        """
+        take the next entry from the breadth first search list
+
+        :return: tuple of origin node, depth, existing node and article to
+                 create a node from if the node does not exist yet, None if
+                 the entry is skipped
+        """
+        # Entries inspected by the prefetch step always precede the remaining
+        # entries.
+        if self.__prefetched_queue:
+            bfse = self.__prefetched_queue.popleft()
+        else:
+            bfse = self.__bfs_queue.popleft()
+
+        origin_node, depth, identifier = bfse
+
+        # entries are ordered by depth, so the previous level is complete
+        # as soon as the first entry of the next one is reached
+        if self.__level is not None and depth > self.__level:
+            self._emit('on_level_complete', self.__level)
+        self.__level = depth
+
+        # Skip article if it is contained in exclude list. Discovered
+        # articles are not excluded and nodes are only created for
+        # articles which are not excluded, except for the start article.
+        if identifier in self.__discovered:
+            node = None
+        else:
+            node = self.__node_cache.get(identifier)
+            if (node is None or identifier == self.__template.identifier) and self.__excluded(identifier):
+                return None
+
+        if node is None:
+            return origin_node, depth, None, self.__template.sibling(identifier)
+
+        return origin_node, depth, node, None
+
+    def _add_node(self, article: Article, depth):
+        """
+        create a node unless it exists already
+
+        :param article: article to create a node from
+        :param depth: distance from the start article
+        :return: tuple of the node and whether its linked articles have to be
+                 added using _add_links
+        """
         # If article has been pushed to the node cache by another call
         # we do not need to execute the creation and parsing again.
         if article.identifier in self.__node_cache:
-            return self.__node_cache[article.identifier]
+            return self.__node_cache[article.identifier], False
 
         # create a new node and push it to node cache
-        node = Graph(article)
+        if self.compact:
+            node = self.__graph.add_node(article)
+        else:
+            node = Graph(article, self.__counter)
+            self.__node_cache[article.identifier] = node
 
-        self.__node_cache[article.identifier] = node
         self.__node_count += 1
+        self.__discovered.discard(article.identifier)
+
+        if self.metrics is not None:
+            self.metrics.count('nodes')
+            self.metrics.sample('queue_depth', len(self.__prefetched_queue) + len(self.__bfs_queue))
+
+        if self.__hooks['on_node_created']:
+            self._emit('on_node_created', self.__view(node), depth)
 
-        # extract linked articles
-        articles = article.linked_articles()
-        if self.maximum_references is not None:
-            articles = articles[:self.maximum_references]
+        # Linked articles are only used to create entries in the breadth first
+        # search list. This is not possible if the maximum depth limit is
+        # reached so we do not need to download the article at all.
+        return node, depth < self.maximum_depth
+
+    def _add_links(self, node, depth, articles):
+        """
+        append entries for linked articles to the breadth first search list
 
+        :param node: node the articles are linked from
+        :param depth: distance of the node from the start article
+        :param articles: linked articles (at most maximum_references)
+        :return:
+        """
         for artcl in articles:
+            # Every article queued but not created yet becomes a node when its
+            # first entry is reached. As soon as there are enough of them to
+            # reach the maximum node count, no entry appended from now on is
+            # ever reached, so the remaining links are dropped.
+            if self.__node_count + len(self.__discovered) >= self.maximum_node_count:
+                self.__truncated = True
+                break
+
+            identifier = intern(artcl.identifier)
+            if identifier not in self.__discovered and identifier not in self.__node_cache \
+                    and not self.__excluded(identifier, artcl):
+                self.__discovered.add(identifier)
+
             # Create an entry in the breadth first search list so it is
             # explored in a future step. The edge will be added after the
-            # entry is parsed itself in the build_from method.
-            # Also ensure the maximum depth limit is not exceeded.
-            if depth < self.maximum_depth:
-                self.__bfs_queue.put({
-                    'origin': node,
-                    'depth': depth + 1,
-                    'article': artcl
-                })
+            # entry is parsed itself in the build_from method. Entries only
+            # hold the identifier to save memory.
+            self.__bfs_queue.append((node, depth + 1, identifier))
+
+    def _add_edge(self, origin_node, node):
+        """
+        add an edge and save a checkpoint if the checkpoint interval is
+        reached
+
+        :param origin_node: node the edge starts at
+        :param node: node the edge points to
+        :return:
+        """
+        if self.compact:
+            self.__graph.add_edge(origin_node, node)
+        else:
+            origin_node.add_edge_to(node)
+
+        if self.__hooks['on_edge_added']:
+            self._emit('on_edge_added', self.__view(origin_node), self.__view(node))
+
+        # save state periodically so an interrupted build can be resumed
+        if self.checkpoint is not None \
+                and self.__node_count - self.__checkpoint_count >= self.checkpoint_interval:
+            self.save_checkpoint(self.checkpoint)
+
+    def _finish(self, graph, start):
+        """
+        complete a build
+
+        :param graph: initial node
+        :param start: time the build started at (perf_counter)
+        :return: initial node or its CompactNode view
+        """
+        # The last level is complete if all entries have been processed. If
+        # links have been dropped the build was stopped by the node limit.
+        if not self.__prefetched_queue and not self.__bfs_queue and not self.__cancelled \
+                and not self.__truncated and self.__level is not None:
+            self._emit('on_level_complete', self.__level)
+
+        # save state of a cancelled build so it can be resumed
+        if self.__cancelled and self.checkpoint is not None:
+            self.save_checkpoint(self.checkpoint)
+
+        if self.metrics is not None:
+            self.metrics.observe('build', perf_counter() - start)
+            self.metrics.record('node_cache_bytes', self.__node_cache_memory())
+
+        # return the initial graph node so it can be used outside the
+        # GraphBuilder class
+        if self.compact:
+            return self.__graph.node(graph)
+
+        return graph
+
+    def __node_cache_memory(self):
+        # estimated bytes used to find nodes by identifier
+        if self.index is not None:
+            return self.index.memory_usage()
+
+        size = getsizeof(self.__node_cache) + sum(map(getsizeof, self.__node_cache))
+        if self.compact:
+            size += getsizeof(self.__graph.identifiers)
+
+        return size
+
+    def __nodes(self):
+        # all nodes in creation order with their identifiers and edges
+        if self.compact:
+            for node_id, identifier in enumerate(self.__graph.ids):
+                yield node_id, identifier, self.__graph.neighbours(node_id)
+        else:
+            indices = {node: i for i, node in enumerate(self.__node_cache.values())}
+            for identifier, node in self.__node_cache.items():
+                yield node, identifier, map(lambda e: indices[e], node.edges)
+
+    def save_checkpoint(self, file_path):
+        """
+        Save created nodes, edges and the breadth first search list to a gzip
+        compressed json file. The file is replaced atomically.
+
+        :param file_path: checkpoint file
+        :return:
+        """
+        # Identifiers are saved once in a string table. Nodes use the first
+        # entries of the table in creation order.
+        strings = []
+        indices = {}
+        edge_counts = []
+        edge_targets = []
+
+        for node, identifier, targets in self.__nodes():
+            indices[node] = len(strings)
+            strings.append(identifier)
+
+            count = len(edge_targets)
+            edge_targets.extend(targets)
+            edge_counts.append(len(edge_targets) - count)
+
+        node_count = len(strings)
+        string_indices = {identifier: i for i, identifier in enumerate(strings)}
+
+        queue = []
+        for origin, depth, identifier in list(self.__prefetched_queue) + list(self.__bfs_queue):
+            if identifier not in string_indices:
+                string_indices[identifier] = len(strings)
+                strings.append(identifier)
+
+            queue.append([indices[origin], depth, string_indices[identifier]])
+
+        state = {
+            'version': 1,
+            'maximum_depth': self.maximum_depth,
+            'maximum_references': self.maximum_references,
+            'maximum_node_count': self.maximum_node_count,
+            'truncated': self.__truncated,
+            'node_count': node_count,
+            'strings': strings,
+            'edge_counts': edge_counts,
+            'edge_targets': edge_targets,
+            'queue': queue
+        }
+
+        temporary_path = file_path + '.tmp'
+        with gzip.open(temporary_path, 'wt', encoding='utf-8') as file:
+            json.dump(state, file, separators=(',', ':'))
+        replace(temporary_path, file_path)
+
+        self.__checkpoint_count = self.__node_count
+        logging.info(f'checkpoint: {node_count} nodes, {len(queue)} queued articles')
+
+    def __restore(self, article: Article, file_path):
+        with gzip.open(file_path, 'rt', encoding='utf-8') as file:
+            state = json.load(file)
+
+        # a different depth or reference limit would change the queued entries
+        if state['maximum_depth'] != self.maximum_depth \
+                or state['maximum_references'] != self.maximum_references:
+            raise ValueError('checkpoint was created with different depth or reference limits')
+
+        # links which could not be reached with the node limit were dropped
+        if state.get('truncated') and self.maximum_node_count > state['maximum_node_count']:
+            raise ValueError('checkpoint was created with a smaller node limit')
+
+        self.__truncated = state.get('truncated', False)
+
+        strings = state['strings']
+
+        # recreate nodes in creation order
+        nodes = []
+        for identifier in strings[:state['node_count']]:
+            if self.compact:
+                nodes.append(self.__graph.add_node(article.sibling(identifier)))
+            else:
+                node = Graph(article.sibling(identifier), self.__counter)
+                self.__node_cache[identifier] = node
+                nodes.append(node)
+
+        self.__node_count = len(nodes)
+        self.__checkpoint_count = len(nodes)
+
+        # recreate edges keeping their order
+        position = 0
+        for origin, count in zip(nodes, state['edge_counts']):
+            for target in state['edge_targets'][position:position + count]:
+                if self.compact:
+                    self.__graph.add_edge(origin, nodes[target])
+                else:
+                    origin.add_edge_to(nodes[target])
+            position += count
+
+        # recreate breadth first search list and the articles queued but not
+        # created yet
+        for origin, depth, index in state['queue']:
+            identifier = intern(strings[index])
+            self.__bfs_queue.append((nodes[origin], depth, identifier))
+
+            if identifier not in self.__discovered and identifier not in self.__node_cache \
+                    and not self.__excluded(identifier):
+                self.__discovered.add(identifier)
+
+        return nodes[0]
+
+    def __prefetch(self):
+        # Submit downloads for articles which will be created when their
+        # entry is reached. Articles are submitted in batches of the link
+        # source's batch size. At most `workers` batches are in flight and no
+        # more articles are requested than nodes are still missing to reach
+        # the maximum node count.
+        if self.__executor is None:
+            return
+
+        workers = 1 if self.workers is None else self.workers
+
+        while self.__bfs_queue and len(self.__batches) < workers:
+            remaining = self.maximum_node_count - self.__node_count - len(self.__pending)
+            batch = []
+
+            for identifier in self._inspect(self.__pending, min(self.__batch_size, remaining)):
+                self.__pending[identifier] = None
+                batch.append(self.__template.sibling(identifier))
+
+            if not batch:
+                return
+
+            for artcl in batch:
+                self._emit('on_fetch_start', artcl)
+
+            future = self.__executor.submit(Article.linked_articles_of, batch, self.maximum_references)
+            self.__batches[future] = len(batch)
+
+            for index, artcl in enumerate(batch):
+                self.__pending[artcl.identifier] = (future, index)
+
+    def __linked_articles(self, article: Article):
+        # use the prefetched result if the article has already been submitted
+        # to the thread pool
+        pending = self.__pending.pop(article.identifier, None)
+        if pending is None:
+            self._emit('on_fetch_start', article)
+            articles = article.linked_articles(self.maximum_references)
+        else:
+            future, index = pending
+
+            # forget the batch as soon as all its articles are consumed
+            self.__batches[future] -= 1
+            if self.__batches[future] == 0:
+                del self.__batches[future]
+
+            articles = future.result()[index]
+
+        self._emit('on_fetch_done', article, articles)
+        return articles
+
+    def __create(self, article: Article, depth):
+        # create a node and queue its linked articles
+        node, expand = self._add_node(article, depth)
+        if expand:
+            self._add_links(node, depth, self.__linked_articles(article))
 
         # return node so it can be used outside this method
         # this is needed to add more edges or use the initial node outside of
@@ -0,0 +1,209 @@
+from time import perf_counter
+
+import numpy as np
+
+from wikigraph.graph.GraphAnalytics import GraphAnalytics
+
+
+class GraphCentrality:
+    """
+    Converts a graph into sparse numpy arrays once and computes centrality
+    scores like PageRank and HITS using vectorized operations only. Nodes are
+    numbered in bfs order like by GraphAnalytics. Results are cached until an
+    edge is added to the graph.
+    """
+
+    def __init__(self, graph, analytics=None, damping=0.85, tolerance=1e-8, maximum_iterations=200, metrics=None):
+        """
+        :param graph: Graph object to use as start node
+        :param analytics: GraphAnalytics object of the same graph to share
+                          the bfs traversal with (None to create one)
+        :param damping: probability to follow a link in PageRank
+        :param tolerance: iterations stop as soon as the sum of all score
+                          changes is smaller than this value
+        :param maximum_iterations: maximum number of iterations
+        :param metrics: Metrics object to report computation times to (None
+                        to disable)
+        """
+        self.graph = graph
+        self.analytics = analytics if analytics is not None else GraphAnalytics(graph, metrics=metrics)
+        self.damping = damping
+        self.tolerance = tolerance
+        self.maximum_iterations = maximum_iterations
+        self.metrics = metrics
+
+        self.__revision = None
+        self.__sources = None
+        self.__targets = None
+        self.__out_degrees = None
+        self.__results = None
+
+    def __update(self):
+        # nothing to do if no edge has been added since the last conversion
+        if self.__revision == self.graph.revision:
+            return
+
+        indptr, indices = self.analytics.csr()
+        start = perf_counter()
+
+        # Convert the arrays as a whole instead of element by element. Every
+        # edge is stored as a (source, target) pair of node indices.
+        indptr = np.frombuffer(indptr, dtype=np.dtype(indptr.typecode)).astype(np.intp)
+        targets = np.frombuffer(indices, dtype=np.dtype(indices.typecode)).astype(np.intp)
+        out_degrees = np.diff(indptr)
+
+        self.__sources = np.repeat(np.arange(len(out_degrees)), out_degrees)
+        self.__targets = targets
+        self.__out_degrees = out_degrees
+        self.__results = {}
+        self.__revision = self.graph.revision
+
+        self.__observe(start)
+
+    def __observe(self, start):
+        if self.metrics is not None:
+            self.metrics.observe('centrality', perf_counter() - start)
+
+    def __cached(self, name, function):
+        # compute a result once per revision
+        self.__update()
+
+        if name not in self.__results:
+            start = perf_counter()
+            self.__results[name] = function()
+            self.__observe(start)
+
+        return self.__results[name]
+
+    @property
+    def node_count(self):
+        self.__update()
+        return len(self.__out_degrees)
+
+    def out_degrees(self):
+        """
+        :return: array of outgoing edges per node
+        """
+        return self.__cached('out_degrees', lambda: self.__out_degrees.copy())
+
+    def in_degrees(self):
+        """
+        :return: array of incoming edges per node
+        """
+        return self.__cached('in_degrees', lambda: np.bincount(self.__targets, minlength=self.node_count))
+
+    def __pagerank(self):
+        n = self.node_count
+        out_degrees = self.__out_degrees
+        dangling = out_degrees == 0
+
+        # every node passes its score to all linked nodes in equal parts
+        weights = np.zeros(n)
+        np.divide(1, out_degrees, out=weights, where=~dangling)
+
+        scores = np.full(n, 1 / n)
+        for _ in range(self.maximum_iterations):
+            # Nodes without edges pass their score to all nodes, so the sum of
+            # all scores remains 1.
+            passed = np.bincount(self.__targets, weights=(scores * weights)[self.__sources], minlength=n)
+            following = (1 - self.damping) / n + self.damping * (passed + scores[dangling].sum() / n)
+
+            change = np.abs(following - scores).sum()
+            scores = following
+            if change < self.tolerance:
+                break
+
+        return scores
+
+    def pagerank(self):
+        """
+        calculate PageRank scores by power iteration
+
+        :return: array of scores per node summing up to 1
+        """
+        return self.__cached('pagerank', self.__pagerank)
+
+    def __hits(self):
+        n = self.node_count
+
+        hubs = np.full(n, 1 / n)
+        authorities = hubs
+        for _ in range(self.maximum_iterations):
+            # Authorities are linked by good hubs and hubs link to good
+            # authorities. Both are normalized to a sum of 1.
+            authorities = np.bincount(self.__targets, weights=hubs[self.__sources], minlength=n)
+            authorities = authorities / (authorities.sum() or 1)
+
+            following = np.bincount(self.__sources, weights=authorities[self.__targets], minlength=n)
+            following = following / (following.sum() or 1)
+
+            change = np.abs(following - hubs).sum()
+            hubs = following
+            if change < self.tolerance:
+                break
+
+        return hubs, authorities
+
+    def hits(self):
+        """
+        calculate hub and authority scores by power iteration
+
+        :return: tuple of arrays (hubs, authorities) summing up to 1 each
+        """
+        return self.__cached('hits', self.__hits)
+
+    def __components(self):
+        n = self.node_count
+        sources, targets = self.__sources, self.__targets
+
+        # Every node points to a node with a smaller or the same index, so the
+        # pointers form trees. The roots of both ends of an edge are linked
+        # to the smaller one and all pointers are shortened to the roots until
+        # both ends of all edges share the same root.
+        roots = np.arange(n)
+        while True:
+            smaller = np.minimum(roots[sources], roots[targets])
+            linked = roots.copy()
+            np.minimum.at(linked, roots[sources], smaller)
+            np.minimum.at(linked, roots[targets], smaller)
+
+            while True:
+                shortened = linked[linked]
+                if np.array_equal(shortened, linked):
+                    break
+                linked = shortened
+
+            if np.array_equal(linked, roots):
+                break
+            roots = linked
+
+        # number components by descending size, equal sizes by their first
+        # node in bfs order
+        unique, first, inverse, sizes = np.unique(roots, return_index=True, return_inverse=True, return_counts=True)
+        ranks = np.empty(len(unique), dtype=np.intp)
+        ranks[np.lexsort((first, -sizes))] = np.arange(len(unique))
+
+        return ranks[inverse], np.sort(sizes)[::-1]
+
+    def components(self):
+        """
+        find weakly connected components, edges are used in both directions
+
+        :return: tuple of an array containing a component number per node and
+                 an array of component sizes (component 0 is the largest)
+        """
+        return self.__cached('components', self.__components)
+
+    def top(self, scores, k):
+        """
+        get the k nodes with the highest scores, nodes with the same score
+        are ordered as they appear in bfs search
+
+        :param scores: array of scores per node
+        :param k: number of nodes
+        :return: list of (node, score) tuples
+        """
+        order = self.analytics.order
+        top = np.argsort(-np.asarray(scores), kind='stable')[:k]
+
+        return [(order[i], scores[i].item()) for i in top]
@@ -1,4 +1,12 @@
-from igraph import Graph, plot
+import json
+import logging
+from hashlib import sha256
+from os import makedirs, path, replace
+from time import perf_counter
+
+from igraph import Graph, Layout, plot
+
+from wikigraph.graph.GraphAnalytics import GraphAnalytics
 
 
 class GraphDrawer:
@@ -7,16 +15,50 @@ class GraphDrawer:
     can be loaded without further dependencies need to be installed.
     """
 
-    def __init__(self, graph, highlight=None):
+    # Graphs with more nodes than this are drawn using the large graph layout
+    # if no layout is chosen explicitly. Force-directed layouts take too long
+    # for such graphs.
+    large_graph_threshold = 1000
+
+    # name and default value of the iterations parameter per layout
+    layout_iterations = {
+        'fr': ('niter', 2000),
+        'large_graph': ('maxiter', 150)
+    }
+
+    def __init__(self, graph, highlight=None, analytics=None, layout='auto', iterations=None, layout_cache=None,
+                 metrics=None):
         """
         :param graph: Graph object to use as start node
         :param highlight: a node containing one of this keywords is highlighted
+        :param analytics: GraphAnalytics object of the graph to reuse its bfs
+                          order (created if not given)
+        :param layout: igraph layout name ('fr', 'large_graph', 'drl', etc) or
+                       'auto' to choose by graph size
+        :param iterations: number of layout iterations (None for the default
+                           of the layout, only used by 'fr' and 'large_graph')
+        :param layout_cache: directory to store computed layouts in so
+                             unchanged graphs are not laid out again (None to
+                             keep them in memory only)
+        :param metrics: Metrics object to report layout and render times to
+                        (None to disable)
         """
         self.graph = graph
         self.highlight = [] if highlight is None else highlight
+        self.analytics = GraphAnalytics(graph) if analytics is None else analytics
+        self.layout = layout
+        self.iterations = iterations
+        self.layout_cache = layout_cache
+        self.metrics = metrics
 
-        self.min_degree = graph.minimum_degree_node().degree
-        self.max_degree = graph.maximum_degree_node().degree
+        # igraph graph and layout are created once and shared by all files
+        # saved until the graph changes
+        self.__revision = None
+        self.__g = None
+        self.__coordinates = None
+
+        self.min_degree = self.analytics.degree(self.analytics.minimum_degree_node())
+        self.max_degree = self.analytics.degree(self.analytics.maximum_degree_node())
 
     def __vertex_label_colors(self, x):
         # set start node to blue
@@ -47,7 +89,79 @@ class GraphDrawer:
         '''
 
         # set node size depending on degree
-        return 10 + 10 * (x.degree - self.min_degree) / (self.max_degree - self.min_degree)
+        return 10 + 10 * (self.analytics.degree(x) - self.min_degree) / (self.max_degree - self.min_degree)
+
+    def __layout_options(self, g):
+        # choose layout and its iterations parameter
+        layout = self.layout
+        if layout == 'auto':
+            layout = 'fr' if g.vcount() <= self.large_graph_threshold else 'large_graph'
+
+        if layout not in self.layout_iterations:
+            return layout, {}
+
+        name, default = self.layout_iterations[layout]
+        return layout, {name: default if self.iterations is None else self.iterations}
+
+    def __layout_file(self, layout, options):
+        # Layouts are stored by a hash of node count, edges and layout
+        # options. Labels do not influence the layout.
+        indptr, indices = self.analytics.csr()
+
+        digest = sha256()
+        digest.update(json.dumps([layout, options]).encode('utf-8'))
+        for values in (indptr, indices):
+            digest.update(' '.join(map(str, values)).encode('utf-8') + b';')
+
+        return path.join(self.layout_cache, digest.hexdigest() + '.json')
+
+    def __compute_layout(self, g):
+        layout, options = self.__layout_options(g)
+
+        if self.layout_cache is None:
+            return g.layout(layout, **options).coords
+
+        # load previously computed layout
+        file_path = self.__layout_file(layout, options)
+        if path.exists(file_path):
+            logging.info(f'layout loaded from {file_path}')
+            with open(file_path, 'r') as file:
+                return json.load(file)
+
+        coordinates = g.layout(layout, **options).coords
+
+        # write to temporary file first so no incomplete layout is left
+        makedirs(self.layout_cache, exist_ok=True)
+        with open(file_path + '.tmp', 'w') as file:
+            json.dump(coordinates, file)
+        replace(file_path + '.tmp', file_path)
+
+        return coordinates
+
+    def __update(self):
+        # nothing to do if no edge has been added since the last file
+        if self.__revision == self.graph.revision:
+            return
+
+        # Create graph from node indices at once. Adding vertices and edges
+        # one by one rebuilds igraph's indices after every call.
+        self.__g = Graph(n=self.analytics.node_count, edges=self.analytics.edge_list(), directed=True)
+
+        start = perf_counter()
+        self.__coordinates = self.__compute_layout(self.__g)
+        if self.metrics is not None:
+            self.metrics.observe('layout', perf_counter() - start)
+
+        self.__revision = self.graph.revision
+
+    def coordinates(self):
+        """
+        lay out the graph unless it has not changed since the last call
+
+        :return: list of node coordinates in the order of the analytics object
+        """
+        self.__update()
+        return self.__coordinates
 
     def save_to(self, file_path, size=(8196, 4096)):
         """
@@ -58,35 +172,29 @@ class GraphDrawer:
         :param size: image size
         :return:
         """
-        # create graph
-        g = Graph(directed=True)
+        # create properties
+        nodes = self.analytics.order
+        vertex_labels = self.analytics.labels()
+        vertex_label_colors = list(map(self.__vertex_label_colors, nodes))
+        vertex_label_sizes = list(map(self.__vertex_label_sizes, nodes))
 
-        for node in self.graph:
-            g.add_vertex(node.article.unescaped_identifier)
+        # create graph and layout only once for all formats
+        coordinates = self.coordinates()
 
-        for source in self.graph:
-            for target in source.edges:
-                g.add_edge(source.article.unescaped_identifier, target.article.unescaped_identifier)
-
-        # create properties
-        vertex_labels = list(map(lambda x: x.article.unescaped_identifier, self.graph))
-        vertex_label_colors = list(map(self.__vertex_label_colors, self.graph))
-        vertex_label_sizes = list(map(self.__vertex_label_sizes, self.graph))
+        start = perf_counter()
 
         # plot graph to file
         # format is implicitly given by file extension and automatically
         # determined by igraph
-        plot(g, file_path,
+        plot(self.__g, file_path,
              # set image resolution
              bbox=(0, 0, size[0], size[1]),
              # set image margin to allow long labels to be displayed correctly
              margin=128,
              # allow curved edges to reduce intersections
              autocurve=True,
-             # choose graph layout
-             # layout='large_graph',
-             layout='fr',
-             niter=2000,
+             # use the computed layout
+             layout=Layout(coordinates),
              # set vertex options
              vertex_size=5,
              vertex_color='#ff9999',
@@ -99,3 +207,7 @@ class GraphDrawer:
              vertex_label=vertex_labels,
              vertex_label_color=vertex_label_colors,
              vertex_label_size=vertex_label_sizes)
+
+        if self.metrics is not None:
+            self.metrics.observe('render', perf_counter() - start)
+
@@ -0,0 +1,192 @@
+import csv
+import json
+from collections import deque
+from contextlib import contextmanager
+from time import perf_counter
+from xml.sax.saxutils import escape, quoteattr
+
+
+class GraphExporter:
+    """
+    Writes a graph to data files. Every format is written node by node and
+    edge by edge while walking the graph in bfs order, so no document is held
+    in memory and no further dependencies need to be installed. Nodes are
+    numbered by their position in bfs order. Only the positions of nodes
+    (and labels for edge lists) are kept while walking, so memory is O(V)
+    and no edges are copied. GraphML and GEXF files list all nodes before
+    the edges and walk the graph twice.
+    """
+
+    def __init__(self, graph, metrics=None):
+        """
+        :param graph: Graph object to use as start node
+        :param metrics: Metrics object to report export times to (None to
+                        disable)
+        """
+        self.graph = graph
+        self.metrics = metrics
+
+    @contextmanager
+    def __open(self, file_path, newline=None):
+        # open file for writing and report the time until it is closed
+        start = perf_counter()
+
+        with open(file_path, 'w', encoding='utf-8', newline=newline) as file:
+            yield file
+
+        if self.metrics is not None:
+            self.metrics.observe('export', perf_counter() - start)
+
+    def __walk(self):
+        # Yield every node in bfs order with a list of (position, node) tuples
+        # of the nodes it has edges to. Nodes are numbered when they are found
+        # first like in GraphAnalytics, which results in their bfs position.
+        indices = {self.graph: 0}
+        bfs = deque([self.graph])
+
+        while bfs:
+            node = bfs.popleft()
+            targets = []
+
+            for e in node.edges:
+                i = indices.get(e)
+                if i is None:
+                    i = indices[e] = len(indices)
+                    bfs.append(e)
+
+                targets.append((i, e))
+
+            yield node, targets
+
+    def __nodes(self):
+        # yield position, label and url of every node in bfs order
+        for i, (node, _) in enumerate(self.__walk()):
+            article = node.article
+            yield i, article.unescaped_identifier, str(article)
+
+    def __edges(self):
+        # yield source and target position of every edge in bfs order
+        for source, (_, targets) in enumerate(self.__walk()):
+            for target, _ in targets:
+                yield source, target
+
+    def save_edge_list(self, file_path):
+        """
+        Save edges as comma separated values with one edge per line. Labels
+        of both nodes are added to make the file usable on its own.
+
+        :param file_path: file path
+        :return:
+        """
+        # Labels are collected by position as nodes are found, targets may
+        # be written before they are reached themselves.
+        labels = [self.graph.article.unescaped_identifier]
+
+        with self.__open(file_path, newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(('source', 'target', 'source_label', 'target_label'))
+
+            for source, (_, targets) in enumerate(self.__walk()):
+                for target, node in targets:
+                    if target == len(labels):
+                        labels.append(node.article.unescaped_identifier)
+
+                    writer.writerow((source, target, labels[source], labels[target]))
+
+    def save_jsonl(self, file_path):
+        """
+        Save nodes as JSON Lines with one object per node containing its
+        position, label, url and the positions it has edges to.
+
+        :param file_path: file path
+        :return:
+        """
+        with self.__open(file_path) as file:
+            for i, (node, targets) in enumerate(self.__walk()):
+                article = node.article
+                file.write(json.dumps({
+                    'id': i,
+                    'label': article.unescaped_identifier,
+                    'url': str(article),
+                    'edges': [target for target, _ in targets]
+                }, ensure_ascii=False))
+                file.write('\n')
+
+    def save_graphml(self, file_path):
+        """
+        Save graph in GraphML format with label and url as node attributes.
+
+        :param file_path: file path
+        :return:
+        """
+        with self.__open(file_path) as file:
+            file.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                       '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+                       '  <key id="label" for="node" attr.name="label" attr.type="string"/>\n'
+                       '  <key id="url" for="node" attr.name="url" attr.type="string"/>\n'
+                       '  <graph id="G" edgedefault="directed">\n')
+
+            for i, label, url in self.__nodes():
+                file.write(f'    <node id="n{i}">'
+                           f'<data key="label">{escape(label)}</data>'
+                           f'<data key="url">{escape(url)}</data>'
+                           f'</node>\n')
+
+            for source, target in self.__edges():
+                file.write(f'    <edge source="n{source}" target="n{target}"/>\n')
+
+            file.write('  </graph>\n'
+                       '</graphml>\n')
+
+    def save_gexf(self, file_path):
+        """
+        Save graph in GEXF 1.2 format with url as node attribute.
+
+        :param file_path: file path
+        :return:
+        """
+        with self.__open(file_path) as file:
+            file.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                       '<gexf xmlns="http://www.gexf.net/1.2draft" version="1.2">\n'
+                       '  <graph mode="static" defaultedgetype="directed">\n'
+                       '    <attributes class="node">\n'
+                       '      <attribute id="url" title="url" type="string"/>\n'
+                       '    </attributes>\n'
+                       '    <nodes>\n')
+
+            for i, label, url in self.__nodes():
+                file.write(f'      <node id="{i}" label={quoteattr(label)}>'
+                           f'<attvalues><attvalue for="url" value={quoteattr(url)}/></attvalues>'
+                           f'</node>\n')
+
+            file.write('    </nodes>\n'
+                       '    <edges>\n')
+
+            # edges need unique ids in GEXF
+            for edge_id, (source, target) in enumerate(self.__edges()):
+                file.write(f'      <edge id="{edge_id}" source="{source}" target="{target}"/>\n')
+
+            file.write('    </edges>\n'
+                       '  </graph>\n'
+                       '</gexf>\n')
+
+    def save_to(self, file_path):
+        """
+        Save graph to the specified file. Format is implicitly given by file
+        extension (csv, jsonl, graphml or gexf).
+
+        :param file_path: file path
+        :return:
+        """
+        extension = file_path.rsplit('.', 1)[-1].lower()
+
+        if extension == 'csv':
+            self.save_edge_list(file_path)
+        elif extension == 'jsonl':
+            self.save_jsonl(file_path)
+        elif extension == 'graphml':
+            self.save_graphml(file_path)
+        elif extension == 'gexf':
+            self.save_gexf(file_path)
+        else:
+            raise ValueError(f'unknown export format: {extension}')
@@ -1,23 +1,41 @@
-from queue import Queue
+from collections import deque
 
 
 class GraphIterator:
-    def __init__(self, start):
+    def __init__(self, start, visited=None):
+        """
+        :param start: node to start at
+        :param visited: empty set-like object providing add and in to store
+                        the identifiers of visited nodes in, like a DiskIndex
+                        or a BloomFilter (None to keep visited nodes in a
+                        set). A BloomFilter is not exact: a false positive
+                        makes an unvisited node look visited, so it and all
+                        nodes only reachable through it are not returned.
+        """
         # create queue with start element in it
-        self.__bfs = Queue()
-        self.__bfs.put(start)
+        self.__bfs = deque([start])
 
         # create set for visited objects
-        self.__visited = set()
+        self.__visited = set() if visited is None else visited
+
+        # nodes are stored themselves unless the set only accepts their
+        # identifiers
+        self.__identifiers = visited is not None
+
+    def __iter__(self):
+        return self
 
     def __next__(self):
+        if self.__identifiers:
+            return self.__next_identified()
+
         while True:
             # stop if there are no elements left in queue
-            if self.__bfs.empty():
+            if not self.__bfs:
                 raise StopIteration
 
             # get next element from queue
-            next_node = self.__bfs.get()
+            next_node = self.__bfs.popleft()
 
             # break while loop if the node is not already visited
             if next_node not in self.__visited:
@@ -29,7 +47,25 @@ class GraphIterator:
         # add all not visited neighbours to bfs queue
         for e in next_node.edges:
             if e not in self.__visited:
-                self.__bfs.put(e)
+                self.__bfs.append(e)
 
         # return current graph node
         return next_node
+
+    def __next_identified(self):
+        # same as above using identifiers of nodes as keys
+        while True:
+            if not self.__bfs:
+                raise StopIteration
+
+            next_node = self.__bfs.popleft()
+            if next_node.identifier not in self.__visited:
+                break
+
+        self.__visited.add(next_node.identifier)
+
+        for e in next_node.edges:
+            if e.identifier not in self.__visited:
+                self.__bfs.append(e)
+
+        return next_node
@@ -0,0 +1,204 @@
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from wikigraph.wikipedia.ApiLinkSource import ApiLinkSource
+from wikigraph.wikipedia.Article import Article
+
+
+class PathFinder:
+    """
+    Finds a shortest chain of links from one article to another. Linked
+    articles are expanded starting at the source and linking articles
+    (backlinks) starting at the target until both searches meet. The smaller
+    frontier is always grown by a whole level, so far fewer articles are
+    fetched than by a breadth-first search from the source.
+    """
+
+    def __init__(self, maximum_length=10, maximum_expanded=None, maximum_references=None, exclude=None,
+                 workers=None, backlinks=None, metrics=None):
+        """
+        :param maximum_length: maximum number of links in a path
+        :param maximum_expanded: maximum number of articles whose links or
+                                 backlinks are requested (None for no limit),
+                                 the search gives up when the next level
+                                 does not fit into it
+        :param maximum_references: maximum references extracted per article
+        :param exclude: either a list of article identifiers to avoid or a
+                        callback function which accepts the article object as
+                        a parameter and returns True if it should be avoided
+        :param workers: number of articles fetched concurrently when links
+                        are extracted from HTML (None or 1 to fetch one
+                        article at a time)
+        :param backlinks: link source providing linking(articles, maximum)
+                          (None to use an ApiLinkSource with the target's
+                          fetcher)
+        :param metrics: Metrics object to report search time and expanded
+                        articles to (None to disable)
+        """
+        self.maximum_length = maximum_length
+        self.maximum_expanded = maximum_expanded
+        self.maximum_references = maximum_references
+        self.workers = workers
+        self.backlinks = backlinks
+        self.metrics = metrics
+
+        self.__executor = None
+        self.__source = None
+        self.__articles = None
+        self.__expanded = None
+
+        if callable(exclude):
+            self.exclude = exclude
+        elif isinstance(exclude, list):
+            self.exclude = lambda a: a.identifier in exclude
+        else:
+            self.exclude = lambda a: a.identifier == exclude
+
+    def statistics(self):
+        """
+        :return: dictionary containing the number of articles expanded
+                 forwards and backwards by the last search
+        """
+        forward, backward = self.__expanded or [0, 0]
+        return {
+            'forward_expanded': forward,
+            'backward_expanded': backward
+        }
+
+    def __linked(self, articles):
+        # Articles sharing a link source are passed to it together, all
+        # others are fetched by the thread pool.
+        if articles[0].source is not None:
+            return Article.linked_articles_of(articles, self.maximum_references)
+
+        return list(self.__executor.map(lambda a: a.linked_articles(self.maximum_references), articles))
+
+    def __linking(self, articles):
+        links = self.__source.linking(articles)
+        return list(map(lambda a, l: list(map(a.sibling, l)), articles, links))
+
+    def __budget(self):
+        # number of articles which may still be expanded
+        if self.maximum_expanded is None:
+            return None
+
+        return max(0, self.maximum_expanded - sum(self.__expanded))
+
+    def __expand(self, frontier, visited, other, direction, depth):
+        # Expand a whole level of one search. Every newly found article is
+        # checked against the articles found by the other search, the meeting
+        # with the shortest total length is returned.
+        if direction == 0:
+            neighbours = self.__linked
+            chunk_size = getattr(frontier[0].source, 'batch_size', None) or self.workers or 1
+        else:
+            neighbours = self.__linking
+            chunk_size = getattr(self.__source, 'batch_size', None) or 1
+
+        following = []
+        meeting = None
+
+        for i in range(0, len(frontier), chunk_size):
+            chunk = frontier[i:i + chunk_size]
+
+            self.__expanded[direction] += len(chunk)
+
+            for article, linked in zip(chunk, neighbours(chunk)):
+                for neighbour in linked:
+                    if neighbour.identifier in visited or self.exclude(neighbour):
+                        continue
+
+                    visited[neighbour.identifier] = (article.identifier, depth)
+                    self.__articles[neighbour.identifier] = neighbour
+                    following.append(neighbour)
+
+                    if neighbour.identifier in other:
+                        length = depth + other[neighbour.identifier][1]
+                        if meeting is None or length < meeting[0]:
+                            meeting = (length, neighbour.identifier)
+
+            # No other meeting can be shorter than one reaching the other
+            # search's start, so the rest of the level is not needed.
+            if meeting is not None and other[meeting[1]][1] == 0:
+                break
+
+        return following, meeting
+
+    def __path(self, forward, backward, identifier):
+        # follow parents to the source and children to the target
+        path = []
+
+        current = identifier
+        while current is not None:
+            path.insert(0, self.__articles[current])
+            current = forward[current][0]
+
+        current = backward[identifier][0]
+        while current is not None:
+            path.append(self.__articles[current])
+            current = backward[current][0]
+
+        return path
+
+    def find(self, source: Article, target: Article):
+        """
+        search a shortest path of links from one article to another
+
+        :param source: article to start at
+        :param target: article to reach
+        :return: list of articles from source to target or None if there is
+                 no path within the limits or the expansion limit is reached
+                 before a shortest path is found
+        """
+        start = perf_counter()
+
+        self.__source = self.backlinks
+        if self.__source is None:
+            self.__source = ApiLinkSource(target.fetcher, metrics=self.metrics)
+
+        self.__articles = {source.identifier: source, target.identifier: target}
+        self.__expanded = [0, 0]
+
+        # identifiers of parents or children and distances to the start of
+        # both searches
+        forward = {source.identifier: (None, 0)}
+        backward = {target.identifier: (None, 0)}
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers or 1) as self.__executor:
+                path = self.__search(source, target, forward, backward)
+        finally:
+            self.__executor = None
+
+        if self.metrics is not None:
+            self.metrics.observe('path', perf_counter() - start)
+            self.metrics.count('expanded', sum(self.__expanded))
+
+        return path
+
+    def __search(self, source, target, forward, backward):
+        if source.identifier == target.identifier:
+            return [source]
+
+        forward_frontier, forward_depth = [source], 0
+        backward_frontier, backward_depth = [target], 0
+
+        while forward_frontier and backward_frontier and forward_depth + backward_depth < self.maximum_length:
+            # Grow the smaller frontier. A level is only expanded as a whole,
+            # as meetings in the skipped part of it could be shorter, so the
+            # search ends once the next level does not fit into the budget.
+            budget = self.__budget()
+            if budget is not None and min(len(forward_frontier), len(backward_frontier)) > budget:
+                return None
+
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_depth += 1
+                forward_frontier, meeting = self.__expand(forward_frontier, forward, backward, 0, forward_depth)
+            else:
+                backward_depth += 1
+                backward_frontier, meeting = self.__expand(backward_frontier, backward, forward, 1, backward_depth)
+
+            if meeting is not None:
+                return self.__path(forward, backward, meeting[1])
+
+        return None
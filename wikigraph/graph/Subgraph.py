@@ -0,0 +1,119 @@
+from array import array
+from functools import reduce
+
+from wikigraph.graph.GraphIterator import GraphIterator
+
+
+class Subgraph:
+    """
+    Operations on the subgraph reachable from a node, shared by Graph and
+    CompactNode. They only use the edges, degree and article of nodes, which
+    both provide.
+    """
+
+    __slots__ = ()
+
+    def __iter__(self):
+        return GraphIterator(self)
+
+    def minimum_degree_node(self):
+        """
+        Find the node with minimum degree in this graph. If there are multiple
+        nodes with the same minimum degree the first found in bfs order is
+        returned.
+
+        :return:
+        """
+        return reduce(lambda a, v: v if v.degree < a.degree else a, self, self)
+
+    def maximum_degree_node(self):
+        """
+        Find the node with maximum degree in this graph. If there are multiple
+        nodes with the same maximum degree the first found in bfs order is
+        returned.
+
+        :return:
+        """
+        return reduce(lambda a, v: v if v.degree > a.degree else a, self, self)
+
+    def density(self):
+        """
+        calculate graph density
+        :return:
+        """
+        # count edges in graph
+        node_count = 0
+        edge_count = 0
+
+        for node in self:
+            node_count += 1
+            edge_count += node.degree
+
+        # calculate density for a directed graph
+        if node_count == 1:
+            return 0
+        else:
+            return edge_count / ((node_count - 1) * node_count)
+
+    def labels(self):
+        """
+        get a list of labels ordered as the nodes appear in bfs search
+
+        :return: list of labels
+        """
+        # map graph nodes to their corresponding article's unescaped
+        # identifiers
+        return list(map(lambda x: x.article.unescaped_identifier, self))
+
+    def adjacency(self):
+        """
+        get a two dimensional matrix containing the directed edges ordered as
+        the nodes appear in bfs search
+
+        :return: two dimensional adjacency matrix
+        """
+        # get list of graph nodes and their positions
+        nodes = list(self)
+        indices = {node: i for i, node in enumerate(nodes)}
+        size = len(nodes)
+
+        # create empty two dimensional list
+        result = [[0] * size for _ in range(size)]
+
+        # set elements representing edges to 1
+        for row in range(size):
+            for col_artcl in nodes[row].edges:
+                result[row][indices[col_artcl]] = 1
+
+        return result
+
+    def edge_list(self):
+        """
+        get the directed edges as (row, column) pairs of node indices ordered
+        as the nodes appear in bfs search (coordinate format)
+
+        :return: list of tuples
+        """
+        nodes = list(self)
+        indices = {node: i for i, node in enumerate(nodes)}
+
+        return [(row, indices[col_artcl]) for row in range(len(nodes)) for col_artcl in nodes[row].edges]
+
+    def csr(self):
+        """
+        get the directed edges in compressed sparse row format: the column
+        indices of row i are stored in indices[indptr[i]:indptr[i + 1]]
+
+        :return: tuple of arrays (indptr, indices)
+        """
+        nodes = list(self)
+        positions = {node: i for i, node in enumerate(nodes)}
+
+        indptr = array('L', [0])
+        indices = array('L')
+
+        for node in nodes:
+            indices.extend(positions[col_artcl] for col_artcl in node.edges)
+            indptr.append(len(indices))
+
+        return indptr, indices
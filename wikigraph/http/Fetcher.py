@@ -0,0 +1,205 @@
+import logging
+from asyncio import sleep as async_sleep
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from threading import Lock
+from time import sleep
+
+from requests import Session
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, Timeout
+
+from wikigraph.http.TokenBucket import TokenBucket
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class Fetcher:
+    """
+    This class downloads documents using a pooled session which keeps
+    connections alive. Failed requests are retried with exponential backoff
+    and the number of requests per second can be limited. A single object
+    can be shared between threads. Requests can be sent from an event loop
+    using an aiohttp session as well, those follow the same retry policy and
+    rate limit.
+    """
+
+    # status codes which indicate a temporary problem on the server side
+    RETRY_STATUS = (429, 500, 502, 503, 504)
+
+    def __init__(self, requests_per_second=None, retries=5, backoff=0.5, maximum_backoff=60,
+                 pool_size=10, timeout=30):
+        """
+        :param requests_per_second: maximum requests per second (None for no
+                                    limit)
+        :param retries: maximum retries per request
+        :param backoff: wait time in seconds before the first retry, doubled
+                        on every further retry
+        :param maximum_backoff: maximum wait time in seconds between retries
+        :param pool_size: maximum number of connections kept alive per host
+        :param timeout: timeout in seconds for connecting and reading
+        """
+        self.retries = retries
+        self.backoff = backoff
+        self.maximum_backoff = maximum_backoff
+        self.timeout = timeout
+
+        self.session = Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.bucket = None if requests_per_second is None else TokenBucket(requests_per_second)
+
+        self.__lock = Lock()
+        self.__retries_performed = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """
+        close all pooled connections
+        :return:
+        """
+        self.session.close()
+
+    def get(self, url, **kwargs):
+        """
+        Send a GET request and retry it if the connection failed or the server
+        responded with a temporary error. An exception is raised if the last
+        retry fails.
+
+        :param url: url to request
+        :param kwargs: further arguments passed to requests
+        :return: requests.Response object
+        """
+        kwargs.setdefault('timeout', self.timeout)
+
+        attempt = 0
+        while True:
+            if self.bucket is not None:
+                self.bucket.acquire()
+
+            try:
+                response = self.session.get(url, **kwargs)
+            except (ConnectionError, Timeout):
+                if attempt >= self.retries:
+                    raise
+
+                delay = self.__delay(attempt)
+            else:
+                if response.status_code not in self.RETRY_STATUS:
+                    return response
+
+                if attempt >= self.retries:
+                    response.raise_for_status()
+
+                delay = self.__delay(attempt, response.headers.get('Retry-After'))
+                response.close()
+
+            logging.info(f'{url} (retry {attempt + 1} in {delay:.1f}s)')
+
+            with self.__lock:
+                self.__retries_performed += 1
+
+            sleep(delay)
+            attempt += 1
+
+    async def get_async(self, session, url, **kwargs):
+        """
+        Same as get but sends the request using an aiohttp session and waits
+        for retries and the rate limit without blocking the event loop. The
+        rate limit is shared with requests sent by get.
+
+        :param session: aiohttp.ClientSession object
+        :param url: url to request
+        :param kwargs: further arguments passed to aiohttp
+        :return: aiohttp.ClientResponse object (must be released by the
+                 caller, e.g. using async with)
+        """
+        kwargs.setdefault('timeout', aiohttp.ClientTimeout(total=self.timeout))
+
+        attempt = 0
+        while True:
+            if self.bucket is not None:
+                await async_sleep(self.bucket.reserve())
+
+            try:
+                response = await session.get(url, **kwargs)
+            except (aiohttp.ClientConnectionError, TimeoutError):
+                if attempt >= self.retries:
+                    raise
+
+                delay = self.__delay(attempt)
+            else:
+                if response.status not in self.RETRY_STATUS:
+                    return response
+
+                if attempt >= self.retries:
+                    response.release()
+                    response.raise_for_status()
+
+                delay = self.__delay(attempt, response.headers.get('Retry-After'))
+                response.release()
+
+            logging.info(f'{url} (retry {attempt + 1} in {delay:.1f}s)')
+
+            with self.__lock:
+                self.__retries_performed += 1
+
+            await async_sleep(delay)
+            attempt += 1
+
+    def __delay(self, attempt, retry_after=None):
+        # Prefer the wait time requested by the server. Retry-After is either
+        # a number of seconds or a http date.
+        if retry_after is not None:
+            try:
+                return min(self.maximum_backoff, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+
+            try:
+                date = parsedate_to_datetime(retry_after)
+                delta = (date - datetime.now(timezone.utc)).total_seconds()
+                return min(self.maximum_backoff, max(0.0, delta))
+            except (TypeError, ValueError):
+                pass
+
+        # exponential backoff otherwise
+        return min(self.maximum_backoff, self.backoff * 2 ** attempt)
+
+    def statistics(self):
+        """
+        get counters collected since this object has been created
+
+        :return: dictionary containing requests sent, connections opened,
+                 connections reused and retries performed
+        """
+        requests = 0
+        connections = 0
+
+        # urllib3 counts requests and new connections per connection pool
+        for adapter in set(self.session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools[key]
+                requests += pool.num_requests
+                connections += pool.num_connections
+
+        with self.__lock:
+            retries = self.__retries_performed
+
+        return {
+            'requests': requests,
+            'connections_opened': connections,
+            'connections_reused': requests - connections,
+            'retries': retries
+        }
@@ -0,0 +1,49 @@
+from threading import Lock
+from time import monotonic, sleep
+
+
+class TokenBucket:
+    """
+    thread safe token bucket used to limit the number of requests per second
+    """
+
+    def __init__(self, rate, capacity=1):
+        """
+        :param rate: tokens added per second
+        :param capacity: maximum number of tokens which can be saved up
+        """
+        self.rate = rate
+        self.capacity = capacity
+
+        self.__tokens = capacity
+        self.__updated = monotonic()
+        self.__lock = Lock()
+
+    def acquire(self):
+        """
+        take a token from the bucket and block until it is available
+        :return:
+        """
+        wait = self.reserve()
+        if wait > 0:
+            sleep(wait)
+
+    def reserve(self):
+        """
+        take a token from the bucket without waiting for it, so callers on an
+        event loop can wait asynchronously instead
+
+        :return: seconds to wait until the token is available
+        """
+        with self.__lock:
+            now = monotonic()
+
+            # refill tokens for the time passed since the last call
+            self.__tokens = min(self.capacity, self.__tokens + (now - self.__updated) * self.rate)
+            self.__updated = now
+
+            # Take the token in any case. If the bucket is empty the token
+            # count gets negative which reserves the token for this caller
+            # and makes following callers wait even longer.
+            self.__tokens -= 1
+            return -self.__tokens / self.rate if self.__tokens < 0 else 0
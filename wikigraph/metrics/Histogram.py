@@ -0,0 +1,86 @@
+from bisect import bisect_left
+
+
+class Histogram:
+    """
+    Counts observed values in buckets with fixed upper bounds. Sum, minimum
+    and maximum are kept exactly, quantiles are estimated from the buckets.
+    """
+
+    # upper bounds in seconds from 100 microseconds to 100 seconds
+    default_bounds = [m * 10 ** e for e in range(-4, 2) for m in (1, 2.5, 5)] + [100]
+
+    def __init__(self, bounds=None):
+        """
+        :param bounds: ascending upper bounds of all buckets (values above the
+                       last bound are counted in an additional bucket)
+        """
+        self.bounds = self.default_bounds if bounds is None else bounds
+        self.buckets = [0] * (len(self.bounds) + 1)
+
+        self.count = 0
+        self.sum = 0
+        self.minimum = None
+        self.maximum = None
+
+    def observe(self, value):
+        """
+        :param value: value to add
+        :return:
+        """
+        self.buckets[bisect_left(self.bounds, value)] += 1
+
+        self.count += 1
+        self.sum += value
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+
+    @property
+    def mean(self):
+        return None if self.count == 0 else self.sum / self.count
+
+    def quantile(self, q):
+        """
+        estimate a quantile by interpolating linearly within the bucket
+        containing it
+
+        :param q: quantile between 0 and 1
+        :return: estimated value (None if nothing has been observed)
+        """
+        if self.count == 0:
+            return None
+
+        rank = q * self.count
+        seen = 0
+        lower = self.minimum
+
+        for bound, count in zip(self.bounds + [self.maximum], self.buckets):
+            # buckets are limited by the observed minimum and maximum
+            upper = min(bound, self.maximum)
+
+            if count > 0 and seen + count >= rank:
+                lower = min(max(lower, self.minimum), upper)
+                return lower + (upper - lower) * (rank - seen) / count
+
+            seen += count
+            lower = bound
+
+        return self.maximum
+
+    def to_dict(self):
+        """
+        :return: dictionary containing count, sum, minimum, maximum, mean,
+                 estimated quantiles and [upper bound, count] pairs of all
+                 buckets (None as bound of the last bucket)
+        """
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.minimum,
+            'max': self.maximum,
+            'mean': self.mean,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+            'buckets': [[bound, count] for bound, count in zip(self.bounds + [None], self.buckets)]
+        }
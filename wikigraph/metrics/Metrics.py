@@ -0,0 +1,175 @@
+from threading import Lock
+from time import perf_counter
+
+from wikigraph.metrics.Histogram import Histogram
+
+
+class Metrics:
+    """
+    Collects counters, gauges, histograms and time series while building and
+    processing a graph. A single object can be shared between threads and is
+    passed to all objects which should report to it.
+
+    Names used by wikigraph:
+      - counters: cache_hits, cache_misses, cache_revalidated, requests,
+        bytes_downloaded, nodes, expanded
+      - gauges: node_cache_bytes
+      - histograms (seconds): fetch, parse, build, path, analytics,
+        centrality, layout, render, export, index
+      - time series: queue_depth
+    """
+
+    # maximum number of samples kept per time series, every second sample is
+    # dropped when it is reached
+    maximum_samples = 1000
+
+    def __init__(self):
+        self.__lock = Lock()
+        self.__start = perf_counter()
+
+        self.__counters = {}
+        self.__gauges = {}
+        self.__histograms = {}
+        self.__series = {}
+
+    def count(self, name, value=1):
+        """
+        :param name: counter name
+        :param value: value to add
+        :return:
+        """
+        with self.__lock:
+            self.__counters[name] = self.__counters.get(name, 0) + value
+
+    def record(self, name, value):
+        """
+        :param name: gauge name
+        :param value: current value replacing the previous one
+        :return:
+        """
+        with self.__lock:
+            self.__gauges[name] = value
+
+    def observe(self, name, value):
+        """
+        :param name: histogram name
+        :param value: value to add
+        :return:
+        """
+        with self.__lock:
+            if name not in self.__histograms:
+                self.__histograms[name] = Histogram()
+
+            self.__histograms[name].observe(value)
+
+    def sample(self, name, value):
+        """
+        add a value with the seconds passed since this object was created to
+        a time series
+
+        :param name: time series name
+        :param value: value to add
+        :return:
+        """
+        with self.__lock:
+            # samples are only kept every stride values
+            if name not in self.__series:
+                self.__series[name] = {'stride': 1, 'index': 0, 'samples': []}
+
+            series = self.__series[name]
+            if series['index'] % series['stride'] == 0:
+                series['samples'].append([perf_counter() - self.__start, value])
+
+                if len(series['samples']) >= self.maximum_samples:
+                    series['samples'] = series['samples'][::2]
+                    series['stride'] *= 2
+
+            series['index'] += 1
+
+    def counter(self, name):
+        """
+        :param name: counter name
+        :return: current value (0 if nothing has been counted)
+        """
+        with self.__lock:
+            return self.__counters.get(name, 0)
+
+    def gauge(self, name):
+        """
+        :param name: gauge name
+        :return: last recorded value or None if nothing has been recorded
+        """
+        with self.__lock:
+            return self.__gauges.get(name)
+
+    def histogram(self, name):
+        """
+        :param name: histogram name
+        :return: Histogram object or None if nothing has been observed
+        """
+        with self.__lock:
+            return self.__histograms.get(name)
+
+    def __derived(self):
+        # rates and ratios calculated from counters and histograms
+        derived = {}
+
+        build = self.__histograms.get('build')
+        if build is not None and build.sum > 0:
+            derived['nodes_per_second'] = self.__counters.get('nodes', 0) / build.sum
+            derived['bytes_per_second'] = self.__counters.get('bytes_downloaded', 0) / build.sum
+
+        nodes = self.__counters.get('nodes', 0)
+        if nodes > 0 and 'node_cache_bytes' in self.__gauges:
+            derived['node_cache_bytes_per_node'] = self.__gauges['node_cache_bytes'] / nodes
+
+        hits = self.__counters.get('cache_hits', 0)
+        lookups = hits + self.__counters.get('cache_misses', 0)
+        if lookups > 0:
+            derived['cache_hit_ratio'] = hits / lookups
+
+        return derived
+
+    def to_dict(self):
+        """
+        :return: dictionary of all collected values which can be serialized
+                 to json
+        """
+        with self.__lock:
+            return {
+                'elapsed_seconds': perf_counter() - self.__start,
+                'counters': dict(self.__counters),
+                'gauges': dict(self.__gauges),
+                'derived': self.__derived(),
+                'histograms': {name: h.to_dict() for name, h in self.__histograms.items()},
+                'series': {name: list(s['samples']) for name, s in self.__series.items()}
+            }
+
+    def summary(self):
+        """
+        :return: human readable summary of all collected values
+        """
+        values = self.to_dict()
+        lines = [f'elapsed: {values["elapsed_seconds"]:.3f}s']
+
+        for name, value in sorted(values['counters'].items()):
+            lines.append(f'{name.replace("_", " ")}: {value}')
+
+        for name, value in sorted(values['gauges'].items()):
+            lines.append(f'{name.replace("_", " ")}: {value}')
+
+        for name, value in sorted(values['derived'].items()):
+            lines.append(f'{name.replace("_", " ")}: {value:.3f}')
+
+        for name, h in sorted(values['histograms'].items()):
+            lines.append(f'{name}: {h["count"]} times, total {h["sum"]:.3f}s, mean {h["mean"] * 1000:.2f}ms, '
+                         f'p50 {h["p50"] * 1000:.2f}ms, p90 {h["p90"] * 1000:.2f}ms, p99 {h["p99"] * 1000:.2f}ms, '
+                         f'max {h["max"] * 1000:.2f}ms')
+
+        for name, samples in sorted(values['series'].items()):
+            if samples:
+                peak = max(samples, key=lambda s: s[1])
+                lines.append(f'{name.replace("_", " ")}: {len(samples)} samples, '
+                             f'maximum {peak[1]} after {peak[0]:.3f}s, last {samples[-1][1]}')
+
+        return '\n'.join(lines)
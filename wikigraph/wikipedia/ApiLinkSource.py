@@ -0,0 +1,288 @@
+import logging
+from asyncio import get_running_loop
+from time import perf_counter
+from urllib.parse import quote
+
+from requests import get as http_get
+
+
+class ApiLinkSource:
+    """
+    Link source which requests the links of articles from the MediaWiki API
+    instead of parsing their HTML code. The links of up to `batch_size`
+    articles are requested at once.
+
+    A link source is passed to Article objects and must provide:
+      - batch_size: number of articles it prefers to handle in one call
+      - linked(articles, maximum): list of linked identifiers per article
+      - linked_async(session, articles, maximum): same using aiohttp
+
+    PathFinder additionally uses linking(articles, maximum) to get the
+    articles linking to the given ones.
+    """
+
+    # URL pattern of the API endpoint. This can be changed to point at a local
+    # mirror or a stand-in server.
+    url_pattern = 'https://{language}.wikipedia.org/w/api.php'
+
+    # Version used for links saved to an article cache. Links extracted from
+    # HTML code use Article.parser_version (below 1000) or
+    # ContentScanner.cache_version (1000 and above), so API link lists use
+    # negative versions.
+    cache_version = -1
+
+    # maximum number of titles per query allowed by MediaWiki
+    batch_size = 50
+
+    def __init__(self, fetcher=None, metrics=None):
+        """
+        :param fetcher: Fetcher object used to send requests (None to send
+                        single requests without retries)
+        :param metrics: Metrics object to report requests to (None to
+                        disable)
+        """
+        self.fetcher = fetcher
+        self.metrics = metrics
+
+    @staticmethod
+    def __title(article):
+        # API titles use spaces instead of underscores and are not escaped
+        return article.unescaped_identifier
+
+    @staticmethod
+    def __identifier(title):
+        # escape titles the same way MediaWiki does in links
+        return quote(title.replace(' ', '_'), safe=';@$!*(),/~:')
+
+    # query property and its parameter prefix per direction
+    properties = {
+        'links': 'pl',
+        'linkshere': 'lh'
+    }
+
+    def __params(self, titles, prop='links'):
+        prefix = self.properties[prop]
+
+        return {
+            'action': 'query',
+            'format': 'json',
+            'formatversion': '2',
+            'prop': prop,
+            f'{prefix}namespace': '0',
+            f'{prefix}limit': 'max',
+            'redirects': '1',
+            'titles': '|'.join(titles)
+        }
+
+    def __report(self, start, size):
+        if self.metrics is not None:
+            self.metrics.observe('fetch', perf_counter() - start)
+            self.metrics.count('requests')
+            self.metrics.count('bytes_downloaded', size)
+
+    def __get(self, url, params):
+        start = perf_counter()
+        if self.fetcher is None:
+            response = http_get(url, params=params)
+        else:
+            response = self.fetcher.get(url, params=params)
+
+        self.__report(start, len(response.content))
+        return response.json()
+
+    async def __get_async(self, session, url, params):
+        # same as __get using the fetcher's retries and rate limit as well
+        start = perf_counter()
+        if self.fetcher is None:
+            response = await session.get(url, params=params)
+        else:
+            response = await self.fetcher.get_async(session, url, params=params)
+
+        async with response:
+            self.__report(start, len(await response.read()))
+            return await response.json()
+
+    def __cached(self, articles):
+        # get cached links and the articles which need to be requested
+        cached = {}
+        missing = []
+
+        for article in articles:
+            links = None
+            if article.cache is not None:
+                links = article.cache.load_links(article.language, article.identifier, self.cache_version)
+
+            if links is None:
+                missing.append(article)
+            else:
+                cached[article.identifier] = links
+
+            if article.cache is not None and self.metrics is not None:
+                self.metrics.count('cache_misses' if links is None else 'cache_hits')
+
+        return cached, missing
+
+    @staticmethod
+    def __batches(articles):
+        # group articles by language as every language has its own api
+        batches = {}
+        for article in articles:
+            batches.setdefault(article.language, []).append(article)
+
+        return batches.items()
+
+    def __resolve(self, articles, query, links):
+        # Titles are normalized and redirects resolved by the API. Follow
+        # both to find the page which belongs to a requested article.
+        renamed = {}
+        for entry in query.get('normalized', []) + query.get('redirects', []):
+            renamed[entry['from']] = entry['to']
+
+        result = {}
+        for article in articles:
+            title = self.__title(article)
+
+            visited = set()
+            while title in renamed and title not in visited:
+                visited.add(title)
+                title = renamed[title]
+
+            # drop links to the page itself, which may have been requested
+            # by another title
+            own = {article.identifier, self.__identifier(title)}
+            identifiers = map(self.__identifier, links.get(title, []))
+            result[article.identifier] = list(filter(lambda i: i not in own, identifiers))
+
+        return result
+
+    @staticmethod
+    def __collect(response, query, links, prop='links'):
+        # merge a (continued) response into the results collected so far
+        part = response.get('query', {})
+
+        for key in ('normalized', 'redirects'):
+            query.setdefault(key, []).extend(part.get(key, []))
+
+        for page in part.get('pages', []):
+            page_links = links.setdefault(page['title'], [])
+            page_links.extend(map(lambda link: link['title'], page.get(prop, [])))
+
+        return response.get('continue')
+
+    def __finish(self, articles, cached, fetched, maximum):
+        result = []
+
+        for article in articles:
+            if article.identifier in cached:
+                links = cached[article.identifier]
+            else:
+                links = fetched[article.identifier]
+                if article.cache is not None:
+                    article.cache.store_links(article.language, article.identifier, self.cache_version, links)
+
+            result.append(links if maximum is None else links[:maximum])
+
+        return result
+
+    def __requests(self, articles, prop):
+        # Request a property of all articles in batches. This generator yields
+        # url and parameters of every request and expects the decoded response
+        # to be sent back, so requests can be sent synchronously or using
+        # aiohttp. It returns the links per article identifier.
+        fetched = {}
+
+        for language, batch in self.__batches(articles):
+            url = self.url_pattern.format(language=language)
+
+            for i in range(0, len(batch), self.batch_size):
+                chunk = batch[i:i + self.batch_size]
+                params = self.__params(map(self.__title, chunk), prop)
+
+                logging.info(f'{url} ({len(chunk)} articles, {prop})')
+
+                # request until all links are received
+                query, links = {}, {}
+                continuation = {}
+                while continuation is not None:
+                    response = yield url, {**params, **continuation}
+                    continuation = self.__collect(response, query, links, prop)
+
+                fetched.update(self.__resolve(chunk, query, links))
+
+        return fetched
+
+    def __request(self, articles, prop):
+        requests = self.__requests(articles, prop)
+        response = None
+
+        while True:
+            try:
+                url, params = requests.send(response)
+            except StopIteration as done:
+                return done.value
+
+            response = self.__get(url, params)
+
+    async def __request_async(self, session, articles, prop):
+        requests = self.__requests(articles, prop)
+        response = None
+
+        while True:
+            try:
+                url, params = requests.send(response)
+            except StopIteration as done:
+                return done.value
+
+            response = await self.__get_async(session, url, params)
+
+    def linked(self, articles, maximum=None):
+        """
+        get linked identifiers of multiple articles using as few requests as
+        possible
+
+        :param articles: list of articles
+        :param maximum: maximum number of links per article (None for all)
+        :return: list of identifier lists in the same order as articles
+        """
+        cached, missing = self.__cached(articles)
+        fetched = self.__request(missing, 'links')
+
+        return self.__finish(articles, cached, fetched, maximum)
+
+    def linking(self, articles, maximum=None):
+        """
+        Get identifiers of the articles linking to multiple articles. Redirects
+        to an article are returned as well, as following them leads to the
+        article. Backlinks are not cached, because caches store a single link
+        list per article.
+
+        :param articles: list of articles
+        :param maximum: maximum number of backlinks per article (None for
+                        all)
+        :return: list of identifier lists in the same order as articles
+        """
+        fetched = self.__request(articles, 'linkshere')
+
+        result = []
+        for article in articles:
+            links = fetched[article.identifier]
+            result.append(links if maximum is None else links[:maximum])
+
+        return result
+
+    async def linked_async(self, session, articles, maximum=None):
+        """
+        same as linked but sends requests using the given aiohttp session and
+        accesses caches on the event loop's default executor
+
+        :param session: aiohttp.ClientSession object
+        :param articles: list of articles
+        :param maximum: maximum number of links per article (None for all)
+        :return: list of identifier lists in the same order as articles
+        """
+        loop = get_running_loop()
+
+        cached, missing = await loop.run_in_executor(None, self.__cached, articles)
+        fetched = await self.__request_async(session, missing, 'links')
+
+        return await loop.run_in_executor(None, self.__finish, articles, cached, fetched, maximum)
@@ -1,11 +1,16 @@
 import logging
-from collections import OrderedDict
-from os import path
-from re import findall, search
+from asyncio import get_running_loop, wrap_future
+from codecs import getincrementaldecoder
+from re import search
+from time import perf_counter, time
 from urllib.parse import unquote
 
 from requests import get as http_get
 
+from wikigraph.cache.DirectoryCache import DirectoryCache
+from wikigraph.wikipedia.ContentScanner import ContentScanner
+from wikigraph.wikipedia.LinkScanner import LinkScanner
+
 
 class Article:
     """
@@ -14,22 +19,66 @@ class Article:
     extract several features like other linked articles.
     """
 
-    def __init__(self, identifier, language='en', cache_directory=None):
+    # Version of the link extraction. Increase whenever LinkScanner.parse
+    # changes its result so link lists in caches created by older versions are
+    # ignored.
+    parser_version = 1
+
+    # URL pattern used to download articles. This can be changed to point at a
+    # local mirror or a stand-in server.
+    url_pattern = 'https://{language}.wikipedia.org/wiki/{identifier}'
+
+    def __init__(self, identifier, language='en', cache_directory=None, fetcher=None, cache=None, source=None,
+                 metrics=None, parser=None, content=False, skip=None):
         """
         :param identifier: unique identifier (the name after /wiki/)
         :param language: article language ('en', 'de', etc)
         :param cache_directory: directory to cache received articles in
+                                (shortcut for passing a DirectoryCache)
+        :param fetcher: Fetcher object used to download articles (None to
+                        send a single request without retries)
+        :param cache: cache object to load and store received articles
+                      (DirectoryCache, SQLiteCache or None)
+        :param source: link source used to get linked articles (None to
+                       parse the article's HTML code, ApiLinkSource)
+        :param metrics: Metrics object to report downloads, cache usage and
+                        parse times to (None to disable)
+        :param parser: executor to extract links from whole article texts in,
+                       e.g. a ProcessPoolExecutor (None to extract them on
+                       the calling thread)
+        :param content: extract links from the article body only instead of
+                        the whole page (ignored by link sources)
+        :param skip: list of sections skipped in the article body like
+                     'navboxes' and 'references' (see ContentScanner)
         """
+        if cache is None and cache_directory is not None:
+            cache = DirectoryCache(cache_directory)
+
         # set properties
         self.identifier = identifier.strip()
         self.language = language
         self.cache_directory = cache_directory
+        self.fetcher = fetcher
+        self.cache = cache
+        self.source = source
+        self.metrics = metrics
+        self.parser = parser
+        self.content = content
+        self.skip = tuple(skip or ())
 
     @staticmethod
-    def from_url(url, cache_directory=None):
+    def from_url(url, cache_directory=None, fetcher=None, cache=None, source=None, metrics=None, parser=None,
+                 content=False, skip=None):
         """
         :param url: url to Wikipedia article
         :param cache_directory: directory to cache received articles in
+        :param fetcher: Fetcher object used to download articles
+        :param cache: cache object to load and store received articles
+        :param source: link source used to get linked articles
+        :param metrics: Metrics object to report to
+        :param parser: executor to extract links in
+        :param content: extract links from the article body only
+        :param skip: list of sections skipped in the article body
         :return:
         """
         result = search(r'^https?://([a-z]+)\.wikipedia\.org/wiki/(.*?)$', url)
@@ -39,67 +88,435 @@ class Article:
         identifier = result.group(2)
         language = result.group(1)
 
-        return Article(identifier, language, cache_directory=cache_directory)
+        return Article(identifier, language, cache_directory=cache_directory, fetcher=fetcher, cache=cache,
+                       source=source, metrics=metrics, parser=parser, content=content, skip=skip)
+
+    def sibling(self, identifier):
+        """
+        :param identifier: unique identifier of another article
+        :return: article using the same language, cache, fetcher, link
+                 source, metrics, parser and extraction as this article
+        """
+        return Article(identifier, language=self.language, cache_directory=self.cache_directory,
+                       fetcher=self.fetcher, cache=self.cache, source=self.source, metrics=self.metrics,
+                       parser=self.parser, content=self.content, skip=self.skip)
 
     def __str__(self):
-        return f'https://{self.language}.wikipedia.org/wiki/{self.identifier}'
+        return self.url_pattern.format(language=self.language, identifier=self.identifier)
 
     @property
     def unescaped_identifier(self):
         return unquote(self.identifier).replace('_', ' ')
 
+    def __count(self, name, value=1):
+        if self.metrics is not None:
+            self.metrics.count(name, value)
+
+    def __observe(self, name, start):
+        # add seconds passed since start to a histogram
+        if self.metrics is not None:
+            self.metrics.observe(name, perf_counter() - start)
+
+    def __load_cached(self):
+        if self.cache is None:
+            return ''
+
+        # load cached text if the article is contained in cache
+        text = self.cache.load(self.language, self.identifier)
+        if text is None:
+            return ''
+
+        logging.info(self.__str__() + ' (from cache)')
+        return text
+
+    def __store_cached(self, text, metadata):
+        if self.cache is not None:
+            self.cache.store(self.language, self.identifier, text, metadata)
+
+    def __cache_expired(self):
+        # cached articles never expire if there is no ttl set
+        if self.cache is None or self.cache.ttl is None:
+            return False
+
+        metadata = self.cache.metadata(self.language, self.identifier)
+        if metadata is None or metadata.get('fetched') is None:
+            return True
+
+        return time() - metadata['fetched'] > self.cache.ttl
+
+    def __links_version(self):
+        # body link lists are cached with their own versions
+        if self.content:
+            return ContentScanner.cache_version(self.skip)
+        else:
+            return self.parser_version
+
+    def __scanner(self, maximum=None):
+        if self.content:
+            return ContentScanner(self.identifier, maximum, self.skip)
+        else:
+            return LinkScanner(self.identifier, maximum)
+
+    def __load_cached_links(self):
+        if self.cache is None:
+            return None
+
+        links = self.cache.load_links(self.language, self.identifier, self.__links_version())
+        if links is not None:
+            logging.info(self.__str__() + ' (links from cache)')
+
+        return links
+
+    def __store_cached_links(self, links):
+        if self.cache is not None:
+            self.cache.store_links(self.language, self.identifier, self.__links_version(), links)
+
+    def __request_headers(self):
+        # Send the validators received with the cached text so the server can
+        # respond with 304 Not Modified instead of the whole article.
+        metadata = self.cache.metadata(self.language, self.identifier)
+        if metadata is None:
+            return {}
+
+        headers = {}
+        if metadata.get('etag') is not None:
+            headers['If-None-Match'] = metadata['etag']
+        if metadata.get('last_modified') is not None:
+            headers['If-Modified-Since'] = metadata['last_modified']
+
+        return headers
+
+    def __response_metadata(self, headers, previous=None):
+        # keep previous validators if a 304 response does not repeat them
+        previous = {} if previous is None else previous
+
+        return {
+            'etag': headers.get('ETag', previous.get('etag')),
+            'last_modified': headers.get('Last-Modified', previous.get('last_modified')),
+            'fetched': time()
+        }
+
+    def __revalidated(self, status, headers):
+        # update fetch time of the cached text if it is still valid
+        if status != 304:
+            return False
+
+        logging.info(self.__str__() + ' (not modified)')
+
+        previous = self.cache.metadata(self.language, self.identifier)
+        self.cache.touch(self.language, self.identifier, self.__response_metadata(headers, previous))
+        self.__count('cache_revalidated')
+        return True
+
+    def __cached_text(self):
+        # get cached text, whether it is still valid and the headers to
+        # request the article with otherwise
+        text = self.__load_cached()
+
+        # return cached text if it has not expired yet
+        if text.strip() != '' and not self.__cache_expired():
+            self.__count('cache_hits')
+            return text, True, None
+
+        if self.cache is not None:
+            self.__count('cache_misses')
+
+        # If text variable is empty either the article was not cached or the
+        # cache did not contain any data for whatever reason.
+        # In this case we load the data via http and save it to the cache.
+        # Expired articles are requested conditionally.
+        headers = {} if text.strip() == '' else self.__request_headers()
+
+        return text, False, headers
+
+    async def __run(self, function, *args):
+        # Caches read and write files or databases. This is done on the
+        # default executor in the async path, so the event loop can continue
+        # serving other downloads meanwhile.
+        if self.cache is None:
+            return function(*args)
+
+        return await get_running_loop().run_in_executor(None, function, *args)
+
+    async def __request_async(self, session, headers=None):
+        # send a request using the fetcher's retries and rate limit if there
+        # is one (the response must be released by the caller)
+        if self.fetcher is None:
+            return await session.get(self.__str__(), headers=headers)
+
+        return await self.fetcher.get_async(session, self.__str__(), headers=headers)
+
     def __get(self):
-        # Article identifiers can contain slashes which must not be interpreted
-        # as directory delimiters at any file system operation.
-        # https://de.wikipedia.org/wiki/Bob_Marley/Auszeichnungen_f%C3%BCr_Musikverk%C3%A4ufe
-        safe_identifier = self.identifier.replace('/', '_')
+        text, valid, headers = self.__cached_text()
+        if valid:
+            return text
 
-        if self.cache_directory is None:
-            cache_file = None
+        logging.info(self.__str__())
+        start = perf_counter()
+        if self.fetcher is None:
+            response = http_get(self.__str__(), headers=headers)
         else:
-            cache_file = path.join(self.cache_directory, safe_identifier + '.html')
+            response = self.fetcher.get(self.__str__(), headers=headers)
+
+        self.__observe('fetch', start)
+        self.__count('requests')
+        self.__count('bytes_downloaded', len(response.content))
+
+        if headers and self.__revalidated(response.status_code, response.headers):
+            return text
+
+        text = response.text
+        self.__store_cached(text, self.__response_metadata(response.headers))
+
+        return text
+
+    async def __get_async(self, session):
+        # same as __get but the download is awaited and the cache is accessed
+        # on another thread, so the event loop is not blocked
+        text, valid, headers = await self.__run(self.__cached_text)
+        if valid:
+            return text
 
-        text = ''
+        logging.info(self.__str__())
+        start = perf_counter()
+        async with await self.__request_async(session, headers) as response:
+            # the body is kept by aiohttp, so text does not read it again
+            body = await response.read()
 
-        # load cached text if file exists
-        if cache_file is not None and path.exists(cache_file):
-            logging.info(self.__str__() + ' (from cache)')
-            with open(cache_file, 'r', encoding='utf-8') as file:
-                text = file.read()
+            self.__observe('fetch', start)
+            self.__count('requests')
+            self.__count('bytes_downloaded', len(body))
 
-        # If text variable is empty either the cache file did not exist or it
-        # did not contain any data for whatever reason.
-        # In this case we load the data via http and save it to the cache file.
-        if text.strip() == '':
-            logging.info(self.__str__())
-            text = http_get(self.__str__()).text
+            if headers and await self.__run(self.__revalidated, response.status, response.headers):
+                return text
 
-            if cache_file is not None:
-                with open(cache_file, 'w', encoding='utf-8') as file:
-                    file.write(text)
+            text = await response.text()
+            metadata = self.__response_metadata(response.headers)
 
+        await self.__run(self.__store_cached, text, metadata)
         return text
 
-    def linked_articles(self):
+    def __parse_call(self, text):
+        # function and arguments extracting all links of a whole text
+        if self.content:
+            return ContentScanner.parse, text, self.identifier, self.skip
+        else:
+            return LinkScanner.parse, text, self.identifier
+
+    def __parse(self, text):
+        start = perf_counter()
+        function, *arguments = self.__parse_call(text)
+
+        # Only the text is sent to the parser and only the list of
+        # identifiers is sent back, so it can run in another process.
+        if self.parser is None:
+            links = function(*arguments)
+        else:
+            links = self.parser.submit(function, *arguments).result()
+
+        self.__observe('parse', start)
+        return links
+
+    async def __parse_async(self, text):
+        # wait for the parser without blocking the event loop
+        if self.parser is None:
+            return self.__parse(text)
+
+        start = perf_counter()
+        links = await wrap_future(self.parser.submit(*self.__parse_call(text)))
+
+        self.__observe('parse', start)
+        return links
+
+    def __scan_cached(self, maximum):
+        if self.cache is None:
+            return None
+
+        chunks = self.cache.load_chunks(self.language, self.identifier)
+        if chunks is None:
+            return None
+
+        logging.info(self.__str__() + ' (from cache)')
+
+        # read cached text only until enough links are found
+        scanner = self.__scanner(maximum)
+        parse_seconds = 0
+        for chunk in chunks:
+            start = perf_counter()
+            done = scanner.feed(chunk)
+            parse_seconds += perf_counter() - start
+
+            if done:
+                break
+
+        chunks.close()
+
+        if self.metrics is not None:
+            self.metrics.observe('parse', parse_seconds)
+
+        return scanner.links
+
+    def __scan_remote(self, maximum):
+        logging.info(self.__str__())
+        start = perf_counter()
+
+        if self.fetcher is None:
+            response = http_get(self.__str__(), stream=True)
+        else:
+            response = self.fetcher.get(self.__str__(), stream=True)
+
+        # read response only until enough links are found
+        scanner = self.__scanner(maximum)
+        parse_seconds = 0
+        with response:
+            if response.encoding is None:
+                response.encoding = 'utf-8'
+
+            for chunk in response.iter_content(chunk_size=16384, decode_unicode=True):
+                parse_start = perf_counter()
+                done = scanner.feed(chunk)
+                parse_seconds += perf_counter() - parse_start
+
+                if done:
+                    break
+
+            # bytes actually read from the connection
+            received = response.raw.tell()
+
+        if self.metrics is not None:
+            self.metrics.observe('fetch', perf_counter() - start - parse_seconds)
+            self.metrics.observe('parse', parse_seconds)
+            self.metrics.count('requests')
+            self.metrics.count('bytes_downloaded', received)
+
+        return scanner.links
+
+    async def __scan_remote_async(self, session, maximum):
+        logging.info(self.__str__())
+        start = perf_counter()
+
+        scanner = self.__scanner(maximum)
+        parse_seconds = 0
+        received = 0
+        async with await self.__request_async(session) as response:
+            decoder = getincrementaldecoder(response.charset or 'utf-8')(errors='replace')
+
+            async for chunk in response.content.iter_chunked(16384):
+                received += len(chunk)
+
+                parse_start = perf_counter()
+                done = scanner.feed(decoder.decode(chunk))
+                parse_seconds += perf_counter() - parse_start
+
+                if done:
+                    break
+
+        if self.metrics is not None:
+            self.metrics.observe('fetch', perf_counter() - start - parse_seconds)
+            self.metrics.observe('parse', parse_seconds)
+            self.metrics.count('requests')
+            self.metrics.count('bytes_downloaded', received)
+
+        return scanner.links
+
+    def __cached_links(self, maximum):
+        # The extracted links are cached as well so the article text does not
+        # need to be loaded and parsed again. If the cached article has
+        # expired it is revalidated first. Cached links are dropped when a
+        # new text is stored and remain valid otherwise.
+        if self.__cache_expired():
+            return None
+
+        links = self.__load_cached_links()
+        if links is None and maximum is not None:
+            links = self.__scan_cached(maximum)
+
+        if links is not None:
+            self.__count('cache_hits')
+
+        return links
+
+    def __articles(self, links):
+        # map to Article list
+        return list(map(self.sibling, links))
+
+    def linked_articles(self, maximum=None):
         """
         parse article text and extract all linked Wikipedia article identifiers
 
+        If a maximum is given and the article does not need to be saved to the
+        cache, the article is only read until enough links have been found.
+
+        :param maximum: maximum number of linked articles (None for all)
         :return: list of identifiers
         """
-        # find all references using regular expressions
-        matches = findall(r'href="/wiki/([^:]*?)"', self.__get())
+        if self.source is not None:
+            return self.__articles(self.source.linked([self], maximum)[0])
 
-        # remove anchor
-        matches = map(lambda m: m.split('#')[0], matches)
+        links = self.__cached_links(maximum)
 
-        # remove duplicates
-        matches = OrderedDict.fromkeys(matches)
+        # without cache the download can be stopped early
+        if links is None and maximum is not None and self.cache is None:
+            links = self.__scan_remote(maximum)
 
-        # filter links to the article itself
-        matches = filter(lambda m: m != self.identifier, matches)
+        if links is None:
+            text = self.__get()
 
-        # map to Article list
-        return list(map(
-            lambda m: Article(m, language=self.language, cache_directory=self.cache_directory),
-            matches
-        ))
+            links = self.__load_cached_links()
+            if links is None:
+                links = self.__parse(text)
+                self.__store_cached_links(links)
+
+        if maximum is not None:
+            links = links[:maximum]
+
+        return self.__articles(links)
+
+    async def linked_articles_async(self, session, maximum=None):
+        """
+        same as linked_articles but downloads the article text using the given
+        aiohttp client session without blocking the event loop (the cache is
+        accessed on the loop's default executor, downloads use the fetcher's
+        retries and rate limit)
+
+        :param session: aiohttp.ClientSession object
+        :param maximum: maximum number of linked articles (None for all)
+        :return: list of identifiers
+        """
+        if self.source is not None:
+            return self.__articles((await self.source.linked_async(session, [self], maximum))[0])
+
+        links = await self.__run(self.__cached_links, maximum)
+
+        if links is None and maximum is not None and self.cache is None:
+            links = await self.__scan_remote_async(session, maximum)
+
+        if links is None:
+            text = await self.__get_async(session)
+
+            links = await self.__run(self.__load_cached_links)
+            if links is None:
+                links = await self.__parse_async(text)
+                await self.__run(self.__store_cached_links, links)
+
+        if maximum is not None:
+            links = links[:maximum]
+
+        return self.__articles(links)
+
+    @staticmethod
+    def linked_articles_of(articles, maximum=None):
+        """
+        Extract linked articles of several articles at once. The articles are
+        passed to their link source together, so a source like ApiLinkSource
+        needs a single request only.
+
+        :param articles: list of articles sharing the same link source
+        :param maximum: maximum number of linked articles per article
+        :return: list of linked articles per article
+        """
+        if not articles or articles[0].source is None:
+            return list(map(lambda a: a.linked_articles(maximum), articles))
+
+        links = articles[0].source.linked(articles, maximum)
+        return list(map(lambda a, l: a.__articles(l), articles, links))
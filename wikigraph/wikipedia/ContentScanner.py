@@ -0,0 +1,169 @@
+from collections import OrderedDict
+from re import compile
+
+# Opening and closing tags of elements which may contain or skip links and
+# links to other articles. All matches start with an opening angle bracket,
+# which the expression engine searches for quickly. Attribute values and links
+# never contain a closing angle bracket, so no match continues after one.
+TOKEN_PATTERN = compile(r'<(?:(/?)(div|ol|table)\b([^>]*)>|a\s[^>]*?href="/wiki/([^:">]*)")')
+CLASS_PATTERN = compile(r'\bclass="([^"]*)"')
+
+# id of the element containing the article body
+CONTENT_ID = 'id="mw-content-text"'
+
+
+class ContentScanner:
+    """
+    Extracts linked article identifiers from the body of an article only, so
+    navigation like sidebars, headers and footers is ignored. Sections like
+    navboxes and reference lists can be skipped as well. The text is scanned
+    once without building a document tree and can be received in chunks like
+    by LinkScanner.
+    """
+
+    # Version of the extraction. Link lists are cached with a version
+    # calculated from this value and the skipped sections, so lists of
+    # different modes never replace each other silently.
+    version = 1
+
+    # classes of the elements skipped per section name
+    sections = {
+        'navboxes': ('navbox', 'vertical-navbox', 'sidebar'),
+        'references': ('reflist', 'references', 'refbegin')
+    }
+
+    def __init__(self, identifier, maximum=None, skip=None):
+        """
+        :param identifier: identifier of the scanned article (links to the
+                           article itself are skipped)
+        :param maximum: number of distinct links after which scanning is done
+                        (None to scan the whole text)
+        :param skip: list of section names to skip (see sections)
+        """
+        self.identifier = identifier
+        self.maximum = maximum
+        self.__classes = self.__skipped_classes(skip)
+
+        self.__links = OrderedDict()
+        self.__buffer = ''
+
+        # open elements per tag and the elements which started the body or a
+        # skipped section as (tag, depth, is body) tuples
+        self.__depth = {'div': 0, 'ol': 0, 'table': 0}
+        self.__regions = []
+        self.__content = 0
+        self.__skipped = 0
+
+    @classmethod
+    def __skipped_classes(cls, skip):
+        classes = set()
+        for name in skip or ():
+            if name not in cls.sections:
+                raise ValueError(f'unknown section: {name}')
+
+            classes.update(cls.sections[name])
+
+        return classes
+
+    @classmethod
+    def cache_version(cls, skip=None):
+        """
+        :param skip: list of skipped section names
+        :return: version to cache extracted link lists with (whole page link
+                 lists use versions below 1000)
+        """
+        mask = sum(1 << i for i, name in enumerate(cls.sections) if name in (skip or ()))
+        return 1000 * cls.version + mask
+
+    @staticmethod
+    def parse(text, identifier, skip=None):
+        """
+        Extract all distinct links of a whole text at once. This depends on
+        its arguments only, so it can be run in a process pool.
+
+        :param text: complete text
+        :param identifier: identifier of the article
+        :param skip: list of section names to skip
+        :return: list of identifiers in order of appearance
+        """
+        scanner = ContentScanner(identifier, skip=skip)
+        scanner.feed(text)
+        return scanner.links
+
+    @property
+    def done(self):
+        return self.maximum is not None and len(self.__links) >= self.maximum
+
+    @property
+    def links(self):
+        """
+        :return: list of distinct identifiers found so far
+        """
+        links = list(self.__links)
+
+        if self.maximum is not None:
+            links = links[:self.maximum]
+
+        return links
+
+    def __open(self, tag, attributes):
+        self.__depth[tag] += 1
+
+        if CONTENT_ID in attributes:
+            self.__regions.append((tag, self.__depth[tag], True))
+            self.__content += 1
+            return
+
+        if self.__classes:
+            match = CLASS_PATTERN.search(attributes)
+            if match is not None and not self.__classes.isdisjoint(match.group(1).split()):
+                self.__regions.append((tag, self.__depth[tag], False))
+                self.__skipped += 1
+
+    def __close(self, tag):
+        # leave the body or skipped section when its element is closed
+        if self.__regions:
+            region_tag, depth, content = self.__regions[-1]
+            if region_tag == tag and depth == self.__depth[tag]:
+                self.__regions.pop()
+                if content:
+                    self.__content -= 1
+                else:
+                    self.__skipped -= 1
+
+        self.__depth[tag] = max(0, self.__depth[tag] - 1)
+
+    def feed(self, chunk):
+        """
+        scan the next chunk of text
+
+        :param chunk: text following the previously scanned chunks
+        :return: True if enough links have been found
+        """
+        buffer = self.__buffer + chunk
+
+        # Only scan until the last closing angle bracket, so tags and links
+        # continued in the next chunk are scanned as a whole later.
+        end = buffer.rfind('>') + 1
+
+        for match in TOKEN_PATTERN.finditer(buffer, 0, end):
+            link = match.group(4)
+
+            if link is None:
+                if match.group(1):
+                    self.__close(match.group(2))
+                else:
+                    self.__open(match.group(2), match.group(3))
+
+            elif self.__content > 0 and self.__skipped == 0:
+                # remove anchor and skip links to the article itself
+                link = link.split('#')[0]
+                if link != self.identifier:
+                    self.__links[link] = None
+
+                if self.done:
+                    self.__buffer = ''
+                    return True
+
+        self.__buffer = buffer[end:]
+        return False
@@ -0,0 +1,529 @@
+import bz2
+import gzip
+import logging
+import lzma
+import struct
+from array import array
+from io import TextIOWrapper
+from os import path
+from re import compile
+from sys import byteorder
+from time import perf_counter
+from urllib.parse import quote, unquote
+from xml.etree.ElementTree import iterparse
+
+
+class DumpIndexer:
+    """
+    Reads Wikipedia dumps once and saves the links between all articles to an
+    index file, which is memory mapped by DumpLinkSource to build graphs
+    without downloading a single page.
+
+    Supported dumps are pages-articles XML dumps, whose links are taken from
+    the wikitext, and SQL dumps of the page, linktarget, redirect and
+    pagelinks tables, which contain the links of the rendered pages including
+    those added by templates. Files may be compressed using gzip, bzip2 or xz.
+    Links to redirects are replaced by links to their targets and links to
+    missing articles are dropped.
+
+    The index file contains a header followed by 8 byte aligned arrays in
+    native byte order:
+      - offsets, titles: identifiers of all articles and redirects in sorted
+        order, so they can be found using binary search
+      - targets: position of the article an identifier belongs to (itself for
+        articles, the target for redirects, `missing` if it does not exist)
+      - indptr, indices: positions of the linked articles of every article
+        in order of appearance (compressed sparse rows)
+      - rindptr, rindices: positions of the articles linking to every article
+    """
+
+    # file format identifier and version
+    magic = b'WGLINKS1'
+
+    # header: magic, byte order, capitalization, number of identifiers, links
+    # and bytes used by titles
+    header = struct.Struct('<8scc6xQQQ')
+
+    # target of identifiers which do not belong to an existing article
+    missing = 0xffffffff
+
+    # tables read from SQL dumps in this order, as links refer to pages and
+    # link targets by their id
+    tables = ('page', 'linktarget', 'redirect', 'pagelinks')
+
+    # maximum number of redirects followed to find an article
+    maximum_redirects = 10
+
+    # Most links lead to a few popular articles, so the ids of link titles
+    # are cached. The cache is emptied when it reaches this size.
+    maximum_cached_titles = 1000000
+
+    # decompression by file extension
+    openers = {
+        '.gz': gzip.open,
+        '.bz2': bz2.open,
+        '.xz': lzma.open
+    }
+
+    # target of a wikitext link, which ends with a label, section or the
+    # closing brackets
+    link_pattern = compile(r'\[\[([^\[\]{}|<>\n]+)')
+
+    # SQL dumps consist of lines inserting many rows. A row is matched as a
+    # whole first, so parentheses and commas in titles do not split it.
+    insert_pattern = compile(r'INSERT INTO `(\w+)` VALUES ')
+    table_pattern = compile(r'(?:CREATE TABLE|INSERT INTO) `(\w+)`')
+    row_pattern = compile(r"\(((?:'(?:[^'\\]|\\.)*'|[^'()])*)\)")
+    escape_pattern = compile(r'\\(.)')
+    escapes = {'0': '\0', 'n': '\n', 'r': '\r', 't': '\t', 'Z': '\x1a'}
+
+    # leading columns of rows of the page (id, namespace, title), linktarget
+    # (id, namespace, title) and redirect (page id, namespace, title) tables
+    title_row_pattern = compile(r"(\d+),(-?\d+),'((?:[^'\\]|\\.)*)'")
+
+    # rows of the pagelinks table before 2024 (page id, namespace, title,
+    # page namespace) and after (page id, page namespace, link target id),
+    # which contain numbers only and are matched directly
+    title_link_pattern = compile(r"(\d+),(-?\d+),'((?:[^'\\]|\\.)*)',(-?\d+)$")
+    target_link_row_pattern = compile(r'\((\d+),-?\d+,(\d+)\)')
+
+    def __init__(self, capitalize=True, metrics=None):
+        """
+        :param capitalize: wiki capitalizes the first letter of titles (taken
+                           from the site information of XML dumps)
+        :param metrics: Metrics object to report durations to (None to
+                        disable)
+        """
+        self.capitalize = capitalize
+        self.metrics = metrics
+
+        # Identifiers get provisional ids in order of appearance. Links are
+        # kept as two arrays of these ids until the index is saved.
+        self.__ids = {}
+        self.__identifiers = []
+        self.__pages = bytearray()
+        self.__redirects = {}
+        self.__sources = array('I')
+        self.__targets = array('I')
+
+        # ids of link titles as written in wikitext
+        self.__titles = {}
+
+        # ids used by the tables of SQL dumps, they are kept as strings as
+        # converting billions of them would take longer than reading links
+        self.__page_ids = {}
+        self.__link_targets = {}
+
+        self.__statistics = {
+            'pages': 0,
+            'redirects': 0,
+            'links': 0
+        }
+
+    @staticmethod
+    def identifier(title, capitalize=True):
+        """
+        :param title: article title using spaces or underscores
+        :param capitalize: capitalize the first letter like the wiki does
+        :return: identifier of the title escaped the same way MediaWiki does
+                 in links
+        """
+        title = ' '.join(title.replace('_', ' ').split())
+        if capitalize:
+            title = title[:1].upper() + title[1:]
+
+        return quote(title.replace(' ', '_'), safe=';@$!*(),/~:')
+
+    @staticmethod
+    def layout(count, link_count, title_size):
+        """
+        :param count: number of identifiers
+        :param link_count: number of links
+        :param title_size: bytes used by all identifiers
+        :return: dictionary of array name to type code, offset and length
+        """
+        sections = {}
+        offset = DumpIndexer.header.size
+
+        for name, typecode, length in (('offsets', 'Q', count + 1),
+                                       ('titles', 'B', title_size),
+                                       ('targets', 'I', count),
+                                       ('indptr', 'Q', count + 1),
+                                       ('indices', 'I', link_count),
+                                       ('rindptr', 'Q', count + 1),
+                                       ('rindices', 'I', link_count)):
+            sections[name] = typecode, offset, length
+
+            size = array(typecode).itemsize * length
+            offset += (size + 7) // 8 * 8
+
+        return sections
+
+    def __open(self, file_path):
+        opener = self.openers.get(path.splitext(file_path)[1].lower(), open)
+        return opener(file_path, 'rb')
+
+    def kind(self, file_path):
+        """
+        :param file_path: dump file
+        :return: 'xml' for XML dumps or the name of the table of SQL dumps
+        """
+        with TextIOWrapper(self.__open(file_path), encoding='utf-8', errors='replace') as file:
+            for _, line in zip(range(1000), file):
+                if '<mediawiki' in line:
+                    return 'xml'
+
+                match = self.table_pattern.search(line)
+                if match is not None:
+                    return match.group(1)
+
+        raise ValueError(f'unknown dump format: {file_path}')
+
+    def __id(self, identifier, create=True):
+        # get provisional id of an identifier
+        i = self.__ids.get(identifier)
+        if i is None and create:
+            i = self.__ids[identifier] = len(self.__identifiers)
+            self.__identifiers.append(identifier)
+            self.__pages.append(0)
+
+        return i
+
+    def __page(self, identifier, redirect=False):
+        i = self.__id(identifier)
+        if not self.__pages[i]:
+            self.__pages[i] = 1
+            self.__statistics['redirects' if redirect else 'pages'] += 1
+
+        return i
+
+    def __link(self, source, target):
+        self.__sources.append(source)
+        self.__targets.append(target)
+        self.__statistics['links'] += 1
+
+    def __title(self, title, namespaces):
+        try:
+            return self.__titles[title]
+        except KeyError:
+            pass
+
+        if len(self.__titles) >= self.maximum_cached_titles:
+            self.__titles = {}
+
+        i = self.__titles[title] = self.__normalized_title(title, namespaces)
+        return i
+
+    def __normalized_title(self, title, namespaces):
+        # Get the id of a link target in the main namespace. Links to
+        # sections of the same page and other namespaces are ignored, a
+        # leading colon prevents categorizing. Interwiki links are dropped
+        # later as no such article exists.
+        title = unquote(title.partition('#')[0]).strip()
+        if title.startswith(':'):
+            title = title[1:].strip()
+
+        prefix, colon, _ = title.partition(':')
+        if not title or colon and ' '.join(prefix.replace('_', ' ').split()).lower() in namespaces:
+            return None
+
+        return self.__id(self.identifier(title, self.capitalize))
+
+    def __read_xml(self, file):
+        # Elements are parsed one by one and every page is removed from the
+        # tree after reading it, so memory usage does not grow with the dump.
+        context = iterparse(file, events=('start', 'end'))
+        _, root = next(context)
+        ns = root.tag[:root.tag.index('}') + 1] if root.tag.startswith('{') else ''
+        namespaces = set()
+
+        for event, element in context:
+            if event != 'end':
+                continue
+
+            tag = element.tag[len(ns):]
+            if tag == 'namespace' and element.get('key') != '0' and element.text:
+                namespaces.add(element.text.lower())
+
+            elif tag == 'case':
+                self.capitalize = element.text == 'first-letter'
+
+            elif tag == 'page':
+                if element.findtext(f'{ns}ns') == '0':
+                    self.__read_page(element, ns, namespaces)
+                root.clear()
+
+    def __read_page(self, page, ns, namespaces):
+        title = page.findtext(f'{ns}title')
+        redirect = page.find(f'{ns}redirect')
+
+        source = self.__page(self.identifier(title, self.capitalize), redirect=redirect is not None)
+
+        # links of redirects are not used
+        if redirect is not None:
+            target = self.__title(redirect.get('title', ''), namespaces)
+            if target is not None:
+                self.__redirects[source] = target
+            return
+
+        text = page.findtext(f'{ns}revision/{ns}text') or ''
+        for title in self.link_pattern.findall(text):
+            target = self.__title(title, namespaces)
+            if target is not None:
+                self.__link(source, target)
+
+    def __unescape(self, value):
+        return self.escape_pattern.sub(lambda m: self.escapes.get(m.group(1), m.group(1)), value)
+
+    def __rows(self, file, table, pattern):
+        # matched leading columns of all rows inserted into a table
+        for line in file:
+            match = self.insert_pattern.match(line)
+            if match is None or match.group(1) != table:
+                continue
+
+            for row in self.row_pattern.finditer(line, match.end()):
+                columns = pattern.match(row.group(1))
+                if columns is not None:
+                    yield columns.groups()
+
+    def __read_sql(self, file, table):
+        # Titles are stored normalized. Pages must be read first, as all
+        # other tables refer to their ids and titles which are not the title
+        # of a page are ignored.
+        if table == 'page':
+            for page_id, namespace, title in self.__rows(file, table, self.title_row_pattern):
+                if namespace == '0':
+                    i = self.__page(self.identifier(self.__unescape(title), False))
+                    self.__page_ids[page_id] = i
+
+        elif table == 'linktarget':
+            for target_id, namespace, title in self.__rows(file, table, self.title_row_pattern):
+                if namespace == '0':
+                    i = self.__id(self.identifier(self.__unescape(title), False), create=False)
+                    if i is not None:
+                        self.__link_targets[target_id] = i
+
+        elif table == 'redirect':
+            for page_id, namespace, title in self.__rows(file, table, self.title_row_pattern):
+                source = self.__page_ids.get(page_id)
+                target = self.__id(self.identifier(self.__unescape(title), False), create=False)
+
+                if namespace == '0' and source is not None and target is not None:
+                    self.__redirects[source] = target
+                    self.__statistics['pages'] -= 1
+                    self.__statistics['redirects'] += 1
+
+        elif table == 'pagelinks':
+            for line in file:
+                match = self.insert_pattern.match(line)
+                if match is None or match.group(1) != table:
+                    continue
+
+                if self.target_link_row_pattern.match(line, match.end()):
+                    self.__read_target_links(line, match.end())
+                else:
+                    for row in self.row_pattern.finditer(line, match.end()):
+                        self.__read_title_link(row.group(1))
+
+        else:
+            raise ValueError(f'unsupported table: {table}')
+
+    def __read_target_links(self, line, start):
+        # a dump contains billions of these rows, links are added directly
+        page_ids, link_targets = self.__page_ids, self.__link_targets
+        sources, targets = self.__sources, self.__targets
+        count = len(sources)
+
+        for page_id, target_id in self.target_link_row_pattern.findall(line, start):
+            source = page_ids.get(page_id)
+            target = link_targets.get(target_id)
+            if source is not None and target is not None:
+                sources.append(source)
+                targets.append(target)
+
+        self.__statistics['links'] += len(sources) - count
+
+    def __read_title_link(self, row):
+        columns = self.title_link_pattern.match(row)
+        if columns is None or columns.group(2) != '0':
+            return
+
+        page_id, _, title, _ = columns.groups()
+        source = self.__page_ids.get(page_id)
+        target = self.__id(self.identifier(self.__unescape(title), False), create=False)
+
+        if source is not None and target is not None:
+            self.__link(source, target)
+
+    def read(self, file_path):
+        """
+        read a dump file (SQL dumps must be read in the order of `tables`)
+
+        :param file_path: XML or SQL dump file
+        :return:
+        """
+        kind = self.kind(file_path)
+        logging.info(f'{file_path} ({kind})')
+
+        start = perf_counter()
+        with self.__open(file_path) as file:
+            if kind == 'xml':
+                self.__read_xml(file)
+            else:
+                self.__read_sql(TextIOWrapper(file, encoding='utf-8', errors='replace'), kind)
+
+        if self.metrics is not None:
+            self.metrics.observe('index', perf_counter() - start)
+
+    def read_all(self, file_paths):
+        """
+        read multiple dump files in the required order
+
+        :param file_paths: list of XML or SQL dump files
+        :return:
+        """
+        order = ('xml',) + self.tables
+        kinds = {file_path: self.kind(file_path) for file_path in file_paths}
+
+        for kind in kinds.values():
+            if kind not in order:
+                raise ValueError(f'unsupported table: {kind}')
+
+        for file_path in sorted(file_paths, key=lambda p: order.index(kinds[p])):
+            self.read(file_path)
+
+    def __resolve(self, i, position):
+        # position of the article an identifier leads to or `missing`
+        for _ in range(self.maximum_redirects):
+            if i not in self.__redirects:
+                break
+            i = self.__redirects[i]
+
+        if i in self.__redirects or not self.__pages[i]:
+            return self.missing
+
+        return position[i]
+
+    def save(self, file_path):
+        """
+        resolve redirects and links and write the index file (links are
+        removed from the indexer)
+
+        :param file_path: index file
+        :return:
+        """
+        start = perf_counter()
+        identifiers = self.__identifiers
+
+        # positions of all pages in the sorted list of identifiers
+        order = sorted((i for i in range(len(identifiers)) if self.__pages[i]), key=identifiers.__getitem__)
+        count = len(order)
+
+        position = array('I', [self.missing]) * len(identifiers)
+        for p, i in enumerate(order):
+            position[i] = p
+
+        targets = array('I', (self.__resolve(i, position) for i in order))
+
+        # row of every article and the row a link to an identifier leads to
+        rows = array('I', [self.missing]) * len(identifiers)
+        leads = array('I', [self.missing]) * len(identifiers)
+        for p, i in enumerate(order):
+            leads[i] = targets[p]
+            if targets[p] == p:
+                rows[i] = p
+
+        # Map links to rows in place, which keeps memory usage constant, and
+        # group them by article using a counting sort, which keeps their
+        # order. Links of redirects and links to the article itself are
+        # dropped.
+        sources, links = self.__sources, self.__targets
+        starts = array('Q', [0]) * (count + 1)
+        for k in range(len(links)):
+            p, q = rows[sources[k]], leads[links[k]]
+            if p == self.missing or q == p:
+                q = self.missing
+            elif q != self.missing:
+                starts[p + 1] += 1
+
+            sources[k], links[k] = p, q
+
+        for p in range(count):
+            starts[p + 1] += starts[p]
+
+        grouped = array('I', [0]) * starts[count]
+        fill = array('Q', starts)
+        for p, q in zip(sources, links):
+            if q != self.missing:
+                grouped[fill[p]] = q
+                fill[p] += 1
+
+        del rows, leads, fill
+        self.__sources, self.__targets = array('I'), array('I')
+
+        # drop duplicate links keeping their first appearance
+        indptr = array('Q', [0])
+        indices = array('I')
+        for p in range(count):
+            indices.extend(dict.fromkeys(grouped[starts[p]:starts[p + 1]]))
+            indptr.append(len(indices))
+
+        del grouped
+
+        # invert the links, articles linking to another one are ordered by
+        # their identifiers
+        rindptr = array('Q', [0]) * (count + 1)
+        for q in indices:
+            rindptr[q + 1] += 1
+        for p in range(count):
+            rindptr[p + 1] += rindptr[p]
+
+        rindices = array('I', [0]) * len(indices)
+        fill = array('Q', rindptr)
+        for p in range(count):
+            for q in indices[indptr[p]:indptr[p + 1]]:
+                rindices[fill[q]] = p
+                fill[q] += 1
+
+        # identifiers are ASCII as they are escaped
+        offsets = array('Q', [0])
+        titles = bytearray()
+        for i in order:
+            titles += identifiers[i].encode('ascii')
+            offsets.append(len(titles))
+
+        sections = self.layout(count, len(indices), len(titles))
+        data = {
+            'offsets': offsets,
+            'titles': titles,
+            'targets': targets,
+            'indptr': indptr,
+            'indices': indices,
+            'rindptr': rindptr,
+            'rindices': rindices
+        }
+
+        with open(file_path, 'wb') as file:
+            file.write(self.header.pack(self.magic, byteorder[0].encode('ascii'), b'1' if self.capitalize else b'0',
+                                        count, len(indices), len(titles)))
+
+            for name, (_, offset, _) in sections.items():
+                file.write(bytes(offset - file.tell()))
+                file.write(data[name])
+
+            # pad the last array
+            file.write(bytes(-file.tell() % 8))
+
+        self.__statistics['articles'] = sum(1 for p in range(count) if targets[p] == p)
+        self.__statistics['saved_links'] = len(indices)
+
+        if self.metrics is not None:
+            self.metrics.observe('index', perf_counter() - start)
+
+    def statistics(self):
+        """
+        :return: dictionary of read pages, redirects and links and saved
+                 articles and links
+        """
+        return dict(self.__statistics)
@@ -0,0 +1,147 @@
+from array import array
+from mmap import ACCESS_READ, mmap
+from sys import byteorder
+from time import perf_counter
+from urllib.parse import unquote
+
+from wikigraph.wikipedia.DumpIndexer import DumpIndexer
+
+
+class DumpLinkSource:
+    """
+    Link source which reads links from an index file created by DumpIndexer
+    instead of downloading articles, so graphs of a whole wiki can be built
+    offline. The file is memory mapped: only the parts of the index which are
+    needed are read and the operating system caches them for all processes.
+
+    Identifiers of redirects lead to their target like requests to Wikipedia
+    do. Articles which are not part of the index have no links. The language
+    of articles is ignored, an index contains a single wiki.
+    """
+
+    # Links are read without any request, so batches only reduce the number
+    # of calls.
+    batch_size = 1000
+
+    def __init__(self, file_path, metrics=None):
+        """
+        :param file_path: index file created by DumpIndexer
+        :param metrics: Metrics object to report lookups to (None to disable)
+        """
+        self.file_path = file_path
+        self.metrics = metrics
+
+        self.__file = open(file_path, 'rb')
+        self.__map = mmap(self.__file.fileno(), 0, access=ACCESS_READ)
+        self.__views = {}
+
+        magic, order, capitalize, count, link_count, title_size = DumpIndexer.header.unpack_from(self.__map)
+        if magic != DumpIndexer.magic:
+            self.close()
+            raise ValueError(f'not a link index: {file_path}')
+
+        if order.decode('ascii') != byteorder[0]:
+            self.close()
+            raise ValueError(f'link index was created on a machine with different byte order: {file_path}')
+
+        self.capitalize = capitalize == b'1'
+        self.article_count = count
+        self.link_count = link_count
+
+        # arrays are used without copying them
+        sections = DumpIndexer.layout(count, link_count, title_size)
+        for name, (typecode, offset, length) in sections.items():
+            size = array(typecode).itemsize * length
+            self.__views[name] = memoryview(self.__map)[offset:offset + size].cast(typecode)
+
+        # titles are compared as bytes
+        self.__titles_offset = sections['titles'][1]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __title(self, p):
+        offsets = self.__views['offsets']
+        return self.__map[self.__titles_offset + offsets[p]:self.__titles_offset + offsets[p + 1]]
+
+    def __position(self, article):
+        # Find the identifier using binary search and follow redirects.
+        # Identifiers are normalized, as links may use other escaping.
+        key = DumpIndexer.identifier(unquote(article.identifier), self.capitalize).encode('ascii')
+
+        low, high = 0, self.article_count
+        while low < high:
+            middle = (low + high) // 2
+            if self.__title(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low == self.article_count or self.__title(low) != key:
+            return None
+
+        p = self.__views['targets'][low]
+        return p if p != DumpIndexer.missing else None
+
+    def __links(self, articles, indptr, indices, maximum):
+        start = perf_counter()
+        indptr, indices = self.__views[indptr], self.__views[indices]
+
+        result = []
+        for article in articles:
+            p = self.__position(article)
+            if p is None:
+                result.append([])
+                continue
+
+            end = indptr[p + 1] if maximum is None else min(indptr[p + 1], indptr[p] + maximum)
+            result.append([self.__title(q).decode('ascii') for q in indices[indptr[p]:end]])
+
+        if self.metrics is not None:
+            self.metrics.observe('fetch', perf_counter() - start)
+
+        return result
+
+    def linked(self, articles, maximum=None):
+        """
+        :param articles: list of articles
+        :param maximum: maximum number of links per article (None for all)
+        :return: list of identifier lists in the same order as articles
+        """
+        return self.__links(articles, 'indptr', 'indices', maximum)
+
+    async def linked_async(self, session, articles, maximum=None):
+        """
+        same as linked, the session is not used
+
+        :param session: aiohttp.ClientSession object
+        :param articles: list of articles
+        :param maximum: maximum number of links per article (None for all)
+        :return: list of identifier lists in the same order as articles
+        """
+        return self.linked(articles, maximum)
+
+    def linking(self, articles, maximum=None):
+        """
+        :param articles: list of articles
+        :param maximum: maximum number of backlinks per article (None for
+                        all)
+        :return: list of identifier lists in the same order as articles
+        """
+        return self.__links(articles, 'rindptr', 'rindices', maximum)
+
+    def close(self):
+        """
+        close the index file
+        :return:
+        """
+        # the map can only be closed after releasing all views
+        for view in self.__views.values():
+            view.release()
+
+        self.__views = {}
+        self.__map.close()
+        self.__file.close()
@@ -0,0 +1,104 @@
+from collections import OrderedDict
+from re import compile
+
+# same expression as used by Article to parse a whole text at once
+LINK_PATTERN = compile(r'href="/wiki/([^:]*?)"')
+LINK_PREFIX = 'href="/wiki/'
+
+
+class LinkScanner:
+    """
+    Extracts linked article identifiers from a text which is received in
+    chunks. The result is the same as parsing the concatenated text at once,
+    even if a link is split across two chunks. Scanning can be stopped as soon
+    as enough distinct links have been found.
+    """
+
+    def __init__(self, identifier, maximum=None):
+        """
+        :param identifier: identifier of the scanned article (links to the
+                           article itself are skipped)
+        :param maximum: number of distinct links after which scanning is done
+                        (None to scan the whole text)
+        """
+        self.identifier = identifier
+        self.maximum = maximum
+
+        self.__links = OrderedDict()
+        self.__buffer = ''
+
+    @staticmethod
+    def parse(text, identifier):
+        """
+        Extract all distinct links of a whole text at once. This depends on
+        its arguments only, so it can be run in a process pool.
+
+        :param text: complete text
+        :param identifier: identifier of the article (links to the article
+                           itself are skipped)
+        :return: list of identifiers in order of appearance
+        """
+        # find all references using regular expressions
+        matches = LINK_PATTERN.findall(text)
+
+        # remove anchor
+        matches = map(lambda m: m.split('#')[0], matches)
+
+        # remove duplicates
+        matches = OrderedDict.fromkeys(matches)
+
+        # filter links to the article itself
+        return list(filter(lambda m: m != identifier, matches))
+
+    @property
+    def done(self):
+        return self.maximum is not None and len(self.__links) >= self.maximum
+
+    @property
+    def links(self):
+        """
+        :return: list of distinct identifiers found so far
+        """
+        links = list(self.__links)
+
+        if self.maximum is not None:
+            links = links[:self.maximum]
+
+        return links
+
+    def feed(self, chunk):
+        """
+        scan the next chunk of text
+
+        :param chunk: text following the previously scanned chunks
+        :return: True if enough links have been found
+        """
+        buffer = self.__buffer + chunk
+        position = 0
+
+        for match in LINK_PATTERN.finditer(buffer):
+            position = match.end()
+
+            # remove anchor and skip links to the article itself
+            link = match.group(1).split('#')[0]
+            if link != self.identifier:
+                self.__links[link] = None
+
+            if self.done:
+                self.__buffer = ''
+                return True
+
+        # Keep the end of the buffer which may belong to a link continued in
+        # the next chunk. This is either the start of a link prefix or a
+        # complete prefix which is neither followed by a closing quote nor by
+        # a colon yet.
+        keep = max(position, len(buffer) - len(LINK_PREFIX) + 1)
+
+        start = buffer.rfind(LINK_PREFIX, position)
+        if start >= 0:
+            rest = buffer[start + len(LINK_PREFIX):]
+            if '"' not in rest and ':' not in rest:
+                keep = min(keep, start)
+
+        self.__buffer = buffer[keep:]
+        return False